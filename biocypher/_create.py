@@ -31,6 +31,7 @@ Todo:
 
 from typing import Union, Optional
 from datetime import datetime
+from collections.abc import Generator
 from dataclasses import field, dataclass
 from urllib.request import urlopen
 import os
@@ -45,6 +46,7 @@ __all__ = [
     'BioCypherEdge',
     'BioCypherNode',
     'BioCypherRelAsNode',
+    'TrustedStream',
     'VersionNode',
 ]
 
@@ -347,6 +349,36 @@ class BioCypherRelAsNode:
         return self.target_edge
 
 
+class TrustedStream(Generator):
+    """
+    Generator of BioCypher entities created by the
+    :py:class:`biocypher._translate.Translator`, which are known to be of the
+    correct types: the batch writer does not check them again. Input of
+    other origin is checked.
+
+    Args:
+
+        gen (generator): the generator of the entities
+    """
+
+    __slots__ = ('gen', )
+
+    def __init__(self, gen: Generator):
+        self.gen = gen
+
+    def __next__(self):
+        return next(self.gen)
+
+    def send(self, value):
+        return self.gen.send(value)
+
+    def throw(self, *args):
+        return self.gen.throw(*args)
+
+    def close(self):
+        self.gen.close()
+
+
 class VersionNode:
     """
     Versioning and graph structure information meta node. Similar to
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+
+#
+# Copyright 2021, Heidelberg University Clinic
+#
+# File author(s): Sebastian Lobentanzer
+#                 ...
+#
+# Distributed under GPLv3 license, see the file `LICENSE`.
+#
+"""
+Incremental (delta) export of the batch writer. A persistent index maps
+the key of every node (its ID) and edge (source and target, and the
+relationship ID if edges are distinguished by it) to a hash of its CSV
+row in the previous build. Compared to it, the writer only emits rows of
+added and changed entities, and lists the keys of removed ones; a Cypher
+script applies these changes to a live database with `LOAD CSV`.
+"""
+
+from ._logger import logger
+
+logger.debug(f'Loading module {__name__}.')
+
+from typing import Any, Optional
+from collections import defaultdict
+import os
+import pickle
+
+from ._index import fingerprint
+
+__all__ = ['DeltaIndex']
+
+_KINDS = ('nodes', 'edges')
+
+
+def _load(path: str) -> dict:
+    """
+    Loads the hashes of a previous build, or returns an empty index if
+    there is none.
+    """
+
+    if not os.path.exists(path):
+
+        logger.info(
+            f'No delta index at `{path}`; all entities are new in this '
+            'build.'
+        )
+
+        return {kind: {} for kind in _KINDS}
+
+    logger.info(f'Loading delta index of previous build from `{path}`.')
+
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+class DeltaIndex:
+    """
+    Content hashes of the entities of the current and the previous build,
+    per kind (`'nodes'` or `'edges'`) and label.
+
+    Args:
+        path:
+            File of the index; read at instantiation and replaced by
+            :py:meth:`save`.
+    """
+    def __init__(self, path: str):
+
+        self.path = path
+        self.previous = _load(path)
+        self.current = {kind: defaultdict(dict) for kind in _KINDS}
+        self.counts = dict.fromkeys(('added', 'changed', 'unchanged'), 0)
+
+    def __getstate__(self) -> dict:
+
+        # the previous build is read from the file again when unpickled,
+        # eg, from a checkpoint
+        state = self.__dict__.copy()
+        del state['previous']
+
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+
+        self.__dict__.update(state)
+        self.previous = _load(self.path)
+
+    def changed(self, kind: str, label: str, key: Any, line: str) -> bool:
+        """
+        Records the row of an entity.
+
+        Returns:
+            bool: True if the entity is new or its row has changed since
+                the previous build.
+        """
+
+        h = fingerprint(line)
+        self.current[kind][label][key] = h
+        old = self.previous[kind].get(label, {}).get(key)
+
+        if old == h:
+            self.counts['unchanged'] += 1
+            return False
+
+        self.counts['added' if old is None else 'changed'] += 1
+
+        return True
+
+    def removed(self, kind: str) -> dict:
+        """
+        Returns the keys of the entities of the previous build that are not
+        in the current one, per label.
+        """
+
+        removed = {}
+
+        for label, hashes in self.previous[kind].items():
+
+            current = self.current[kind].get(label, {})
+            keys = [k for k in hashes if k not in current]
+
+            if keys:
+                removed[label] = keys
+
+        return removed
+
+    def save(self, path: Optional[str] = None) -> None:
+        """
+        Writes the hashes of the current build, to be compared to by the
+        next one.
+        """
+
+        path = path or self.path
+
+        logger.info(
+            'Delta to previous build: '
+            + ', '.join(f'{v} {k}' for k, v in self.counts.items())
+            + f'; saving delta index to `{path}`.',
+        )
+
+        with open(f'{path}.tmp', 'wb') as f:
+            pickle.dump(
+                {k: dict(v) for k, v in self.current.items()},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+
+        os.replace(f'{path}.tmp', path)
+
+
+def cypher_str(s: str) -> str:
+    """
+    Quotes a string as Cypher literal.
+    """
+
+    s = s.replace('\\', '\\\\').replace("'", "\\'").replace('\t', '\\t')
+
+    return f"'{s}'"
+
+
+def cypher_value(
+    field: str,
+    prop_type: str,
+    adelim: str,
+    quote: str,
+) -> str:
+    """
+    Returns the Cypher expression converting a CSV field of a row in
+    `LOAD CSV` to the value of a property. `LOAD CSV` only removes double
+    quotes, other quote characters are stripped here.
+
+    Args:
+        field (str): the field, eg, `row[1]`
+        prop_type (str): the type of the property
+        adelim (str): array delimiter
+        quote (str): quote character of the writer
+    """
+
+    if prop_type in ('int', 'long'):
+        return f'toInteger({field})'
+
+    if prop_type in ('float', 'double', 'dbl'):
+        return f'toFloat({field})'
+
+    if prop_type in ('bool', 'boolean'):
+        return f'toBoolean({field})'
+
+    if quote != '"':
+        # empty fields are null, and shorter than the quotes
+        field = (
+            f'CASE WHEN size({field}) >= 2 '
+            f'THEN substring({field}, 1, size({field}) - 2) ELSE null END'
+        )
+
+    if prop_type in ('str[]', 'string[]', 'list'):
+        return f'split({field}, {cypher_str(adelim)})'
+
+    return field
@@ -32,8 +32,15 @@ import neo4j_utils
 
 from . import _misc
 from ._write import BatchWriter
+from ._stats import Stats
+from ._parquet import ParquetWriter
 from ._config import config as _config
-from ._create import VersionNode, BioCypherEdge, BioCypherNode
+from ._create import (
+    VersionNode,
+    BioCypherEdge,
+    BioCypherNode,
+    TrustedStream,
+)
 from ._translate import Translator, BiolinkAdapter, OntologyAdapter
 
 __all__ = ['Driver']
@@ -100,6 +107,89 @@ class Driver(neo4j_utils.Driver):
             Biolink class of the node to join the tail ontology to.
         tail_join_node:
             Ontology class of the node to join the head ontology to.
+        parallel_write:
+            Serialize and write part files of the batch writer in a pool
+            of workers, either `'process'` or `'thread'`.
+        write_workers:
+            Number of workers for parallel writing; defaults to the number
+            of CPUs.
+        translation_workers:
+            Translate input nodes and edges in a pool of this many
+            processes; on the main thread if None or 1. Not used with
+            checkpoints, which count the input consumed.
+        translation_chunk_size:
+            Number of input items per job of the translation workers.
+        node_dedup:
+            Index used by the batch writer to detect duplicate nodes:
+            `'set'`, `'fingerprint'`, `'disk'`, or `'bloom'`.
+        dedup_capacity:
+            Expected number of nodes, to size the `'fingerprint'` and
+            `'bloom'` indices.
+        dedup_fpr:
+            False positive rate of the `'bloom'` index.
+        dedup_memory_items:
+            Maximum number of node fingerprints kept in memory by the
+            `'disk'` index.
+        edge_dedup_with_id:
+            Whether edges between the same nodes that differ in their
+            relationship ID are distinct (not duplicates).
+        edge_index:
+            Index used by the batch writer to detect duplicate edges:
+            `'set'`, `'fingerprint'`, `'disk'`, or `'bloom'`.
+        compression:
+            Compress the part files of the batch writer, `'gzip'` or
+            `'zstd'`.
+        compression_level:
+            Compression level of the part files.
+        compression_thread:
+            Compress part files in a background thread.
+        write_memory_budget:
+            Estimated bytes of all batches held by the batch writer
+            combined, above which the largest batch is written.
+        write_part_size:
+            Estimated bytes above which a batch is written to a part file.
+        async_write:
+            Write part files in a background thread of the batch writer.
+        output_format:
+            Format of the files written by :meth:`write_nodes` and
+            :meth:`write_edges`: `'neo4j'` for CSV files for the Neo4j
+            admin import (default), or `'parquet'` for one Parquet file
+            per node and edge type (requires `pyarrow`).
+        checkpoint_interval:
+            Number of input items after which the batch writer saves a
+            checkpoint of its state to the output directory.
+        resume:
+            Resume an interrupted build from the checkpoint in the output
+            directory, skipping input written before it.
+        delta_index:
+            Path of the file with the row hashes of the previous build;
+            if given, only the changes to it are written, with a Cypher
+            script applying them to the database.
+        n_shards:
+            Number of shards the part files of each label are split into
+            by a hash of the node ID, or the source ID of edges.
+        property_union:
+            Allow entities of one label without configured properties to
+            have different properties; the header lists their union.
+        edge_dedup:
+            De-duplication of edges by the batch writer: `'index'`, or
+            `'external'` to sort them on disk in bounded memory.
+        sort_buffer_items:
+            Number of edges held in memory by `'external'` edge
+            de-duplication before they are spilled to a sorted run.
+        edge_integrity:
+            Check that the source and target of each edge have been
+            written as nodes: `'count'` to report dangling edges (see
+            :meth:`log_dangling_edges`), `'filter'` to also remove them.
+        collect_stats:
+            Collect timings and throughput of the offline pipeline, see
+            :meth:`get_stats`.
+        stats_interval:
+            Seconds between progress messages in the log, if statistics
+            are collected.
+        missing_type_examples:
+            Number of example IDs kept for each input type that is not in
+            the schema configuration, see :meth:`log_missing_bl_types`.
     """
     def __init__(
         self,
@@ -126,6 +216,34 @@ class Driver(neo4j_utils.Driver):
         tail_ontology_url: Optional[str] = None,
         head_join_node: Optional[str] = None,
         tail_join_node: Optional[str] = None,
+        parallel_write: Optional[str] = None,
+        write_workers: Optional[int] = None,
+        translation_workers: Optional[int] = None,
+        translation_chunk_size: Optional[int] = None,
+        node_dedup: Optional[str] = None,
+        dedup_capacity: Optional[int] = None,
+        dedup_fpr: Optional[float] = None,
+        dedup_memory_items: Optional[int] = None,
+        edge_dedup_with_id: Optional[bool] = None,
+        edge_index: Optional[str] = None,
+        compression: Optional[str] = None,
+        compression_level: Optional[int] = None,
+        compression_thread: Optional[bool] = None,
+        write_memory_budget: Optional[int] = None,
+        write_part_size: Optional[int] = None,
+        async_write: Optional[bool] = None,
+        output_format: Optional[str] = None,
+        checkpoint_interval: Optional[int] = None,
+        resume: Optional[bool] = None,
+        delta_index: Optional[str] = None,
+        n_shards: Optional[int] = None,
+        property_union: Optional[bool] = None,
+        edge_dedup: Optional[str] = None,
+        sort_buffer_items: Optional[int] = None,
+        edge_integrity: Optional[str] = None,
+        collect_stats: Optional[bool] = None,
+        stats_interval: Optional[float] = None,
+        missing_type_examples: Optional[int] = None,
     ):
 
         # Neo4j options
@@ -163,6 +281,69 @@ class Driver(neo4j_utils.Driver):
         self.head_join_node = head_join_node or _config('head_join_node')
         self.tail_join_node = tail_join_node or _config('tail_join_node')
 
+        self.parallel_write = parallel_write or _config('parallel_write')
+        self.write_workers = write_workers or _config('write_workers')
+
+        self.translation_workers = translation_workers or _config(
+            'translation_workers',
+        )
+        self.translation_chunk_size = int(
+            translation_chunk_size or _config('translation_chunk_size'),
+        )
+
+        self.node_dedup = node_dedup or _config('node_dedup')
+        self.dedup_capacity = int(dedup_capacity or _config('dedup_capacity'))
+        self.dedup_fpr = float(dedup_fpr or _config('dedup_fpr'))
+        self.dedup_memory_items = int(
+            dedup_memory_items or _config('dedup_memory_items'),
+        )
+        self.edge_dedup_with_id = edge_dedup_with_id or _config(
+            'edge_dedup_with_id',
+        )
+        self.edge_index = edge_index or _config('edge_index')
+
+        self.compression = compression or _config('compression')
+        self.compression_level = compression_level or _config(
+            'compression_level',
+        )
+        self.compression_thread = compression_thread or _config(
+            'compression_thread',
+        )
+
+        self.write_memory_budget = write_memory_budget or _config(
+            'write_memory_budget',
+        )
+        self.write_part_size = write_part_size or _config('write_part_size')
+        self.async_write = async_write or _config('async_write')
+
+        self.output_format = output_format or _config('output_format')
+
+        self.checkpoint_interval = checkpoint_interval or _config(
+            'checkpoint_interval',
+        )
+        self.resume = resume or _config('resume')
+        self.delta_index = delta_index or _config('delta_index')
+        self.n_shards = n_shards or _config('n_shards')
+        self.property_union = property_union or _config('property_union')
+        self.edge_dedup = edge_dedup or _config('edge_dedup')
+        self.sort_buffer_items = int(
+            sort_buffer_items or _config('sort_buffer_items'),
+        )
+        self.edge_integrity = edge_integrity or _config('edge_integrity')
+        self.stats = Stats(
+            enabled=collect_stats or _config('collect_stats'),
+            log_interval=stats_interval or _config('stats_interval'),
+        )
+        self.missing_type_examples = int(
+            missing_type_examples or _config('missing_type_examples'),
+        )
+
+        if self.output_format not in ('neo4j', 'parquet'):
+            raise ValueError(
+                f'Unknown output format `{self.output_format}`; use `neo4j` '
+                'or `parquet`.'
+            )
+
         if self.offline:
 
             if not self.user_schema_config_path:
@@ -303,6 +484,7 @@ class Driver(neo4j_utils.Driver):
         self.translator = Translator(
             leaves=self.db_meta.leaves,
             strict_mode=self.strict_mode,
+            missing_examples=self.missing_type_examples,
         )
 
     def init_db(self):
@@ -566,7 +748,12 @@ class Driver(neo4j_utils.Driver):
 
         return result
 
-    def write_nodes(self, nodes):
+    def write_nodes(
+        self,
+        nodes,
+        stream: Optional[str] = None,
+        offset: int = 0,
+    ):
         """
         Write BioCypher nodes to disk using the :mod:`write` module,
         formatting the CSV to enable Neo4j admin import from the target
@@ -577,6 +764,10 @@ class Driver(neo4j_utils.Driver):
                 BioCypher-compatible CSV format; can be any compatible
                 (ie, translatable) input format or already as
                 :class:`biocypher.create.BioCypherNode`.
+            stream (str): name of the input for checkpoints; see
+                :meth:`get_stream_offset`.
+            offset (int): number of items of the input the adapter has
+                skipped itself when resuming.
         """
 
         # instantiate adapter on demand because it takes time to load
@@ -585,14 +776,56 @@ class Driver(neo4j_utils.Driver):
 
         self.start_batch_writer()
 
-        nodes = peekable(nodes)
+        if hasattr(nodes, '__len__'):
+            # for the estimated time remaining
+            self.stats.expect(len(nodes))
+
+        nodes = peekable(
+            self.batch_writer.open_stream(nodes, stream, offset),
+        )
+
+        if not nodes:
+            # eg, written completely before resuming
+            logger.info('No nodes to write.')
+            return self.batch_writer.close_stream()
+
         if not isinstance(nodes.peek(), BioCypherNode):
-            tnodes = self.translator.translate_nodes(nodes)
+            tnodes = self.translator.translate_nodes(
+                nodes,
+                **self._translation_pool(),
+            )
+
+            if self.stats.enabled:
+                tnodes = TrustedStream(
+                    self.stats.iterate('translation', tnodes.gen),
+                )
         else:
             tnodes = nodes
         # write node files
         return self.batch_writer.write_nodes(tnodes)
 
+    def _translation_pool(self) -> dict:
+        """
+        Arguments of the translator for pooled translation, if enabled.
+        """
+
+        if not self.translation_workers:
+            return {}
+
+        if self.checkpoint_interval or self.resume:
+            # workers read ahead of the writer, so the position of the
+            # input stream would not match the data written
+            logger.warning(
+                'Translation workers are not used with checkpoints; '
+                'translating on the main thread.',
+            )
+            return {}
+
+        return {
+            'workers': int(self.translation_workers),
+            'chunk_size': self.translation_chunk_size,
+        }
+
     def start_batch_writer(self, ) -> None:
         """
         Instantiate the batch writer if it does not exist.
@@ -602,7 +835,13 @@ class Driver(neo4j_utils.Driver):
             db_name (str): the name of the database to write the files to
         """
         if not self.batch_writer:
-            self.batch_writer = BatchWriter(
+
+            writer = (
+                ParquetWriter
+                if self.output_format == 'parquet' else BatchWriter
+            )
+
+            self.batch_writer = writer(
                 leaves=self.db_meta.leaves,
                 ontology_adapter=self.ontology_adapter,
                 translator=self.translator,
@@ -615,6 +854,29 @@ class Driver(neo4j_utils.Driver):
                 skip_duplicate_nodes=self.skip_duplicate_nodes,
                 wipe=self.wipe,
                 strict_mode=self.strict_mode,
+                parallel=self.parallel_write,
+                workers=self.write_workers,
+                node_dedup=self.node_dedup,
+                dedup_capacity=self.dedup_capacity,
+                dedup_fpr=self.dedup_fpr,
+                dedup_memory_items=self.dedup_memory_items,
+                edge_dedup_with_id=self.edge_dedup_with_id,
+                edge_index=self.edge_index,
+                compression=self.compression,
+                compression_level=self.compression_level,
+                compression_thread=self.compression_thread,
+                memory_budget=self.write_memory_budget,
+                part_size=self.write_part_size,
+                async_write=self.async_write,
+                checkpoint_interval=self.checkpoint_interval,
+                resume=self.resume,
+                delta_index=self.delta_index,
+                n_shards=self.n_shards,
+                property_union=self.property_union,
+                edge_dedup=self.edge_dedup,
+                sort_buffer_items=self.sort_buffer_items,
+                edge_integrity=self.edge_integrity,
+                stats=self.stats,
             )
 
     def start_ontology_adapter(self) -> None:
@@ -640,6 +902,8 @@ class Driver(neo4j_utils.Driver):
     def write_edges(
         self,
         edges,
+        stream: Optional[str] = None,
+        offset: int = 0,
     ) -> None:
         """
         Write BioCypher edges to disk using the :mod:`write` module,
@@ -651,6 +915,10 @@ class Driver(neo4j_utils.Driver):
                 BioCypher-compatible CSV format; can be any compatible
                 (ie, translatable) input format or already as
                 :class:`biocypher.create.BioCypherEdge`.
+            stream (str): name of the input for checkpoints; see
+                :meth:`get_stream_offset`.
+            offset (int): number of items of the input the adapter has
+                skipped itself when resuming.
         """
 
         # instantiate adapter on demand because it takes time to load
@@ -659,14 +927,173 @@ class Driver(neo4j_utils.Driver):
 
         self.start_batch_writer()
 
-        edges = peekable(edges)
+        if hasattr(edges, '__len__'):
+            # for the estimated time remaining
+            self.stats.expect(len(edges))
+
+        edges = peekable(
+            self.batch_writer.open_stream(edges, stream, offset),
+        )
+
+        if not edges:
+            logger.info('No edges to write.')
+            self.batch_writer.close_stream()
+            return
+
         if not isinstance(edges.peek(), BioCypherEdge):
-            tedges = self.translator.translate_edges(edges)
+            tedges = self.translator.translate_edges(
+                edges,
+                **self._translation_pool(),
+            )
+
+            if self.stats.enabled:
+                tedges = TrustedStream(
+                    self.stats.iterate('translation', tedges.gen),
+                )
         else:
             tedges = edges
         # write edge files
         self.batch_writer.write_edges(tedges)
 
+    def write_node_table(
+        self,
+        table,
+        id_column: str = 'id',
+        label_column: str = 'label',
+        batch_size: int = int(1e6),
+    ) -> bool:
+        """
+        Write a table of nodes, one node per row, to disk using the
+        :mod:`write` module. The table is translated and serialized
+        column by column, which is much faster than :meth:`write_nodes`
+        for large inputs.
+
+        Args:
+            table: :py:class:`pandas.DataFrame` or
+                :py:class:`pyarrow.Table` with the node IDs, their input
+                labels, and one column per property.
+            id_column (str): name of the column with the node IDs.
+            label_column (str): name of the column with the input labels.
+            batch_size (int): the number of rows per part file.
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        self.start_ontology_adapter()
+
+        self.start_batch_writer()
+
+        passed = True
+
+        for label, frame in self.translator.translate_node_table(
+            table,
+            id_column=id_column,
+            label_column=label_column,
+        ):
+
+            passed &= self.batch_writer.write_node_table(
+                frame,
+                label,
+                batch_size=batch_size,
+            )
+
+        return passed
+
+    def write_edge_table(
+        self,
+        table,
+        source_column: str = 'source',
+        target_column: str = 'target',
+        label_column: str = 'label',
+        id_column: Optional[str] = None,
+        batch_size: int = int(1e6),
+    ) -> bool:
+        """
+        Write a table of edges, one edge per row, to disk using the
+        :mod:`write` module, like :meth:`write_node_table`.
+
+        Args:
+            table: :py:class:`pandas.DataFrame` or
+                :py:class:`pyarrow.Table` with the source and target IDs,
+                the input labels, and one column per property.
+            source_column (str): name of the column with the source IDs.
+            target_column (str): name of the column with the target IDs.
+            label_column (str): name of the column with the input labels.
+            id_column (str): name of the column with the relationship
+                IDs, if any.
+            batch_size (int): the number of rows per part file.
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        self.start_ontology_adapter()
+
+        self.start_batch_writer()
+
+        passed = True
+
+        for label, edges in self.translator.translate_edge_table(
+            table,
+            source_column=source_column,
+            target_column=target_column,
+            label_column=label_column,
+            id_column=id_column,
+        ):
+
+            if label is None:
+                # edges represented as nodes
+                passed &= self.batch_writer.write_edges(
+                    edges,
+                    batch_size=batch_size,
+                )
+
+            else:
+                passed &= self.batch_writer.write_edge_table(
+                    edges,
+                    label,
+                    batch_size=batch_size,
+                )
+
+        return passed
+
+    def get_stream_offset(self, stream: str) -> int:
+        """
+        Returns the number of input items of a stream written before the
+        checkpoint of a resumed build. Adapters that can seek in their
+        source start reading there, and pass the number as `offset` to
+        :meth:`write_nodes` or :meth:`write_edges`; otherwise, the skipped
+        items are read and discarded.
+
+        Args:
+            stream (str): name of the input stream
+
+        Returns:
+            int: the number of items to skip
+        """
+
+        self.start_ontology_adapter()
+
+        self.start_batch_writer()
+
+        return self.batch_writer.get_stream_offset(stream)
+
+    def get_stats(self) -> dict:
+        """
+        Returns the timings and throughput of the offline pipeline so far,
+        if enabled by `collect_stats`: elapsed seconds, rows and bytes
+        written and their rates, the estimated seconds remaining (if the
+        inputs have a length), seconds per stage (translation, dedup,
+        serialization, write), and the same per label.
+
+        Returns:
+            dict: the statistics, see
+                :py:meth:`biocypher._stats.Stats.summary`
+        """
+
+        return self.stats.summary()
+
     def get_import_call(self):
         """
         Upon using the batch writer for writing admin import CSV files,
@@ -693,7 +1120,8 @@ class Driver(neo4j_utils.Driver):
     def log_missing_bl_types(self):
         """
         Get the set of Biolink types encountered without an entry in
-        the `schema_config.yaml` and print them to the logger.
+        the `schema_config.yaml` and print them to the logger, with the
+        number of entities and a few example IDs of each.
 
         Returns:
             set: a set of missing Biolink types
@@ -706,10 +1134,14 @@ class Driver(neo4j_utils.Driver):
                 'Input entities not accounted for due to them not being '
                 'present in the `schema_config.yaml` configuration file '
                 '(this is not necessarily a problem, if you did not intend '
-                'to include them in the database; see the log for details): \n'
+                'to include them in the database): \n'
             )
+            examples = self.translator.get_missing_type_examples()
+
             for k, v in mt.items():
-                msg += f'    {k}: {v} \n'
+                ex = ', '.join(str(e) for e in examples.get(k, []))
+                ex = f'(eg, {ex}) ' if ex else ''
+                msg += f'    {k}: {v} {ex}\n'
 
             logger.info(msg)
             return mt
@@ -768,6 +1200,35 @@ class Driver(neo4j_utils.Driver):
         else:
             logger.info('No duplicate edges in input.')
 
+    def log_dangling_edges(self):
+        """
+        Get the edge types with edges whose source or target has not been
+        written, if checked (see `edge_integrity`), and print them to the
+        logger.
+        """
+
+        de = self.batch_writer.get_dangling_edges()
+
+        if de:
+
+            etypes = de[0]
+            nids = de[1]
+
+            msg = ('Dangling edges encountered (node IDs in log): \n')
+            for typ, n in etypes.items():
+                msg += f'    {typ}: {n}\n'
+
+            logger.info(msg)
+
+            idmsg = ('Missing node IDs of dangling edges: \n')
+            for _id in nids:
+                idmsg += f'    {_id}\n'
+
+            logger.debug(idmsg)
+
+        else:
+            logger.info('No dangling edges in input.')
+
     def show_ontology_structure(self) -> None:
         """
         Show the ontology structure of the database using the Biolink schema and
@@ -0,0 +1,587 @@
+#!/usr/bin/env python
+
+#
+# Copyright 2021, Heidelberg University Clinic
+#
+# File author(s): Sebastian Lobentanzer
+#                 ...
+#
+# Distributed under GPLv3 license, see the file `LICENSE`.
+#
+"""
+Membership indices for de-duplication in the batch writer. All indices
+offer the same interface: `add(key)` returns True if the key was not seen
+before, and `key in index` checks membership without adding.
+
+Available kinds:
+
+    - `set`: exact Python set of the full keys; fastest, but costs around
+      100 bytes per key.
+
+    - `fingerprint`: 64-bit hashes of the keys in an open addressing table
+      backed by :py:class:`array.array`; around 12 bytes per key. Distinct
+      keys are only confused on a 64-bit hash collision.
+
+    - `disk`: like `fingerprint`, but above a maximum number of keys the
+      table is written to a sorted run on disk and searched there, keeping
+      memory bounded.
+
+    - `bloom`: approximate Bloom filter of configurable false positive
+      rate; around 2.4 bytes per key at 0.1 %. A false positive lets a new
+      key appear as already seen, ie, the entity is skipped as duplicate.
+"""
+
+from ._logger import logger
+
+logger.debug(f'Loading module {__name__}.')
+
+from array import array
+from typing import Any, Optional
+from bisect import bisect_left
+import os
+import math
+import mmap
+import heapq
+import shutil
+import hashlib
+import weakref
+import tempfile
+
+import numpy as np
+
+__all__ = [
+    'BloomIndex',
+    'DiskFingerprintIndex',
+    'FingerprintIndex',
+    'SetIndex',
+    'fingerprint',
+    'get_index',
+]
+
+
+def fingerprint(key: Any) -> int:
+    """
+    Stable, non-zero 64-bit hash of a key. Tuples are hashed part by part
+    with length prefixes, so that `('a_b', 'c')` and `('a', 'b_c')` do not
+    collide. Unlike the builtin `hash`, the result does not change between
+    interpreter sessions.
+    """
+
+    h = hashlib.blake2b(digest_size=8)
+
+    if isinstance(key, tuple):
+
+        for part in key:
+            part = str(part).encode('utf-8')
+            h.update(len(part).to_bytes(4, 'little'))
+            h.update(part)
+
+    else:
+        h.update(str(key).encode('utf-8'))
+
+    # zero marks empty slots in the fingerprint table
+    return int.from_bytes(h.digest(), 'little') or 1
+
+
+class SetIndex:
+    """
+    Exact index storing the full keys in a Python set.
+    """
+    def __init__(self):
+
+        self._keys = set()
+
+    def add(self, key: Any) -> bool:
+
+        if key in self._keys:
+            return False
+
+        self._keys.add(key)
+
+        return True
+
+    def __contains__(self, key: Any) -> bool:
+
+        return key in self._keys
+
+    def __len__(self) -> int:
+
+        return len(self._keys)
+
+
+class FingerprintIndex:
+    """
+    Open addressing hash table of 64-bit key fingerprints with linear
+    probing, stored in an unsigned 64-bit :py:class:`array.array`. The
+    table doubles when it is more than 70 % full.
+
+    Args:
+        capacity:
+            Expected number of keys; the initial table is sized so that
+            this many keys fit without resizing.
+    """
+
+    _MAX_LOAD = 0.7
+
+    def __init__(self, capacity: int = int(1e6)):
+
+        self._init_table(int(capacity / self._MAX_LOAD) + 1)
+
+    def _init_table(self, size: int) -> None:
+
+        # power of two for masking instead of modulo
+        size = 1 << max(size - 1, 7).bit_length()
+        self._table = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._n = 0
+        self._max_n = int(size * self._MAX_LOAD)
+
+    def add(self, key: Any) -> bool:
+
+        return self.add_fingerprint(fingerprint(key))
+
+    def add_fingerprint(self, fp: int) -> bool:
+        """
+        Adds a precomputed fingerprint.
+
+        Returns:
+            bool: True if the fingerprint was not in the table before.
+        """
+
+        table = self._table
+        mask = self._mask
+        i = fp & mask
+
+        while True:
+
+            v = table[i]
+
+            if v == 0:
+                break
+
+            if v == fp:
+                return False
+
+            i = (i + 1) & mask
+
+        table[i] = fp
+        self._n += 1
+
+        if self._n > self._max_n:
+            self._grow()
+
+        return True
+
+    def contains_fingerprint(self, fp: int) -> bool:
+
+        table = self._table
+        mask = self._mask
+        i = fp & mask
+
+        while True:
+
+            v = table[i]
+
+            if v == 0:
+                return False
+
+            if v == fp:
+                return True
+
+            i = (i + 1) & mask
+
+    def __contains__(self, key: Any) -> bool:
+
+        return self.contains_fingerprint(fingerprint(key))
+
+    def __len__(self) -> int:
+
+        return self._n
+
+    def fingerprints(self) -> np.ndarray:
+        """
+        Returns the sorted fingerprints in the table, as 64-bit unsigned
+        integers; sorted in place, not to box each of them.
+        """
+
+        table = np.frombuffer(self._table, dtype=np.uint64)
+        fps = table[table != 0]
+        fps.sort()
+
+        return fps
+
+    def _grow(self) -> None:
+
+        old = self._table
+        self._init_table(2 * len(old))
+
+        logger.debug(f'Growing fingerprint index to {len(self._table)} slots.')
+
+        for v in old:
+            if v:
+                self.add_fingerprint(v)
+
+
+class DiskFingerprintIndex:
+    """
+    Fingerprint index with bounded memory: once the in-memory table holds
+    `max_memory_items` fingerprints, they are written as a sorted run to a
+    temporary file and searched there by bisection of the memory map.
+    Runs are merged into one when there are more than `max_runs` of them.
+
+    The runs are pickled by path: once pickled, eg, in a checkpoint, the
+    run files are kept on disk until :py:meth:`close`, and runs replaced
+    by a merge until :py:meth:`prune`, so that the pickle stays valid.
+
+    Args:
+        max_memory_items:
+            Maximum number of fingerprints kept in memory.
+
+        spill_dir:
+            Directory for the temporary run files; defaults to the system
+            temporary directory. Removed when the index is discarded,
+            unless it has been pickled.
+
+        max_runs:
+            Number of runs on disk above which they are merged.
+    """
+    def __init__(
+        self,
+        max_memory_items: int = int(1e8),
+        spill_dir: Optional[str] = None,
+        max_runs: int = 8,
+    ):
+
+        self.max_memory_items = max_memory_items
+        self.max_runs = max_runs
+        self.spill_dir = spill_dir
+        self._memory = self._new_memory_index()
+        # created on the first spill
+        self.directory = None
+        self._finalizer = None
+        self._runs = []
+        # runs replaced by merges but referred to by a pickle
+        self._stale = []
+        self._pinned = set()
+        self._n_spilled = 0
+        self._n_files = 0
+
+    def __getstate__(self) -> dict:
+
+        paths = [path for path, _ in self._runs]
+
+        for path in paths:
+
+            with open(path, 'rb') as f:
+                os.fsync(f.fileno())
+
+        # the pickle refers to the run files, which have to outlive the
+        # index
+        self._pinned = set(paths)
+
+        if self._finalizer:
+            self._finalizer.detach()
+            self._finalizer = None
+
+        return {
+            'max_memory_items': self.max_memory_items,
+            'max_runs': self.max_runs,
+            'spill_dir': self.spill_dir,
+            '_memory': self._memory,
+            'directory': self.directory,
+            '_n_spilled': self._n_spilled,
+            '_n_files': self._n_files,
+            'runs': paths,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+
+        paths = state.pop('runs')
+        self.__dict__.update(state)
+        self._finalizer = None
+        self._runs = []
+        self._stale = []
+        self._pinned = set(paths)
+
+        for path in paths:
+            self._runs.append((path, self._map(path)))
+
+    def add(self, key: Any) -> bool:
+
+        fp = fingerprint(key)
+
+        if self._on_disk(fp) or not self._memory.add_fingerprint(fp):
+            return False
+
+        if len(self._memory) >= self.max_memory_items:
+            self._spill()
+
+        return True
+
+    def __contains__(self, key: Any) -> bool:
+
+        fp = fingerprint(key)
+
+        return self._memory.contains_fingerprint(fp) or self._on_disk(fp)
+
+    def __len__(self) -> int:
+
+        return len(self._memory) + self._n_spilled
+
+    def files(self) -> set:
+        """
+        Returns the paths of the run files the index refers to.
+        """
+
+        return {path for path, _ in self._runs} | set(self._stale)
+
+    def prune(self) -> None:
+        """
+        Deletes the runs replaced by merges. Deferred, as a pickle of the
+        index may refer to them until the next one is taken.
+        """
+
+        for path in self._stale:
+            if os.path.exists(path):
+                os.remove(path)
+
+        self._stale = []
+
+    def close(self) -> None:
+        """
+        Deletes the run files and empties the index.
+        """
+
+        for _, view in self._runs:
+            view.release()
+
+        if self._finalizer:
+            self._finalizer.detach()
+            self._finalizer = None
+
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+        self._memory = self._new_memory_index()
+        self.directory = None
+        self._runs = []
+        self._stale = []
+        self._pinned = set()
+        self._n_spilled = 0
+
+    def _new_memory_index(self) -> FingerprintIndex:
+
+        # start small, the table grows up to `max_memory_items`
+        return FingerprintIndex(capacity=min(self.max_memory_items, int(1e6)))
+
+    def _path(self) -> str:
+
+        if not self.directory:
+            self.directory = tempfile.mkdtemp(
+                prefix='biocypher-index-',
+                dir=self.spill_dir,
+            )
+            self._finalizer = weakref.finalize(
+                self,
+                shutil.rmtree,
+                self.directory,
+                ignore_errors=True,
+            )
+
+        self._n_files += 1
+
+        return os.path.join(self.directory, f'run{self._n_files:06}')
+
+    @staticmethod
+    def _map(path: str) -> memoryview:
+
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return memoryview(mm).cast('Q')
+
+    def _on_disk(self, fp: int) -> bool:
+
+        for _, view in self._runs:
+
+            i = bisect_left(view, fp)
+
+            if i < len(view) and view[i] == fp:
+                return True
+
+        return False
+
+    def _spill(self) -> None:
+
+        fps = self._memory.fingerprints()
+        self._n_spilled += len(fps)
+        self._memory = self._new_memory_index()
+
+        logger.info(f'Spilling {len(fps)} fingerprints of index to disk.')
+
+        self._add_run(fps)
+
+        if len(self._runs) > self.max_runs:
+            self._merge_runs()
+
+    def _add_run(self, fps: np.ndarray) -> None:
+
+        path = self._path()
+
+        # written aside and renamed, not to truncate a file mapped by a
+        # copy of the index unpickled from the same directory
+        with open(f'{path}.tmp', 'wb') as f:
+            fps.tofile(f)
+
+        os.replace(f'{path}.tmp', path)
+
+        self._runs.append((path, self._map(path)))
+
+    def _merge_runs(self) -> None:
+
+        runs = self._runs
+        self._runs = []
+
+        path = self._path()
+
+        with open(f'{path}.tmp', 'wb') as f:
+
+            buf = array('Q')
+
+            for fp in heapq.merge(*(view for _, view in runs)):
+
+                buf.append(fp)
+
+                if len(buf) >= 1 << 20:
+                    buf.tofile(f)
+                    buf = array('Q')
+
+            buf.tofile(f)
+
+        os.replace(f'{path}.tmp', path)
+
+        for run_path, view in runs:
+
+            view.release()
+
+            if run_path in self._pinned:
+                self._stale.append(run_path)
+
+            else:
+                os.remove(run_path)
+
+        self._runs.append((path, self._map(path)))
+
+
+class BloomIndex:
+    """
+    Approximate membership index: a Bloom filter sized for `capacity` keys
+    at false positive rate `fpr`. Bit positions are derived from the 64-bit
+    key fingerprint by double hashing. Keys beyond the capacity increase the
+    false positive rate.
+
+    Args:
+        capacity:
+            Expected number of keys.
+
+        fpr:
+            Target false positive rate at `capacity` keys.
+    """
+    def __init__(self, capacity: int = int(1e6), fpr: float = 1e-4):
+
+        capacity = max(int(capacity), 1)
+
+        self.n_bits = max(
+            int(-capacity * math.log(fpr) / math.log(2)**2),
+            8,
+        )
+        self.n_hashes = max(round(self.n_bits / capacity * math.log(2)), 1)
+        self._bits = bytearray((self.n_bits + 7) // 8)
+        self._n = 0
+
+    def _positions(self, key: Any) -> list:
+
+        fp = fingerprint(key)
+        h1 = fp & 0xffffffff
+        h2 = (fp >> 32) | 1
+        n = self.n_bits
+
+        return [(h1 + i * h2) % n for i in range(self.n_hashes)]
+
+    def add(self, key: Any) -> bool:
+
+        bits = self._bits
+        new = False
+
+        for p in self._positions(key):
+
+            byte, bit = p >> 3, 1 << (p & 7)
+
+            if not bits[byte] & bit:
+                bits[byte] |= bit
+                new = True
+
+        self._n += new
+
+        return new
+
+    def __contains__(self, key: Any) -> bool:
+
+        bits = self._bits
+
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def __len__(self) -> int:
+        """
+        Number of keys added as new (approximate).
+        """
+
+        return self._n
+
+
+def get_index(
+    kind: str = 'set',
+    capacity: int = int(1e6),
+    fpr: float = 1e-4,
+    max_memory_items: int = int(1e8),
+    spill_dir: Optional[str] = None,
+):
+    """
+    Creates a de-duplication index.
+
+    Args:
+        kind:
+            One of `set`, `fingerprint`, `disk`, or `bloom`.
+
+        capacity:
+            Expected number of keys (`fingerprint` and `bloom`).
+
+        fpr:
+            False positive rate of the `bloom` index.
+
+        max_memory_items:
+            Maximum number of fingerprints in memory (`disk`).
+
+        spill_dir:
+            Directory for temporary files (`disk`).
+    """
+
+    if kind == 'set':
+        return SetIndex()
+
+    elif kind == 'fingerprint':
+        return FingerprintIndex(capacity=capacity)
+
+    elif kind == 'disk':
+        return DiskFingerprintIndex(
+            max_memory_items=max_memory_items,
+            spill_dir=spill_dir,
+        )
+
+    elif kind == 'bloom':
+        return BloomIndex(capacity=capacity, fpr=fpr)
+
+    raise ValueError(
+        f'Unknown index kind `{kind}`; use `set`, `fingerprint`, `disk`, '
+        'or `bloom`.'
+    )
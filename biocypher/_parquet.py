@@ -0,0 +1,561 @@
+#!/usr/bin/env python
+
+#
+# Copyright 2021, Heidelberg University Clinic
+#
+# File author(s): Sebastian Lobentanzer
+#                 ...
+#
+# Distributed under GPLv3 license, see the file `LICENSE`.
+#
+"""
+Export of nodes and edges to Apache Parquet files, as an alternative to the
+CSV files of the Neo4j admin import. Each node and edge type is written to
+one file, `<PascalLabel>.parquet`, with typed columns from the properties of
+the schema configuration. The columns are named like the Neo4j headers:
+
+    - nodes: `:ID`, the properties, and `:LABEL` (list of labels)
+
+    - edges: `:START_ID`, the properties, `:END_ID`, and `:TYPE`
+
+Every batch of the writer is appended to the file as one row group, so
+memory use is bounded by the batch size. If sharded, there is one file per
+label and shard, `<PascalLabel>-shard<S>.parquet`. Requires `pyarrow`.
+"""
+
+from ._logger import logger
+
+logger.debug(f'Loading module {__name__}.')
+
+from typing import Optional
+import os
+
+from ._write import BatchWriter, _NON_QUOTED_TYPES
+from ._create import BioCypherEdge, BioCypherNode
+
+__all__ = ['ParquetWriter']
+
+_LIST_TYPES = ['str[]', 'string[]', 'list']
+_INT_TYPES = ['int', 'long']
+_FLOAT_TYPES = ['float', 'double', 'dbl']
+_BOOL_TYPES = ['bool', 'boolean']
+
+
+def _pyarrow():
+    """
+    Returns the `pyarrow` and `pyarrow.parquet` modules.
+    """
+
+    try:
+        import pyarrow
+        import pyarrow.parquet
+
+    except ImportError:
+        raise ImportError(
+            'The Parquet output format requires the package `pyarrow`; '
+            'install it by `pip install biocypher[parquet]`.'
+        )
+
+    return pyarrow, pyarrow.parquet
+
+
+class ParquetWriter(BatchWriter):
+    """
+    Batch writer emitting one Parquet file per node and edge type instead
+    of CSV parts. It shares the input handling of :py:class:`BatchWriter`,
+    ie, binning by label, de-duplication, and property checks; the
+    arguments are the same. `compression` is the Parquet codec (eg,
+    `'snappy'`, the default, `'gzip'` or `'zstd'`). Parallel and
+    asynchronous writing, and checkpoints, are not supported and ignored.
+
+    The Parquet files are complete only after :py:meth:`write_import_call`
+    (or :py:meth:`close`) has been called.
+    """
+    def __init__(
+        self,
+        *args,
+        compression: Optional[str] = None,
+        compression_level: Optional[int] = None,
+        **kwargs,
+    ):
+
+        self.pa, self.pq = _pyarrow()
+
+        checkpoint = (
+            kwargs.pop('checkpoint_interval', None),
+            kwargs.pop('resume', False),
+        )
+
+        if any(checkpoint):
+            logger.warning(
+                'Checkpoints are not supported for Parquet output; the '
+                'Parquet files are incomplete until closed.',
+            )
+
+        if kwargs.pop('property_union', False):
+            logger.warning(
+                'Property union mode is not supported for Parquet output.',
+            )
+
+        if kwargs.pop('edge_dedup', 'index') != 'index':
+            logger.warning(
+                'External edge de-duplication is not supported for Parquet '
+                'output; using the index.',
+            )
+
+        if kwargs.pop('delta_index', None):
+            logger.warning('Delta export is not supported for Parquet output.')
+
+        super().__init__(*args, **kwargs)
+
+        if self.parallel or self.async_write:
+            logger.info('Parquet output is written on the main thread.')
+
+        self.parallel = None
+        self.async_write = False
+        self.compression = compression or 'snappy'
+        self.compression_level = compression_level
+        # one open Parquet file per label
+        self._parquet_writers = {}
+
+    def _pa_type(self, t: str):
+        """
+        Returns the Arrow type of a property type of the schema.
+        """
+
+        pa = self.pa
+
+        if t in _LIST_TYPES:
+            return pa.list_(pa.string())
+
+        if t in _INT_TYPES:
+            return pa.int64()
+
+        if t in _FLOAT_TYPES:
+            return pa.float64()
+
+        if t in _BOOL_TYPES:
+            return pa.bool_()
+
+        return pa.string()
+
+    @staticmethod
+    def _to_list(v) -> Optional[list]:
+
+        if v is None:
+            return None
+
+        if isinstance(v, str):
+            # edge properties may encode arrays with `**`
+            return v.split('**')
+
+        if not isinstance(v, list):
+            v = [v]
+
+        return [str(i) for i in v]
+
+    def _columns(self, entities: list, prop_dict: dict) -> tuple:
+        """
+        Builds the property columns of a batch.
+
+        Returns:
+            tuple: the Arrow fields and arrays of the properties.
+        """
+
+        pa = self.pa
+        ref_keys = set(prop_dict.keys())
+        props = [e.get_properties() for e in entities]
+
+        for e, p in zip(entities, props):
+
+            if p.keys() != ref_keys:
+                raise ValueError(
+                    f'At least one entity of the class {e.get_label()} '
+                    f'has more or fewer properties than another. '
+                    f'All reference properties: {list(ref_keys)}, '
+                    f'All entity properties: {list(p.keys())}.',
+                )
+
+        fields = []
+        arrays = []
+
+        for k, t in prop_dict.items():
+
+            typ = self._pa_type(t)
+            values = [p[k] for p in props]
+
+            if t in _LIST_TYPES:
+                values = [self._to_list(v) for v in values]
+
+            elif t not in _NON_QUOTED_TYPES:
+                values = [
+                    v if v is None or isinstance(v, str) else
+                    self.adelim.join(v) if isinstance(v, list) else str(v)
+                    for v in values
+                ]
+
+            fields.append(pa.field(k, typ))
+            arrays.append(pa.array(values, type=typ))
+
+        return fields, arrays
+
+    def _frame_columns(self, frame, prop_dict: dict) -> tuple:
+        """
+        Builds the property columns of a batch of a node or edge table.
+
+        Returns:
+            tuple: the Arrow fields and arrays of the properties.
+        """
+
+        pa = self.pa
+        fields = []
+        arrays = []
+
+        for k, t in prop_dict.items():
+
+            typ = self._pa_type(t)
+            column = frame[k]
+
+            if t in _LIST_TYPES:
+                column = column.map(self._to_list, na_action='ignore')
+
+            elif t not in _NON_QUOTED_TYPES:
+                column = column.map(
+                    lambda v: v if isinstance(v, str) else
+                    self.adelim.join(map(str, v))
+                    if isinstance(v, list) else str(v),
+                    na_action='ignore',
+                )
+
+            fields.append(pa.field(k, typ))
+            arrays.append(pa.array(column, type=typ, from_pandas=True))
+
+        return fields, arrays
+
+    def _write_table(
+        self,
+        label: str,
+        fields: list,
+        arrays: list,
+        shard: Optional[int] = None,
+    ) -> bool:
+        """
+        Appends a batch as a row group to the Parquet file of a label, or of
+        a shard of the label.
+        """
+
+        pa = self.pa
+        table = pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+        writer = self._parquet_writers.get((label, shard))
+
+        if writer is None:
+
+            prefix = self._part_prefix(
+                self.translator.name_sentence_to_pascal(label),
+                shard,
+            )
+            file_path = os.path.join(self.outdir, f'{prefix}.parquet')
+
+            logger.info(f'Writing Parquet file `{file_path}`.')
+
+            writer = self.pq.ParquetWriter(
+                file_path,
+                table.schema,
+                compression=self.compression,
+                compression_level=self.compression_level,
+            )
+            self._parquet_writers[(label, shard)] = writer
+
+        logger.info(f'Writing {table.num_rows} entries of `{label}`.')
+
+        # in-memory size of the columns, the file is compressed
+        self.stats.count(label, table.num_rows, table.nbytes)
+
+        try:
+            with self.stats.timer('write', label):
+                writer.write_table(table)
+
+        except ValueError as e:
+            # eg, schema differs from an earlier write call
+            logger.error(f'Error while writing `{label}` to Parquet: {e}')
+            return False
+
+        return True
+
+    def _write_single_node_list_to_file(
+        self,
+        node_list: list,
+        label: str,
+        prop_dict: dict,
+        labels: str,
+        shard: Optional[int] = None,
+        validate: bool = True,
+    ) -> bool:
+        """
+        Writes one batch of nodes as a row group, or one per shard.
+
+        Args:
+            node_list (list): list of BioCypherNodes to be written
+            label (str): the primary label of the node
+            prop_dict (dict): properties of node class and their types
+            labels (str): string of one or several concatenated labels
+                for the node class
+            shard (int): the shard of the nodes, if sharded
+            validate (bool): check the types of the nodes
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        if not node_list:
+            return True
+
+        if validate and not all(
+            isinstance(n, BioCypherNode) for n in node_list
+        ):
+            logger.error('Nodes must be passed as type BioCypherNode.')
+            return False
+
+        if self.n_shards and shard is None:
+
+            for shard, group in self._shards(node_list).items():
+                if not self._write_single_node_list_to_file(
+                    group,
+                    label,
+                    prop_dict,
+                    labels,
+                    shard,
+                    validate=False,
+                ):
+                    return False
+
+            return True
+
+        pa = self.pa
+
+        try:
+            fields, arrays = self._columns(node_list, prop_dict)
+
+        except (ValueError, pa.ArrowException) as e:
+            logger.error(str(e))
+            return False
+
+        label_list = labels.split(self.adelim)
+
+        fields = [pa.field(':ID', pa.string())] + fields
+        fields.append(pa.field(':LABEL', pa.list_(pa.string())))
+        arrays = [pa.array([n.get_id() for n in node_list])] + arrays
+        arrays.append(
+            pa.array(
+                [label_list] * len(node_list),
+                type=pa.list_(pa.string()),
+            ),
+        )
+
+        return self._write_table(label, fields, arrays, shard)
+
+    def _write_single_edge_list_to_file(
+        self,
+        edge_list: list,
+        label: str,
+        prop_dict: dict,
+        shard: Optional[int] = None,
+        validate: bool = True,
+    ) -> bool:
+        """
+        Writes one batch of edges as a row group, or one per shard.
+
+        Args:
+            edge_list (list): list of BioCypherEdges to be written
+            label (str): the label (type) of the edge
+            prop_dict (dict): properties of edge class and their types
+            shard (int): the shard of the edges, if sharded
+            validate (bool): check the types of the edges
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        if not edge_list:
+            return True
+
+        if validate and not all(
+            isinstance(e, BioCypherEdge) for e in edge_list
+        ):
+            logger.error('Edges must be passed as type BioCypherEdge.')
+            return False
+
+        if self.n_shards and shard is None:
+
+            for shard, group in self._shards(edge_list).items():
+                if not self._write_single_edge_list_to_file(
+                    group,
+                    label,
+                    prop_dict,
+                    shard,
+                    validate=False,
+                ):
+                    return False
+
+            return True
+
+        pa = self.pa
+
+        try:
+            fields, arrays = self._columns(edge_list, prop_dict)
+
+        except (ValueError, pa.ArrowException) as e:
+            logger.error(str(e))
+            return False
+
+        pascal_label = self.translator.name_sentence_to_pascal(label)
+
+        fields = [pa.field(':START_ID', pa.string())] + fields
+        fields.extend(
+            [
+                pa.field(':END_ID', pa.string()),
+                pa.field(':TYPE', pa.string()),
+            ],
+        )
+        arrays = [pa.array([e.get_source_id() for e in edge_list])] + arrays
+        arrays.extend(
+            [
+                pa.array([e.get_target_id() for e in edge_list]),
+                pa.array([pascal_label] * len(edge_list)),
+            ],
+        )
+
+        return self._write_table(label, fields, arrays, shard)
+
+    def _write_node_frame(
+        self,
+        frame,
+        label: str,
+        prop_dict: dict,
+        labels: str,
+        shard: Optional[int] = None,
+    ) -> bool:
+        """
+        Writes one batch of a node table as a row group, or one per shard.
+        """
+
+        if self.n_shards and shard is None:
+
+            for shard, group in self._frame_shards(frame, ':ID'):
+                if not self._write_node_frame(
+                    group,
+                    label,
+                    prop_dict,
+                    labels,
+                    shard,
+                ):
+                    return False
+
+            return True
+
+        pa = self.pa
+
+        try:
+            fields, arrays = self._frame_columns(frame, prop_dict)
+
+        except pa.ArrowException as e:
+            logger.error(str(e))
+            return False
+
+        fields = [pa.field(':ID', pa.string())] + fields
+        fields.append(pa.field(':LABEL', pa.list_(pa.string())))
+        arrays = [pa.array(frame[':ID'].astype(str))] + arrays
+        arrays.append(
+            pa.array(
+                [labels.split(self.adelim)] * len(frame),
+                type=pa.list_(pa.string()),
+            ),
+        )
+
+        return self._write_table(label, fields, arrays, shard)
+
+    def _write_edge_frame(
+        self,
+        frame,
+        label: str,
+        prop_dict: dict,
+        shard: Optional[int] = None,
+    ) -> bool:
+        """
+        Writes one batch of an edge table as a row group, or one per shard.
+        """
+
+        if self.n_shards and shard is None:
+
+            for shard, group in self._frame_shards(frame, ':START_ID'):
+                if not self._write_edge_frame(group, label, prop_dict, shard):
+                    return False
+
+            return True
+
+        pa = self.pa
+
+        try:
+            fields, arrays = self._frame_columns(frame, prop_dict)
+
+        except pa.ArrowException as e:
+            logger.error(str(e))
+            return False
+
+        pascal_label = self.translator.name_sentence_to_pascal(label)
+
+        fields = [pa.field(':START_ID', pa.string())] + fields
+        fields.extend(
+            [
+                pa.field(':END_ID', pa.string()),
+                pa.field(':TYPE', pa.string()),
+            ],
+        )
+        arrays = [pa.array(frame[':START_ID'].astype(str))] + arrays
+        arrays.extend(
+            [
+                pa.array(frame[':END_ID'].astype(str)),
+                pa.array([pascal_label] * len(frame)),
+            ],
+        )
+
+        return self._write_table(label, fields, arrays, shard)
+
+    def _write_node_headers(self) -> bool:
+
+        # the schema is part of the Parquet files
+        return True
+
+    def _write_edge_headers(self) -> bool:
+
+        return True
+
+    def close(self) -> None:
+        """
+        Closes the Parquet files, writing their footers.
+        """
+
+        for writer in self._parquet_writers.values():
+            writer.close()
+
+        self._parquet_writers = {}
+
+    def get_import_call(self) -> str:
+        """
+        There is no import call for Parquet output.
+        """
+
+        return ''
+
+    def write_import_call(self) -> bool:
+        """
+        Finalises the Parquet files; there is no import call to write.
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        self.close()
+
+        return True
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+
+#
+# Copyright 2021, Heidelberg University Clinic
+#
+# File author(s): Sebastian Lobentanzer
+#                 ...
+#
+# Distributed under GPLv3 license, see the file `LICENSE`.
+#
+"""
+External sort for de-duplicating edges in bounded memory. Serialized edges
+are buffered as `(label, key, line)` records; a full buffer is sorted and
+spilled to a run file. Merging the runs yields the records in order of
+label and key, and of input within equal keys, so the first occurrence of
+each edge is kept, independent of the run size. The keys merged so far are
+kept in a sorted run of their own, which takes part in the next merge, so
+that edges already written are recognised as duplicates as well.
+"""
+
+from ._logger import logger
+
+logger.debug(f'Loading module {__name__}.')
+
+from typing import Iterator
+import os
+import heapq
+import pickle
+
+__all__ = ['ExternalSorter']
+
+# records per pickled chunk of a run file
+_CHUNK = 10000
+
+
+def _key_str(key: tuple) -> str:
+    """
+    Sort key of an edge key: missing relationship IDs compare as empty.
+    """
+
+    return '\x1f'.join(k or '' for k in key)
+
+
+def _read_run(path: str) -> Iterator[tuple]:
+
+    with open(path, 'rb') as f:
+
+        while True:
+
+            try:
+                chunk = pickle.load(f)
+
+            except EOFError:
+                return
+
+            yield from chunk
+
+
+class _RunWriter:
+    """
+    Writes records to a run file in pickled chunks.
+    """
+    def __init__(self, path: str):
+
+        self.f = open(path, 'wb')
+        self.chunk = []
+
+    def add(self, record: tuple) -> None:
+
+        self.chunk.append(record)
+
+        if len(self.chunk) >= _CHUNK:
+            self.flush()
+
+    def flush(self) -> None:
+
+        if self.chunk:
+            pickle.dump(self.chunk, self.f, protocol=pickle.HIGHEST_PROTOCOL)
+            self.chunk = []
+
+    def close(self) -> None:
+
+        self.flush()
+        self.f.close()
+
+
+class ExternalSorter:
+    """
+    Sorted runs of serialized edges on disk, merged into their distinct
+    first occurrences.
+
+    Args:
+        directory:
+            Directory of the run files, named `biocypher-sort-*.pkl`.
+
+        buffer_items:
+            Number of records held in memory before they are spilled to a
+            sorted run.
+    """
+    def __init__(self, directory: str, buffer_items: int = int(1e6)):
+
+        self.directory = directory
+        self.buffer_items = int(buffer_items)
+        self.buffer = []
+        self.runs = []
+        # sorted run of the keys merged so far, and earlier ones to delete
+        self.seen = None
+        self.stale = []
+        # input order of the records, and number of run files created
+        self.n = 0
+        self.n_files = 0
+
+    def _path(self, kind: str) -> str:
+
+        self.n_files += 1
+
+        return os.path.join(
+            self.directory,
+            f'biocypher-sort-{kind}{self.n_files:06}.pkl',
+        )
+
+    def add(self, label: str, keys, lines: list) -> None:
+        """
+        Adds the serialized edges of a batch of one label.
+
+        Args:
+            label (str): the label (type) of the edges
+
+            keys (iterable): the keys of the edges, in order of the lines
+
+            lines (list): the CSV lines
+        """
+
+        for key, line in zip(keys, lines):
+            self.buffer.append((label, _key_str(key), self.n, key, line))
+            self.n += 1
+
+        if len(self.buffer) >= self.buffer_items:
+            self._spill()
+
+    def _spill(self) -> None:
+
+        self.buffer.sort()
+        path = self._path('run')
+
+        logger.debug(f'Spilling {len(self.buffer)} edges to `{path}`.')
+
+        with open(path, 'wb') as f:
+
+            for i in range(0, len(self.buffer), _CHUNK):
+                pickle.dump(
+                    self.buffer[i:i + _CHUNK],
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+
+        self.runs.append(path)
+        self.buffer = []
+
+    def merge(self) -> Iterator[tuple]:
+        """
+        Merges the runs and the buffer, and empties them. Has to be
+        consumed completely.
+
+        Yields:
+            tuple: label, key and line of each edge added since the last
+                merge, in order of label and key, and whether it is the
+                first occurrence of its key
+        """
+
+        self.buffer.sort()
+        sources = [_read_run(path) for path in self.runs]
+        sources.append(iter(self.buffer))
+
+        if self.seen:
+            sources.append(_read_run(self.seen))
+
+        seen = self._path('seen')
+        out = _RunWriter(seen)
+        last = None
+
+        for label, skey, _, key, line in heapq.merge(*sources):
+
+            # keys merged before have no line and sort first
+            if (label, skey) == last:
+
+                if line is not None:
+                    yield label, key, line, False
+
+                continue
+
+            last = (label, skey)
+            out.add((label, skey, -1, None, None))
+
+            if line is not None:
+                yield label, key, line, True
+
+        out.close()
+
+        for path in self.runs:
+            os.remove(path)
+
+        if self.seen:
+            self.stale.append(self.seen)
+
+        self.seen = seen
+        self.runs = []
+        self.buffer = []
+
+    def files(self) -> set:
+        """
+        Returns the names of the run files the sorter refers to.
+        """
+
+        paths = self.runs + self.stale + [self.seen]
+
+        return {os.path.basename(path) for path in paths if path}
+
+    def prune(self) -> None:
+        """
+        Deletes the key runs replaced by later merges. Deferred, as a
+        checkpoint may refer to them until the next one is saved.
+        """
+
+        for path in self.stale:
+            if os.path.exists(path):
+                os.remove(path)
+
+        self.stale = []
+
+    def close(self) -> None:
+        """
+        Deletes all run files.
+        """
+
+        for path in self.runs + self.stale + [self.seen]:
+            if path and os.path.exists(path):
+                os.remove(path)
+
+        self.runs = []
+        self.stale = []
+        self.seen = None
+        self.buffer = []
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+
+#
+# Copyright 2021, Heidelberg University Clinic
+#
+# File author(s): Sebastian Lobentanzer
+#                 ...
+#
+# Distributed under GPLv3 license, see the file `LICENSE`.
+#
+"""
+Throughput and timing statistics of the offline pipeline. The stages are
+timed separately and per label:
+
+    - `translation`: translating the input to BioCypher entities,
+      including the time spent in the input generator of the adapter.
+
+    - `dedup`: looking up and recording IDs in the duplicate indices.
+
+    - `serialization`: converting batches to CSV lines.
+
+    - `write`: writing (and compressing) part files; in asynchronous or
+      parallel mode, the time spent waiting for the workers.
+
+If disabled (the default), timers are a shared no-op context manager and
+counters return immediately.
+"""
+
+from ._logger import logger
+
+logger.debug(f'Loading module {__name__}.')
+
+from typing import Optional
+from contextlib import nullcontext
+from collections import defaultdict
+import time
+
+__all__ = ['Stats']
+
+_NULL_TIMER = nullcontext()
+
+
+class _Timer:
+    """
+    Adds the time spent in a `with` block to a stage.
+    """
+    __slots__ = ('stats', 'stage', 'label', 'start')
+
+    def __init__(self, stats: 'Stats', stage: str, label: Optional[str]):
+
+        self.stats = stats
+        self.stage = stage
+        self.label = label
+
+    def __enter__(self):
+
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+
+        self.stats.add_time(
+            self.stage,
+            time.perf_counter() - self.start,
+            self.label,
+        )
+
+
+class Stats:
+    """
+    Counters and timers of a build.
+
+    Args:
+        enabled:
+            Collect statistics; otherwise all methods are no-ops.
+
+        log_interval:
+            Seconds between progress messages in the log, with rows and
+            bytes per second and, if the number of input items is known,
+            the estimated time remaining. No messages if None.
+    """
+    def __init__(
+        self,
+        enabled: bool = False,
+        log_interval: Optional[float] = None,
+    ):
+
+        self.enabled = bool(enabled)
+        self.log_interval = log_interval
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Starts the statistics of a new build.
+        """
+
+        self.start = self._last_log = time.perf_counter()
+        self.seconds = defaultdict(float)
+        self.label_seconds = defaultdict(lambda: defaultdict(float))
+        self.rows = defaultdict(int)
+        self.bytes = defaultdict(int)
+        self.expected = 0
+
+    def timer(self, stage: str, label: Optional[str] = None):
+        """
+        Context manager timing a stage, optionally for one label.
+        """
+
+        if not self.enabled:
+            return _NULL_TIMER
+
+        return _Timer(self, stage, label)
+
+    def add_time(
+        self,
+        stage: str,
+        seconds: float,
+        label: Optional[str] = None,
+    ) -> None:
+
+        self.seconds[stage] += seconds
+
+        if label is not None:
+            self.label_seconds[label][stage] += seconds
+
+    def iterate(self, stage: str, items):
+        """
+        Times the production of the items of an iterable, eg, a lazy
+        translation, as a stage.
+        """
+
+        if not self.enabled:
+            return items
+
+        return self._iterate(stage, items)
+
+    def _iterate(self, stage: str, items):
+
+        it = iter(items)
+
+        while True:
+
+            start = time.perf_counter()
+
+            try:
+                item = next(it)
+
+            except StopIteration:
+                self.add_time(stage, time.perf_counter() - start)
+                return
+
+            self.add_time(stage, time.perf_counter() - start)
+
+            yield item
+
+    def expect(self, n: int) -> None:
+        """
+        Adds the number of input items of a write call, to estimate the
+        time remaining.
+        """
+
+        if self.enabled:
+            self.expected += n
+
+    def count(self, label: str, rows: int, nbytes: int = 0) -> None:
+        """
+        Records rows (and bytes) written for a label, and logs the progress
+        if due.
+        """
+
+        if not self.enabled:
+            return
+
+        self.rows[label] += rows
+        self.bytes[label] += nbytes
+
+        if self.log_interval is not None:
+
+            now = time.perf_counter()
+
+            if now - self._last_log >= self.log_interval:
+                self._last_log = now
+                self.log()
+
+    def summary(self) -> dict:
+        """
+        Returns the statistics of the build so far.
+
+        Returns:
+            dict: elapsed seconds, totals and rates of rows and bytes, the
+                estimated seconds remaining (None if unknown), seconds per
+                stage, and rows, bytes and seconds per stage of each label.
+        """
+
+        elapsed = time.perf_counter() - self.start
+        rows = sum(self.rows.values())
+        nbytes = sum(self.bytes.values())
+        rate = rows / elapsed if elapsed else 0.0
+
+        eta = None
+
+        if self.expected and rate:
+            eta = max(self.expected - rows, 0) / rate
+
+        labels = {}
+
+        for label in set(self.rows) | set(self.label_seconds):
+
+            labels[label] = {
+                'rows': self.rows.get(label, 0),
+                'bytes': self.bytes.get(label, 0),
+                **self.label_seconds.get(label, {}),
+            }
+
+        return {
+            'enabled': self.enabled,
+            'elapsed': elapsed,
+            'rows': rows,
+            'bytes': nbytes,
+            'rows_per_second': rate,
+            'bytes_per_second': nbytes / elapsed if elapsed else 0.0,
+            'eta': eta,
+            'stages': dict(self.seconds),
+            'labels': labels,
+        }
+
+    def log(self) -> None:
+        """
+        Logs the progress of the build.
+        """
+
+        s = self.summary()
+        eta = '' if s['eta'] is None else f', ETA {s["eta"]:.0f} s'
+        stages = ', '.join(f'{k} {v:.1f} s' for k, v in s['stages'].items())
+
+        logger.info(
+            f'Progress: {s["rows"]} rows ({s["rows_per_second"]:.0f}/s), '
+            f'{s["bytes"] / 1e6:.1f} MB '
+            f'({s["bytes_per_second"] / 1e6:.1f} MB/s){eta}; {stages}.',
+        )
@@ -39,7 +39,11 @@ from ._logger import logger
 
 logger.debug(f'Loading module {__name__}.')
 
-from typing import Any, Union, Optional
+from typing import Any, Union, Optional, NamedTuple
+from functools import lru_cache
+from collections import deque
+from dataclasses import fields
+from concurrent.futures import ProcessPoolExecutor
 import os
 import re
 import json
@@ -47,7 +51,7 @@ import pickle
 import hashlib
 
 from bmt.utils import sentencecase_to_camelcase
-from more_itertools import peekable
+from more_itertools import chunked
 from linkml_runtime.linkml_model.meta import TypeDefinition, ClassDefinition
 from networkx.algorithms.traversal.depth_first_search import dfs_tree
 import bmt
@@ -57,7 +61,12 @@ import networkx as nx
 
 from . import _misc
 from ._config import _read_yaml, module_data_path
-from ._create import BioCypherEdge, BioCypherNode, BioCypherRelAsNode
+from ._create import (
+    BioCypherEdge,
+    BioCypherNode,
+    TrustedStream,
+    BioCypherRelAsNode,
+)
 
 __all__ = ['BiolinkAdapter', 'Translator']
 
@@ -126,6 +135,10 @@ class OntologyAdapter:
         self.tail_ontology = None
         self.hybrid_ontology = None
 
+        # ancestries and label strings, shared by all writers
+        self._ancestry = {}
+        self._labels = {}
+
         self.main()
 
     def main(self):
@@ -140,6 +153,21 @@ class OntologyAdapter:
             self.find_join_nodes()
             self.join_ontologies()
 
+        self.build_ancestry()
+
+    def build_ancestry(self):
+        """
+        Precomputes the ancestry of the classes of the schema configuration,
+        so that it is not traversed again for every batch of entities.
+        Other classes are added on first use.
+        """
+
+        self._ancestry = {}
+        self._labels = {}
+
+        for leaf in getattr(self, 'leaves', None) or ():
+            self.get_node_ancestry(leaf)
+
     def load_ontologies(self):
         """
         Loads the ontologies using obonet. Importantly, obonet orients edges not
@@ -310,19 +338,48 @@ class OntologyAdapter:
         """
         Returns the ancestry of a node in the ontology.
         """
-        if self.hybrid_ontology:
 
-            ontology = self.hybrid_ontology
+        if node not in self._ancestry:
 
-        else:
+            if self.hybrid_ontology:
 
-            ontology = self.head_ontology
+                ontology = self.hybrid_ontology
+
+            else:
 
-        # check if node in ontology
-        if node not in ontology.nodes:
-            return None
+                ontology = self.head_ontology
+
+            # check if node in ontology
+            self._ancestry[node] = (
+                tuple(dfs_tree(ontology, node))
+                if node in ontology.nodes else None
+            )
 
-        return list(dfs_tree(ontology, node))
+        ancestry = self._ancestry[node]
+
+        return None if ancestry is None else list(ancestry)
+
+    def get_node_labels(self, node: str, delimiter: str) -> str:
+        """
+        Returns the labels of a node in the database: the PascalCase names
+        of the classes in its ancestry, deduplicated, sorted and
+        concatenated by `delimiter`; the name of the node itself if it is
+        not in the ontology.
+        """
+
+        key = (node, delimiter)
+
+        if key not in self._labels:
+
+            ancestry = self.get_node_ancestry(node)
+            pascal = Translator.name_sentence_to_pascal
+
+            self._labels[key] = (
+                delimiter.join(sorted({pascal(a) for a in ancestry}))
+                if ancestry else pascal(node)
+            )
+
+        return self._labels[key]
 
 
 class BiolinkAdapter:
@@ -944,6 +1001,164 @@ class BiolinkAdapter:
 # -------------------------------------------
 
 
+# fields of the translated entities, in the order of their compact tuples
+_NODE_FIELDS = tuple(f.name for f in fields(BioCypherNode))
+_EDGE_FIELDS = tuple(f.name for f in fields(BioCypherEdge))
+
+# translator of a worker process of the pooled translation
+_worker_translator = None
+
+
+def _init_translation_worker(
+    leaves: dict,
+    strict_mode: bool,
+    missing_examples: int,
+) -> None:
+
+    global _worker_translator
+
+    _worker_translator = Translator(leaves, strict_mode, missing_examples)
+
+
+def _translate_chunk(what: str, chunk: list) -> tuple:
+    """
+    Worker job of the pooled translation: translates a chunk of input
+    nodes or edges.
+
+    Returns:
+        tuple: the translated entities as compact tuples, and the counts
+            and example IDs of the input types not in the schema_config
+    """
+
+    translator = _worker_translator
+    translator.notype = {}
+    translator.notype_examples = {}
+
+    translate = (
+        translator._translate_nodes
+        if what == 'nodes' else translator._translate_edges
+    )
+
+    return (
+        [_pack(e) for e in translate(chunk)],
+        translator.notype,
+        translator.notype_examples,
+    )
+
+
+def _pack(entity) -> tuple:
+    """
+    Converts a translated entity to a tuple of its fields, which is much
+    cheaper to pickle than the object.
+    """
+
+    if isinstance(entity, BioCypherRelAsNode):
+        return (
+            _pack(entity.node),
+            _pack(entity.source_edge),
+            _pack(entity.target_edge),
+        )
+
+    names = (
+        _NODE_FIELDS if isinstance(entity, BioCypherNode) else _EDGE_FIELDS
+    )
+
+    return tuple(getattr(entity, name) for name in names)
+
+
+def _unpack(record: tuple):
+    """
+    Restores a translated entity from the tuple made by :func:`_pack`,
+    without cleaning its properties a second time.
+    """
+
+    if len(record) == 3:
+        return BioCypherRelAsNode(*(_unpack(r) for r in record))
+
+    if len(record) == len(_NODE_FIELDS):
+        cls, names = BioCypherNode, _NODE_FIELDS
+
+    else:
+        cls, names = BioCypherEdge, _EDGE_FIELDS
+
+    entity = cls.__new__(cls)
+    entity.__dict__.update(zip(names, record))
+
+    return entity
+
+
+class _LabelTranslator:
+    """
+    Replaces the labels of a Cypher query in one pass: a compiled
+    alternation of all mapped labels, longest first, matches only whole
+    label tokens after a colon, so that a label is not replaced inside a
+    longer one. Translated queries are cached.
+
+    Args:
+        mappings:
+            Labels and their replacements; list values are ambiguous and
+            raise :py:exc:`NotImplementedError` if found in a query.
+
+        end:
+            Regular expression (a lookaround) the end of a label has to
+            match.
+
+        cache_size:
+            Number of translated queries kept.
+    """
+    def __init__(self, mappings: dict, end: str, cache_size: int):
+
+        self.mappings = mappings
+        keys = sorted(mappings, key=len, reverse=True)
+        self.pattern = (
+            re.compile(
+                ':(' + '|'.join(re.escape(k) for k in keys) + ')' + end,
+            ) if keys else None
+        )
+        self.translate = lru_cache(maxsize=cache_size)(self._translate)
+
+    def _translate(self, query: str) -> str:
+
+        if self.pattern is None:
+            return query
+
+        return self.pattern.sub(self._replace, query)
+
+    def _replace(self, match) -> str:
+
+        key = match.group(1)
+        label = self.mappings[key]
+
+        if isinstance(label, list):
+            raise NotImplementedError(
+                'Reverse translation of multiple inputs not '
+                'implemented yet. Many-to-one mappings are '
+                'not reversible. '
+                f'({key} -> {label})',
+            )
+
+        return ':' + label
+
+
+class _TranslationPlan(NamedTuple):
+    """
+    Everything the translator needs per ontology class, compiled once from
+    the schema configuration.
+    """
+
+    # whitelisted properties and their types (empty if none), including the
+    # required properties in strict mode
+    properties: dict
+    # properties kept from the input: None for all not excluded
+    keep: Optional[frozenset]
+    exclude: frozenset
+    # whether properties are filtered at all
+    filters: bool
+    preferred_id: str
+    represented_as: Optional[str]
+    edge_label: str
+
+
 class Translator:
     """
     Class responsible for exacting the translation process that is configured in
@@ -956,7 +1171,12 @@ class Translator:
     Provides utility functions for translating between input and output labels
     and cypher queries.
     """
-    def __init__(self, leaves: dict[str, dict], strict_mode: bool = False):
+    def __init__(
+        self,
+        leaves: dict[str, dict],
+        strict_mode: bool = False,
+        missing_examples: int = 3,
+    ):
         """
         Args:
             leaves:
@@ -968,23 +1188,34 @@ class Translator:
             strict_mode:
                 If True, the translator will raise an error if input data do not
                 carry source, licence, and version information.
+            missing_examples:
+                Number of example IDs kept per input type not in the
+                schema_config.
         """
 
         self.leaves = leaves
         self.strict_mode = strict_mode
+        self.missing_examples = missing_examples
         self._update_ontology_types()
 
         # record nodes without biolink type configured in schema_config.yaml
         self.notype = {}
+        self.notype_examples = {}
 
         # mapping functionality for translating terms and queries
+        self._query_translators = {}
         self.mappings = {}
         self.reverse_mappings = {}
 
+        # translation plans per ontology class, compiled on first use
+        self._plans = {}
+
     def translate_nodes(
         self,
         id_type_prop_tuples: Iterable,
-    ) -> Generator[BioCypherNode, None, None]:
+        workers: Optional[int] = None,
+        chunk_size: int = 10000,
+    ) -> TrustedStream:
         """
         Translates input node representation to a representation that
         conforms to the schema of the given BioCypher graph. For now
@@ -996,8 +1227,35 @@ class Translator:
                 that is translated from the original database notation to
                 the corresponding BioCypher notation.
 
+            workers (int): translate in a pool of this many processes, in
+                chunks of `chunk_size` input tuples; on the main thread if
+                None or 1.
+
+            chunk_size (int): number of input tuples per worker job.
+
+        Returns:
+            A lazy generator of :py:class:`BioCypherNode` objects, in the
+            order of the input, marked as not to be checked again by the
+            batch writer.
         """
 
+        if workers and workers > 1:
+            return TrustedStream(
+                self._translate_pooled(
+                    id_type_prop_tuples,
+                    'nodes',
+                    workers,
+                    chunk_size,
+                ),
+            )
+
+        return TrustedStream(self._translate_nodes(id_type_prop_tuples))
+
+    def _translate_nodes(
+        self,
+        id_type_prop_tuples: Iterable,
+    ) -> Generator[BioCypherNode, None, None]:
+
         self._log_begin_translate(id_type_prop_tuples, 'nodes')
 
         for _id, _type, _props in id_type_prop_tuples:
@@ -1022,17 +1280,15 @@ class Translator:
 
             if _ontology_class:
 
-                # filter properties for those specified in schema_config if any
-                _filtered_props = self._filter_props(_ontology_class, _props)
-
-                # preferred id
-                _preferred_id = self._get_preferred_id(_ontology_class)
+                plan = self._plan(_ontology_class)
 
                 yield BioCypherNode(
                     node_id=_id,
                     node_label=_ontology_class,
-                    preferred_id=_preferred_id,
-                    properties=_filtered_props,
+                    preferred_id=plan.preferred_id,
+                    # filter properties for those specified in
+                    # schema_config if any
+                    properties=self._apply_plan(plan, _props),
                 )
 
             else:
@@ -1041,22 +1297,29 @@ class Translator:
 
         self._log_finish_translate('nodes')
 
-    def _get_preferred_id(self, _bl_type: str) -> str:
+    def _plan(self, bl_type: str) -> _TranslationPlan:
         """
-        Returns the preferred id for the given Biolink type.
+        Returns the translation plan of an ontology class, compiling it on
+        first use.
         """
 
-        return (
-            self.leaves[_bl_type]['preferred_id']
-            if 'preferred_id' in self.leaves.get(_bl_type, {}) else 'id'
-        )
+        plan = self._plans.get(bl_type)
 
-    def _filter_props(self, bl_type: str, props: dict) -> dict:
+        if plan is None:
+            plan = self._plans[bl_type] = self._compile_plan(bl_type)
+
+        return plan
+
+    def _compile_plan(self, bl_type: str) -> _TranslationPlan:
         """
-        Filters properties for those specified in schema_config if any.
+        Compiles the property whitelist (dict of names and types) and
+        blacklist, preferred ID, representation and edge label of a type
+        from the schema_config. The schema_config is not modified.
         """
 
-        filter_props = self.leaves[bl_type].get('properties', {})
+        leaf = self.leaves.get(bl_type, {})
+
+        filter_props = dict(leaf.get('properties') or {})
 
         # strict mode: add required properties (only if there is a whitelist)
         if self.strict_mode and filter_props:
@@ -1068,51 +1331,84 @@ class Translator:
                 },
             )
 
-        exclude_props = self.leaves[bl_type].get('exclude_properties', [])
+        exclude_props = leaf.get('exclude_properties') or []
 
         if isinstance(exclude_props, str):
             exclude_props = [exclude_props]
 
-        if filter_props and exclude_props:
+        exclude = frozenset(exclude_props)
+        edge_label = leaf.get('label_as_edge')
+
+        return _TranslationPlan(
+            properties=filter_props,
+            keep=frozenset(filter_props) - exclude if filter_props else None,
+            exclude=exclude,
+            filters=bool(filter_props or exclude),
+            preferred_id=leaf.get('preferred_id', 'id'),
+            represented_as=leaf.get('represented_as'),
+            edge_label=bl_type if edge_label is None else edge_label,
+        )
 
-            filtered_props = {
-                k: v
-                for k, v in props.items()
-                if (k in filter_props.keys() and k not in exclude_props)
-            }
+    def _get_preferred_id(self, _bl_type: str) -> str:
+        """
+        Returns the preferred id for the given Biolink type.
+        """
 
-        elif filter_props:
+        return self._plan(_bl_type).preferred_id
 
-            filtered_props = {
-                k: v
-                for k, v in props.items() if k in filter_props.keys()
-            }
+    def _prop_filters(self, bl_type: str) -> tuple:
+        """
+        Returns the property whitelist (dict of names and types) and
+        blacklist (set of names) of a type from the schema_config.
+        """
+
+        plan = self._plan(bl_type)
+
+        return plan.properties, plan.exclude
+
+    def _filter_props(self, bl_type: str, props: dict) -> dict:
+        """
+        Filters properties for those specified in schema_config if any.
+        """
+
+        return self._apply_plan(self._plan(bl_type), props)
+
+    @staticmethod
+    def _apply_plan(plan: _TranslationPlan, props: dict) -> dict:
+        """
+        Filters properties by the whitelist and blacklist of a plan, and
+        adds the missing whitelisted properties with default values.
+        """
 
-        elif exclude_props:
+        if not plan.filters:
+            return props
+
+        if plan.keep is not None:
 
             filtered_props = {
                 k: v
-                for k, v in props.items() if k not in exclude_props
+                for k, v in props.items() if k in plan.keep
             }
 
         else:
 
-            return props
+            filtered_props = {
+                k: v
+                for k, v in props.items() if k not in plan.exclude
+            }
 
-        missing_props = [
-            k for k in filter_props.keys() if k not in filtered_props.keys()
-        ]
         # add missing properties with default values
-        for k in missing_props:
-
-            filtered_props[k] = None
+        for k in plan.properties:
+            filtered_props.setdefault(k, None)
 
         return filtered_props
 
     def translate_edges(
         self,
         id_src_tar_type_prop_tuples: Iterable,
-    ) -> Generator[Union[BioCypherEdge, BioCypherRelAsNode], None, None]:
+        workers: Optional[int] = None,
+        chunk_size: int = 10000,
+    ) -> TrustedStream:
         """
         Translates input edge representation to a representation that
         conforms to the schema of the given BioCypher graph. For now
@@ -1127,23 +1423,124 @@ class Translator:
                 of interaction in the original database notation, which
                 is translated to BioCypher notation using the `leaves`.
                 Can optionally possess its own ID.
+
+            workers (int): translate in a pool of this many processes, in
+                chunks of `chunk_size` input tuples; on the main thread if
+                None or 1.
+
+            chunk_size (int): number of input tuples per worker job.
+
+        Returns:
+            A lazy generator of :py:class:`BioCypherEdge` and
+            :py:class:`BioCypherRelAsNode` objects, in the order of the
+            input, marked as not to be checked again by the batch writer.
+        """
+
+        if workers and workers > 1:
+            return TrustedStream(
+                self._translate_pooled(
+                    id_src_tar_type_prop_tuples,
+                    'edges',
+                    workers,
+                    chunk_size,
+                ),
+            )
+
+        return TrustedStream(
+            self._translate_edges(id_src_tar_type_prop_tuples),
+        )
+
+    def _translate_pooled(
+        self,
+        items: Iterable,
+        what: str,
+        workers: int,
+        chunk_size: int,
+    ) -> Generator:
+        """
+        Translates input nodes or edges in a pool of worker processes. The
+        input is sent in chunks of tuples and the results are returned as
+        tuples, which are restored in the order of the input. At most two
+        chunks per worker are pending, which bounds the memory use.
         """
+
+        self._log_begin_translate(items, what)
+
+        logger.info(f'Translating {what} using {workers} processes.')
+
+        pending = deque()
+
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_translation_worker,
+                initargs=(
+                    self.leaves,
+                    self.strict_mode,
+                    self.missing_examples,
+                ),
+        ) as executor:
+
+            try:
+
+                for chunk in chunked(items, chunk_size):
+
+                    pending.append(
+                        executor.submit(_translate_chunk, what, chunk),
+                    )
+
+                    if len(pending) >= 2 * workers:
+                        yield from self._collect_chunk(pending.popleft())
+
+                while pending:
+                    yield from self._collect_chunk(pending.popleft())
+
+            finally:
+
+                # eg, the consumer stopped early or a worker failed
+                for future in pending:
+                    future.cancel()
+
+        self._log_finish_translate(what)
+
+    def _collect_chunk(self, future) -> Generator:
+        """
+        Waits for a chunk translated by a worker, records its missing types
+        and yields its entities.
+        """
+
+        records, notype, examples = future.result()
+
+        for _type, n in notype.items():
+            self.notype[_type] = self.notype.get(_type, 0) + n
+
+        for _type, ids in examples.items():
+            kept = self.notype_examples.setdefault(_type, [])
+            kept.extend(ids[:self.missing_examples - len(kept)])
+
+        for record in records:
+            yield _unpack(record)
+
+    def _translate_edges(
+        self,
+        id_src_tar_type_prop_tuples: Iterable,
+    ) -> Generator[Union[BioCypherEdge, BioCypherRelAsNode], None, None]:
+
         # TODO:
         #    - id of interactions (now simple concat with "_")
         #    - do we even need one?
 
         self._log_begin_translate(id_src_tar_type_prop_tuples, 'edges')
 
-        # legacy: deal with 4-tuples (no edge id)
-        # TODO remove for performance reasons once safe
-        id_src_tar_type_prop_tuples = peekable(id_src_tar_type_prop_tuples)
-        if len(id_src_tar_type_prop_tuples.peek()) == 4:
-            id_src_tar_type_prop_tuples = [
-                (None, src, tar, typ, props)
-                for src, tar, typ, props in id_src_tar_type_prop_tuples
-            ]
+        for edge in id_src_tar_type_prop_tuples:
+
+            # legacy: deal with 4-tuples (no edge id), tuple by tuple, so
+            # that streams can mix both forms
+            if len(edge) == 4:
+                _id = None
+                _src, _tar, _type, _props = edge
 
-        for _id, _src, _tar, _type, _props in id_src_tar_type_prop_tuples:
+            else:
+                _id, _src, _tar, _type, _props = edge
 
             # check for strict mode requirements
             if self.strict_mode:
@@ -1164,12 +1561,12 @@ class Translator:
 
             if bl_type:
 
-                # filter properties for those specified in schema_config if any
-                _filtered_props = self._filter_props(bl_type, _props)
+                plan = self._plan(bl_type)
 
-                rep = self.leaves[bl_type]['represented_as']
+                # filter properties for those specified in schema_config if any
+                _filtered_props = self._apply_plan(plan, _props)
 
-                if rep == 'node':
+                if plan.represented_as == 'node':
 
                     if _id:
                         # if it brings its own ID, use it
@@ -1225,17 +1622,11 @@ class Translator:
 
                 else:
 
-                    edge_label = self.leaves[bl_type].get('label_as_edge')
-
-                    if edge_label is None:
-
-                        edge_label = bl_type
-
                     yield BioCypherEdge(
                         relationship_id=_id,
                         source_id=_src,
                         target_id=_tar,
-                        relationship_label=edge_label,
+                        relationship_label=plan.edge_label,
                         properties=_filtered_props,
                     )
 
@@ -1245,21 +1636,240 @@ class Translator:
 
         self._log_finish_translate('edges')
 
-    def _record_no_type(self, _type: Any, what: Any) -> None:
+    def _filter_prop_columns(self, bl_type: str, frame) -> Any:
         """
-        Records the type of a node or edge that is not represented in the
-        schema_config.
+        Columnar version of :meth:`_filter_props`: selects the property
+        columns of a data frame specified in schema_config if any, adding
+        the missing whitelisted properties as empty columns.
         """
 
-        logger.debug(f'No Biolink type defined for `{_type}`: {what}')
+        filter_props, exclude_props = self._prop_filters(bl_type)
 
-        if self.notype.get(_type, None):
+        columns = [
+            c for c in frame.columns
+            if (not filter_props or c in filter_props) and
+            c not in exclude_props
+        ]
+        frame = frame[columns]
 
-            self.notype[_type] += 1
+        missing_props = [k for k in filter_props.keys() if k not in columns]
 
-        else:
+        # add missing properties with default values
+        return frame.assign(**{k: None for k in missing_props})
+
+    @staticmethod
+    def _to_frame(table: Any) -> Any:
+        """
+        Returns a :py:class:`pandas.DataFrame` of a data frame or an Arrow
+        table.
+        """
+
+        if hasattr(table, 'to_pandas'):
+
+            try:
+                # Arrow table
+                return table.to_pandas()
+
+            except ImportError:
+                raise ImportError(
+                    'Translating Arrow tables requires the package '
+                    '`pandas`; install it by `pip install '
+                    'biocypher[tables]`.'
+                )
+
+        return table
+
+    def _check_strict_columns(self, frame: Any, what: str) -> Any:
+        """
+        Columnar version of the strict mode requirements: the table must have
+        `source`, `licence` and `version` (nodes) or `source` and `licence`
+        (edges) columns.
+        """
+
+        if 'license' in frame.columns:
+            frame = frame.rename(columns={'license': 'licence'})
+
+        required = ['source', 'licence']
+
+        if what == 'nodes':
+            required.append('version')
+
+        for prop in required:
+            if prop not in frame.columns:
+                raise ValueError(
+                    f'Property `{prop}` missing from {what} table. '
+                    'Strict mode is enabled, so this is not allowed.'
+                )
+
+        return frame
+
+    def translate_node_table(
+        self,
+        table: Any,
+        id_column: str = 'id',
+        label_column: str = 'label',
+    ) -> Generator[tuple, None, None]:
+        """
+        Translates a table of nodes, one node per row, to the schema of the
+        BioCypher graph column by column, without creating an object per
+        node: input labels are mapped once per label, and properties are
+        filtered by selecting columns.
+
+        Args:
+            table:
+                A :py:class:`pandas.DataFrame` or :py:class:`pyarrow.Table`
+                with the node IDs, their input labels, and one column per
+                property.
+
+            id_column:
+                Name of the column with the node IDs.
+
+            label_column:
+                Name of the column with the input labels (`label_in_input`
+                in `schema_config.yaml`).
+
+        Yields:
+            Tuples of ontology class and data frame of its nodes: the node
+            IDs in the column `:ID`, followed by the property columns,
+            including `id` and `preferred_id` like
+            :py:class:`BioCypherNode`.
+        """
+
+        frame = self._to_frame(table)
+
+        self._log_begin_translate(frame, 'node table rows')
+
+        if self.strict_mode:
+            frame = self._check_strict_columns(frame, 'nodes')
+
+        if ':TYPE' in frame.columns:
+            logger.warning(
+                "Keyword ':TYPE' is reserved for Neo4j. "
+                'Removing from properties.',
+            )
+            frame = frame.drop(columns=':TYPE')
+
+        props = [
+            c for c in frame.columns if c not in (id_column, label_column)
+        ]
 
-            self.notype[_type] = 1
+        for _type, group in frame.groupby(label_column, sort=False):
+
+            _ontology_class = self._get_ontology_mapping(_type)
+
+            if not _ontology_class:
+                self._record_no_type(_type, None, len(group))
+                continue
+
+            nodes = self._filter_prop_columns(_ontology_class, group[props])
+            nodes.insert(0, ':ID', group[id_column])
+            nodes = nodes.assign(
+                id=group[id_column],
+                preferred_id=self._get_preferred_id(_ontology_class),
+            )
+
+            yield _ontology_class, nodes
+
+        self._log_finish_translate('node table')
+
+    def translate_edge_table(
+        self,
+        table: Any,
+        source_column: str = 'source',
+        target_column: str = 'target',
+        label_column: str = 'label',
+        id_column: Optional[str] = None,
+    ) -> Generator[tuple, None, None]:
+        """
+        Translates a table of edges, one edge per row, to the schema of the
+        BioCypher graph column by column, like :meth:`translate_node_table`.
+        Edge types represented as nodes in the graph are translated row by
+        row by :meth:`translate_edges`.
+
+        Args:
+            table:
+                A :py:class:`pandas.DataFrame` or :py:class:`pyarrow.Table`
+                with the source and target IDs, the input labels, and one
+                column per property.
+
+            source_column:
+                Name of the column with the source node IDs.
+
+            target_column:
+                Name of the column with the target node IDs.
+
+            label_column:
+                Name of the column with the input labels.
+
+            id_column:
+                Name of the column with the relationship IDs, if any.
+
+        Yields:
+            Tuples of relationship label and data frame of its edges: the
+            columns `:START_ID`, `:END_ID` and `:ID` (relationship ID or
+            None), followed by the property columns. For edges represented
+            as nodes, tuples of None and a generator of
+            :py:class:`BioCypherRelAsNode`.
+        """
+
+        frame = self._to_frame(table)
+
+        self._log_begin_translate(frame, 'edge table rows')
+
+        if self.strict_mode:
+            frame = self._check_strict_columns(frame, 'edges')
+
+        ids = (id_column, source_column, target_column, label_column)
+        props = [c for c in frame.columns if c not in ids]
+
+        for _type, group in frame.groupby(label_column, sort=False):
+
+            bl_type = self._get_ontology_mapping(_type)
+
+            if not bl_type:
+                self._record_no_type(_type, None, len(group))
+                continue
+
+            plan = self._plan(bl_type)
+
+            if plan.represented_as == 'node':
+
+                yield None, self.translate_edges(
+                    zip(
+                        group[id_column]
+                        if id_column else itertools.repeat(None),
+                        group[source_column],
+                        group[target_column],
+                        itertools.repeat(_type),
+                        group[props].to_dict('records')
+                        if props else ({} for _ in range(len(group))),
+                    ),
+                )
+                continue
+
+            edges = self._filter_prop_columns(bl_type, group[props])
+            edges.insert(0, ':START_ID', group[source_column])
+            edges.insert(1, ':END_ID', group[target_column])
+            edges.insert(2, ':ID', group[id_column] if id_column else None)
+
+            yield plan.edge_label, edges
+
+        self._log_finish_translate('edge table')
+
+    def _record_no_type(self, _type: Any, what: Any, n: int = 1) -> None:
+        """
+        Records the type of `n` nodes or edges that is not represented in
+        the schema_config, and the ID of the first few as examples (if
+        `what` is not None). Only counts, as these may be most of the
+        input; the totals are logged by
+        :py:meth:`biocypher._driver.Driver.log_missing_bl_types`.
+        """
+
+        count = self.notype.get(_type, 0)
+        self.notype[_type] = count + n
+
+        if what is not None and count < self.missing_examples:
+            self.notype_examples.setdefault(_type, []).append(what)
 
     def get_missing_biolink_types(self) -> dict:
         """
@@ -1269,6 +1879,14 @@ class Translator:
 
         return self.notype
 
+    def get_missing_type_examples(self) -> dict:
+        """
+        Returns a dictionary of types that were not represented in the
+        schema_config, and a list of example IDs of each.
+        """
+
+        return self.notype_examples
+
     @staticmethod
     def _log_begin_translate(_input: Iterable, what: str):
 
@@ -1327,38 +1945,69 @@ class Translator:
 
         return self.reverse_mappings.get(term, None)
 
+    @property
+    def mappings(self) -> dict:
+        """
+        Input labels and their BioCypher names in PascalCase.
+        """
+
+        return self._mappings
+
+    @mappings.setter
+    def mappings(self, mappings: dict):
+
+        self._mappings = mappings
+        self._query_translators.clear()
+
+    @property
+    def reverse_mappings(self) -> dict:
+        """
+        BioCypher names in PascalCase and their input labels.
+        """
+
+        return self._reverse_mappings
+
+    @reverse_mappings.setter
+    def reverse_mappings(self, reverse_mappings: dict):
+
+        self._reverse_mappings = reverse_mappings
+        self._query_translators.clear()
+
+    def _query_translator(self, reverse: bool) -> _LabelTranslator:
+        """
+        Returns the label translator of queries in one direction, compiling
+        it on first use after the mappings changed.
+        """
+
+        translator = self._query_translators.get(reverse)
+
+        if translator is None:
+
+            translator = self._query_translators[reverse] = (
+                # reverse: only labels at the end of a node or relationship
+                # pattern, eg `(n:Label)`
+                _LabelTranslator(self.reverse_mappings, r'(?=[)\]])', 4096)
+                if reverse else
+                _LabelTranslator(self.mappings, r'(?![\w.])', 4096)
+            )
+
+        return translator
+
     def translate(self, query):
         """
         Translate a cypher query. Only translates labels as of now.
         """
-        for key in self.mappings:
-            query = query.replace(':' + key, ':' + self.mappings[key])
-        return query
+
+        return self._query_translator(False).translate(query)
 
     def reverse_translate(self, query):
         """
         Reverse translate a cypher query. Only translates labels as of
         now.
         """
-        for key in self.reverse_mappings:
-
-            a = ':' + key + ')'
-            b = ':' + key + ']'
-            # TODO this conditional probably does not cover all cases
-            if a in query or b in query:
-                if isinstance(self.reverse_mappings[key], list):
-                    raise NotImplementedError(
-                        'Reverse translation of multiple inputs not '
-                        'implemented yet. Many-to-one mappings are '
-                        'not reversible. '
-                        f'({key} -> {self.reverse_mappings[key]})',
-                    )
-                else:
-                    query = query.replace(
-                        a,
-                        ':' + self.reverse_mappings[key] + ')',
-                    ).replace(b, ':' + self.reverse_mappings[key] + ']')
-        return query
+
+        # TODO the pattern probably does not cover all cases
+        return self._query_translator(True).translate(query)
 
     def _add_translation_mappings(self, original_name, biocypher_name):
         """
@@ -1366,6 +2015,9 @@ class Translator:
         PascalCase version of the BioCypher name, since sentence case is
         not useful for Cypher queries.
         """
+
+        self._query_translators.clear()
+
         if isinstance(original_name, list):
             for on in original_name:
                 self.mappings[on] = self.name_sentence_to_pascal(
@@ -1386,9 +2038,11 @@ class Translator:
             )] = original_name
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def name_sentence_to_pascal(name: str) -> str:
         """
-        Converts a name in sentence case to pascal case.
+        Converts a name in sentence case to pascal case. Memoized, as it is
+        called for every edge.
         """
         # split on dots if dot is present
         if '.' in name:
@@ -76,15 +76,36 @@ from ._logger import logger
 logger.debug(f'Loading module {__name__}.')
 
 from types import GeneratorType
-from typing import TYPE_CHECKING, Union, Optional
+from typing import TYPE_CHECKING, Union, Callable, Optional
 from datetime import datetime
-from collections import OrderedDict, defaultdict
+from functools import partial
+from collections import deque, defaultdict
+from concurrent.futures import (
+    Executor,
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+)
 import os
+import re
+import copy
+import gzip
+import pickle
+import shutil
+import itertools
 
 from more_itertools import peekable
 
 from biocypher._config import config as _config
-from ._create import BioCypherEdge, BioCypherNode, BioCypherRelAsNode
+from ._delta import DeltaIndex, cypher_str, cypher_value
+from ._index import get_index, fingerprint, DiskFingerprintIndex
+from ._sort import ExternalSorter
+from ._stats import Stats
+from ._create import (
+    BioCypherEdge,
+    BioCypherNode,
+    TrustedStream,
+    BioCypherRelAsNode,
+)
 
 __all__ = ['BatchWriter']
 
@@ -94,428 +115,2822 @@ if TYPE_CHECKING:
 
 # TODO retrospective check of written csvs?
 
+_NON_QUOTED_TYPES = [
+    'int',
+    'long',
+    'float',
+    'double',
+    'dbl',
+    'bool',
+    'boolean',
+]
 
-class BatchWriter:
+
+class _RowSerializer:
     """
-    Class for writing node and edge representations to disk using the
-    format specified by Neo4j for the use of admin import. Each batch
-    writer instance has a fixed representation that needs to be passed
-    at instantiation via the :py:attr:`schema` argument. The instance
-    also expects an ontology adapter via :py:attr:`ontology_adapter` to be able
-    to convert and extend the hierarchy.
+    Converts the nodes or edges of one label to CSV lines. The property
+    schema of a label is fixed once its first entity is seen, so the
+    serializer compiles a specialised row function from it: the type
+    dispatch of each property is resolved once, and the fields are joined
+    by a single expression. The row function is only compiled on the
+    thread that creates or extends the serializer; workers are handed a
+    :py:meth:`snapshot`. Instances are picklable, so that they can be sent
+    to worker processes, where the row function is compiled again.
 
     Args:
-        leaves:
-            The BioCypher graph schema leaves (ontology classes).
-
-        ontology_adapter:
-            Instance of :py:class:`OntologyAdapter` to enable translation and
-            ontology queries
+        prop_dict:
+            Properties of the class and their types, in header order.
 
-        delimiter:
-            The delimiter to use for the CSV files.
+        delim:
+            Field delimiter.
 
-        array_delimiter:
-            The delimiter to use for array properties.
+        adelim:
+            Array delimiter.
 
         quote:
-            The quote character to use for the CSV files.
+            Quote character.
+
+        union:
+            Property union mode: entities may have any subset of the
+            reference properties, missing ones are written as empty
+            fields; :py:meth:`extend` adds new properties. The columns
+            after the properties are moved before them, so that the
+            columns of rows written earlier stay in place.
+    """
 
-        dirname:
-            Path for exporting CSV files.
+    # row columns before and after the properties
+    _HEAD = ()
+    _TAIL = ()
 
-        db_name:
-            Name of the Neo4j database that will be used in the generated
-            commands.
+    def __init__(
+        self,
+        prop_dict: dict,
+        delim: str,
+        adelim: str,
+        quote: str,
+        union: bool = False,
+    ):
 
-        skip_bad_relationships:
-            Whether to skip relationships that do not have a valid
-            start and end node. (In admin import call.)
+        self.prop_dict = prop_dict
+        self.delim = delim
+        self.adelim = adelim
+        self.quote = quote
+        self.union = union
+        self._refresh()
 
-        skip_duplicate_nodes:
-            Whether to skip duplicate nodes. (In admin import call.)
+    def __getstate__(self) -> dict:
 
-        wipe:
-            Whether to force import (removing existing DB content). (In
-            admin import call.)
+        # compiled functions cannot be pickled
+        state = dict(self.__dict__)
+        del state['_compiled']
 
-        strict_mode:
-            Whether to enforce source, version, and license properties.
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+
+        self.__dict__.update(state)
+        self._refresh()
+
+    @property
+    def ref_props(self) -> list:
+
+        return self._compiled[2]
+
+    def _refresh(self) -> None:
+        """
+        Compiles the row function from the current properties. The row
+        function, reference keys and reference properties are replaced by
+        one assignment, so that a concurrent call sees either the old or
+        the new state, not a mix.
+        """
+
+        ref_props = list(self.prop_dict.keys())
+        self._compiled = (self._compile(), frozenset(ref_props), ref_props)
+
+    def snapshot(self) -> '_RowSerializer':
+        """
+        Returns a copy that later calls of :py:meth:`extend` do not change,
+        to be handed to a worker.
+        """
+
+        snap = copy.copy(self)
+        snap.prop_dict = dict(self.prop_dict)
+
+        return snap
+
+    @staticmethod
+    def _quoted(v: str) -> str:
+        """
+        Expression formatting a property `v` that is not numeric or boolean:
+        quoted, and lists joined by the array delimiter.
+        """
+
+        return (
+            f"q + a.join({v}) + q if isinstance({v}, list) else "
+            f"q + str({v}) + q"
+        )
+
+    def _compile(self) -> Callable:
+        """
+        Generates the row function of the label, taking the entity and its
+        properties.
+        """
+
+        fields = list(self._HEAD)
+
+        if self.union:
+            fields.extend(self._TAIL)
+
+        for k, t in self.prop_dict.items():
+
+            fmt = 'str(v)' if t in _NON_QUOTED_TYPES else self._quoted('v')
+            get = f'p.get({k!r})' if self.union else f'p[{k!r}]'
+            # TODO make field empty instead of ""?
+            fields.append(f"('' if (v := {get}) is None else {fmt})")
+
+        if not self.union:
+            fields.extend(self._TAIL)
+
+        src = (
+            'def row(e, p):\n'
+            f'    return d.join(({", ".join(fields)},)) + "\\n"\n'
+        )
+        namespace = {
+            'd': self.delim,
+            'a': self.adelim,
+            'q': self.quote,
+            **self._constants(),
+        }
+        exec(compile(src, f'<{type(self).__name__}>', 'exec'), namespace)
+
+        return namespace['row']
+
+    def _constants(self) -> dict:
+
+        return {}
+
+    def extend(self, entities: list) -> None:
+        """
+        Adds the properties of the entities missing from the reference
+        properties, in order of appearance, typed by their first value.
+        """
+
+        n = len(self.prop_dict)
+        ref_keys = self._compiled[1]
+
+        for e in entities:
+
+            props = e.get_properties()
+
+            if props.keys() <= ref_keys:
+                continue
+
+            for k, v in props.items():
+                if k not in self.prop_dict:
+                    self.prop_dict[k] = None if v is None else type(v).__name__
+
+            ref_keys = frozenset(self.prop_dict)
+
+        if len(self.prop_dict) > n:
+            # compiled here, before the batch is handed to a worker
+            self._refresh()
+
+    @staticmethod
+    def _deviation(ref_props: list, props: dict) -> tuple:
+        """
+        Returns the properties missing from or additional to the reference
+        properties.
+        """
+
+        keys = list(props.keys())
+        oprop1 = set(ref_props).difference(keys)
+        oprop2 = set(keys).difference(ref_props)
+
+        return max([oprop1, oprop2]), keys
+
+
+class _NodeSerializer(_RowSerializer):
+    """
+    Row serializer of the nodes of one label.
+
+    Args:
+        labels:
+            String of one or several concatenated labels for the node class.
     """
+
+    _HEAD = ('e.get_id()',)
+    _TAIL = ('labels',)
+
     def __init__(
         self,
-        leaves: dict,
-        ontology_adapter: 'OntologyAdapter',
-        translator: 'Translator',
-        delimiter: str,
-        array_delimiter: str,
+        prop_dict: dict,
+        labels: str,
+        delim: str,
+        adelim: str,
         quote: str,
-        dirname: Optional[str] = None,
-        db_name: str = 'neo4j',
-        skip_bad_relationships: bool = False,
-        skip_duplicate_nodes: bool = False,
-        wipe: bool = True,
-        strict_mode: bool = False,
+        union: bool = False,
     ):
-        self.db_name = db_name
 
-        self.delim = delimiter
-        self.adelim = array_delimiter
-        self.quote = quote
-        self.skip_bad_relationships = skip_bad_relationships
-        self.skip_duplicate_nodes = skip_duplicate_nodes
-        self.wipe = wipe
+        # before compiling the row function
+        self.labels = labels
+        super().__init__(prop_dict, delim, adelim, quote, union)
+
+    def _constants(self) -> dict:
+
+        return {'labels': self.labels}
+
+    def __call__(self, node_list: list) -> list:
+        """
+        Converts a list of biocypher nodes to a list of CSV lines.
+
+        Raises:
+            ValueError: if a node deviates from the reference properties
+        """
+
+        row, ref_keys, ref_props = self._compiled
+        lines = []
+
+        for n in node_list:
+
+            n_props = n.get_properties()
+
+            # check for deviations in properties, order invariant
+            if not self.union and n_props.keys() != ref_keys:
+                oprop, n_keys = self._deviation(ref_props, n_props)
+                raise ValueError(
+                    f'At least one node of the class {n.get_label()} '
+                    f'has more or fewer properties than another. '
+                    f'Offending node: {n.get_id()!r}, offending property: '
+                    f'{oprop}. '
+                    f'All reference properties: {ref_props}, '
+                    f'All node properties: {n_keys}.',
+                )
+
+            lines.append(row(n, n_props))
+
+        return lines
+
+
+class _EdgeSerializer(_RowSerializer):
+    """
+    Row serializer of the edges of one label. String properties of edges
+    may use `**` as array delimiter.
+
+    Args:
+        pascal_label:
+            The relationship type in PascalCase.
+    """
+
+    _HEAD = ('e.get_source_id()',)
+    _TAIL = ('e.get_target_id()', 'pascal_label')
+
+    def __init__(
+        self,
+        prop_dict: dict,
+        pascal_label: str,
+        delim: str,
+        adelim: str,
+        quote: str,
+        union: bool = False,
+    ):
+
+        # before compiling the row function
+        self.pascal_label = pascal_label
+        super().__init__(prop_dict, delim, adelim, quote, union)
+
+    @staticmethod
+    def _quoted(v: str) -> str:
+
+        return (
+            f"q + a.join({v}) + q if isinstance({v}, list) else "
+            f"q + {v}.replace('**', a) + q if isinstance({v}, str) else "
+            f"q + str({v}) + q"
+        )
+
+    def _constants(self) -> dict:
+
+        return {'pascal_label': self.pascal_label}
+
+    def __call__(self, edge_list: list) -> list:
+        """
+        Converts a list of biocypher edges to a list of CSV lines.
+
+        Raises:
+            ValueError: if an edge deviates from the reference properties
+        """
+
+        row, ref_keys, ref_props = self._compiled
+        lines = []
+
+        for e in edge_list:
+
+            e_props = e.get_properties()
+
+            # check for deviations in properties, order invariant
+            if not self.union and e_props.keys() != ref_keys:
+                oprop, e_keys = self._deviation(ref_props, e_props)
+                oedge = f'{e.get_source_id()}-{e.get_target_id()}'
+                raise ValueError(
+                    f'At least one edge of the class {e.get_label()} '
+                    f'has more or fewer properties than another. '
+                    f'Offending edge: {oedge!r}, offending property: '
+                    f'{oprop}. '
+                    f'All reference properties: {ref_props}, '
+                    f'All edge properties: {e_keys}.',
+                )
+
+            # properties in the same order as in the header
+            lines.append(row(e, e_props))
+
+        return lines
+
+
+def _first_value(column):
+    """
+    Returns the first non-null value of a data frame column as Python
+    object (numpy scalars and arrays converted), or None.
+    """
+
+    column = column.dropna()
+
+    if not len(column):
+        return None
+
+    v = column.iloc[0]
+
+    return v.tolist() if hasattr(v, 'tolist') else v
+
+
+def _format_column(
+    column,
+    prop_type: str,
+    adelim: str,
+    quote: str,
+    edge: bool = False,
+    sanitize: bool = False,
+):
+    """
+    Columnar version of the row serializers: formats a data frame column
+    as CSV fields, like :py:class:`_NodeSerializer` and
+    :py:class:`_EdgeSerializer` format single values.
+
+    Args:
+        column: the column (a :py:class:`pandas.Series`)
+        prop_type (str): the type of the property
+        adelim (str): array delimiter
+        quote (str): quote character
+        edge (bool): whether `**` in strings is an array delimiter
+        sanitize (bool): replace line breaks and double quotes in strings,
+            like :py:class:`BioCypherNode`
+
+    Returns:
+        The column of strings.
+    """
+
+    null = column.isna()
+
+    if prop_type in _NON_QUOTED_TYPES:
+        return column.astype(str).mask(null, '')
+
+    if isinstance(_first_value(column), list):
+
+        def join(v):
+
+            if isinstance(v, str):
+                v = v.replace('**', adelim) if edge else v
+            elif hasattr(v, '__iter__'):
+                v = adelim.join(str(i) for i in v)
+            else:
+                v = str(v)
+
+            if sanitize:
+                v = v.replace(os.linesep, ' ').replace('\n', ' ')
+                v = v.replace('\r', ' ')
+
+            return v
+
+        out = column.map(join, na_action='ignore')
+
+    else:
+
+        out = column.astype(str)
+
+        if sanitize:
+            for old, new in (
+                (os.linesep, ' '),
+                ('\n', ' '),
+                ('\r', ' '),
+                ('"', "'"),
+            ):
+                out = out.str.replace(old, new, regex=False)
+
+        if edge:
+            out = out.str.replace('**', adelim, regex=False)
+
+    return (quote + out + quote).mask(null, '')
+
+
+def _serialize_frame(
+    first,
+    columns: list,
+    last: list,
+    delim: str,
+) -> list:
+    """
+    Joins formatted data frame columns to CSV lines.
+
+    Args:
+        first: the first column (node ID or source ID)
+        columns (list): the formatted property columns
+        last (list): further columns or constant strings appended
+        delim (str): field delimiter
+
+    Returns:
+        list: one CSV line per row
+    """
+
+    lines = first.astype(str)
+
+    for column in columns + last:
+        lines = lines + delim + column
+
+    return (lines + '\n').tolist()
+
+
+_PART_SUFFIXES = {
+    None: '.csv',
+    'gzip': '.csv.gz',
+    'zstd': '.csv.zst',
+}
+
+
+def _zstd():
+    """
+    Returns the Zstandard module: `compression.zstd` of the standard library
+    (Python 3.14+) or its backport, or the `zstandard` package.
+    """
+
+    try:
+        from compression import zstd
+
+    except ImportError:
+
+        try:
+            from backports import zstd
+
+        except ImportError:
+
+            try:
+                import zstandard as zstd
+
+            except ImportError:
+                raise ImportError(
+                    'Zstandard compression requires Python 3.14+ or one '
+                    'of the packages `backports.zstd` or `zstandard`; '
+                    'install the latter by `pip install biocypher[zstd]`.'
+                )
+
+    return zstd
+
+
+def _open_part(
+    file_path: str,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+):
+    """
+    Opens a part file for writing text, compressed with `compression`
+    (`'gzip'` or `'zstd'`) at `level` if given.
+    """
+
+    if not compression:
+        return open(file_path, 'w', encoding='utf-8')
+
+    if compression == 'gzip':
+        return gzip.open(
+            file_path,
+            'wt',
+            compresslevel=6 if level is None else level,
+            encoding='utf-8',
+        )
+
+    zstd = _zstd()
+
+    if zstd.__name__ == 'zstandard':
+        return zstd.open(
+            file_path,
+            'wt',
+            cctx=zstd.ZstdCompressor(level=3 if level is None else level),
+            encoding='utf-8',
+        )
+
+    return zstd.open(file_path, 'wt', level=level, encoding='utf-8')
+
+
+def _write_lines(
+    file_path: str,
+    lines: list,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+) -> None:
+    """
+    Writes a list of strings to a part file.
+    """
+
+    with _open_part(file_path, compression, level) as f:
+
+        # concatenate with delimiter
+        f.writelines(lines)
+
+
+def _serialize_and_write(
+    file_path: str,
+    compression: Optional[str],
+    level: Optional[int],
+    serializer: _RowSerializer,
+    entities: list,
+) -> int:
+    """
+    Worker job of the parallel mode: converts one batch of entities to CSV
+    lines and writes them to their (already numbered) part file.
+
+    Returns:
+        int: the number of lines written
+    """
+
+    lines = serializer(entities)
+    _write_lines(file_path, lines, compression, level)
+
+    return len(lines)
+
+
+class _PartPool:
+    """
+    Bounded queue of pending part file jobs on a worker pool. Jobs are
+    submitted in order; if more than `max_pending` jobs are in flight,
+    submission waits for the oldest one to finish, which limits the number
+    of batches held in memory.
+
+    Args:
+        executor:
+            The pool executing the jobs.
+
+        max_pending:
+            Maximum number of submitted jobs that are not yet finished.
+    """
+    def __init__(self, executor: Executor, max_pending: int):
+
+        self.executor = executor
+        self.max_pending = max_pending
+        self.pending = deque()
+
+    def submit(self, fn: Callable, *args) -> bool:
+        """
+        Submits a job, first waiting for the oldest job if the queue is
+        full.
+
+        Returns:
+            bool: False if a previously submitted job failed.
+        """
+
+        passed = True
+
+        # collect finished jobs early, to report errors as soon as possible
+        while self.pending and (
+            len(self.pending) >= self.max_pending or self.pending[0].done()
+        ):
+            passed = self._collect(self.pending.popleft()) and passed
+
+        self.pending.append(self.executor.submit(fn, *args))
+
+        return passed
+
+    def wait(self) -> bool:
+        """
+        Waits for all pending jobs.
+
+        Returns:
+            bool: True if all jobs finished successfully, False otherwise.
+        """
+
+        passed = True
+
+        while self.pending:
+            passed = self._collect(self.pending.popleft()) and passed
+
+        return passed
+
+    def shutdown(self) -> None:
+
+        self.wait()
+        self.executor.shutdown()
+
+    @staticmethod
+    def _collect(future) -> bool:
+
+        try:
+            future.result()
+
+        except Exception as e:
+            logger.error(f'Error in part file worker: {e}')
+            return False
+
+        return True
+
+
+def _estimate_row_bytes(entity: Union[BioCypherNode, BioCypherEdge]) -> int:
+    """
+    Rough size of the CSV line of a node or edge in bytes: the string
+    length of its property values plus quotes and delimiters, and an
+    allowance for IDs and labels.
+    """
+
+    props = entity.get_properties()
+
+    return sum(len(str(v)) for v in props.values()) + 3 * len(props) + 64
+
+
+class _Budget:
+    """
+    Estimated bytes held by the bins of one write call, and the memory
+    budget they share.
+
+    Args:
+        limit:
+            Estimated bytes of all bins combined above which the largest of
+            them is written; no limit if None.
+    """
+    def __init__(self, limit: Optional[int] = None):
+
+        self.limit = limit
+        self.total = 0
+        self.members = []
+
+    def exceeded(self) -> bool:
+
+        return bool(self.limit) and self.total >= self.limit
+
+    def largest(self) -> tuple:
+        """
+        Returns the bins and the label of the largest bin of all members.
+        """
+
+        return max(
+            ((bins, label) for bins in self.members for label in bins.bytes),
+            key=lambda bl: bl[0].bytes[bl[1]],
+        )
+
+
+class _Bins:
+    """
+    State of one write call of the batch writer: one list of nodes or edges
+    per label, which is written to a part file when it reaches the batch
+    size, and the reference properties and concatenated labels of each
+    label.
+
+    Optionally, the bins also keep an estimate of their size in bytes (of
+    the CSV lines they will be written as), based on the size of a sample
+    row per label that is renewed whenever a bin is written.
+
+    Args:
+        batch_size:
+            Number of entities per label after which a part file is
+            written.
+
+        write_bin:
+            Function writing a bin of these bins to a part file, given the
+            bins and the label.
+
+        budget:
+            Memory budget, shared with the other bins of the same write
+            call (eg, the nodes and edges of a stream of
+            :py:class:`BioCypherRelAsNode`): above it, the largest bin of
+            all of them is written.
+
+        part_size:
+            Estimated bytes of one bin above which it is written, to even
+            out the size of the part files.
+    """
+    def __init__(
+        self,
+        batch_size: int,
+        write_bin: Callable,
+        budget: _Budget,
+        part_size: Optional[int] = None,
+    ):
+
+        self.batch_size = batch_size
+        self.write_bin = write_bin
+        self.budget = budget
+        budget.members.append(self)
+        self.part_size = part_size
+        self.bins = defaultdict(list)
+        self.reference_props = {}
+        self.labels = {}
+        # whether any input has been passed, including skipped entities
+        self.seen = False
+        # whether the input comes from the translator, and does not need
+        # to be type checked
+        self.trusted = False
+        # estimated bytes per row, and in total per bin
+        self.row_bytes = {}
+        self.bytes = defaultdict(int)
+
+    def append(self, label: str, entity) -> None:
+
+        self.bins[label].append(entity)
+
+        if self.budget.limit or self.part_size:
+
+            if label not in self.row_bytes:
+                self.row_bytes[label] = _estimate_row_bytes(entity)
+
+            self.bytes[label] += self.row_bytes[label]
+            self.budget.total += self.row_bytes[label]
+
+    def full(self, label: str) -> Optional[tuple]:
+        """
+        Returns the bins and the label of the bin to be written after
+        adding to the bin of `label`, if any: that bin itself if it has
+        reached the batch or part size, or the largest bin of all bins
+        sharing the budget if they exceed it.
+        """
+
+        if (
+            len(self.bins[label]) >= self.batch_size or
+            self.part_size and self.bytes[label] >= self.part_size
+        ):
+            return self, label
+
+        if self.budget.exceeded():
+            return self.budget.largest()
+
+    def clear(self, label: str) -> None:
+        """
+        Empties the bin of a label after it has been written, renewing the
+        row size estimate from its last entity.
+        """
+
+        if self.row_bytes and self.bins[label]:
+
+            sample = _estimate_row_bytes(self.bins[label][-1])
+            self.row_bytes[label] = (self.row_bytes[label] + sample) // 2
+            self.budget.total -= self.bytes.pop(label, 0)
+
+        self.bins[label] = []
+
+
+_CHECKPOINT_FILE = 'biocypher-checkpoint.pkl'
+
+# writer state saved in checkpoints
+_CHECKPOINT_ATTRS = (
+    'node_property_dict',
+    'edge_property_dict',
+    'import_call_nodes',
+    'import_call_edges',
+    'seen_node_ids',
+    'duplicate_node_ids',
+    'duplicate_node_types',
+    'seen_edges',
+    'duplicate_edge_ids',
+    'duplicate_edge_types',
+    'dangling_edge_types',
+    'dangling_node_ids',
+    'edge_sorter',
+    'compression',
+    'delta',
+    '_part_counters',
+    '_stream_offsets',
+)
+
+
+class _Stream:
+    """
+    Position of the batch writer in one input stream: the number of input
+    items consumed, counted as they are passed on, and at the last
+    checkpoint.
+    """
+    def __init__(self, name: str, position: int = 0):
+
+        self.name = name
+        self.position = position
+        self.checkpointed = position
+
+    def iterate(self, items, skip: int = 0):
+
+        for item in itertools.islice(items, skip, None):
+
+            # counted before it is processed; the writer takes checkpoints
+            # only between items
+            self.position += 1
+
+            yield item
+
+
+class BatchWriter:
+    """
+    Class for writing node and edge representations to disk using the
+    format specified by Neo4j for the use of admin import. Each batch
+    writer instance has a fixed representation that needs to be passed
+    at instantiation via the :py:attr:`schema` argument. The instance
+    also expects an ontology adapter via :py:attr:`ontology_adapter` to be able
+    to convert and extend the hierarchy.
+
+    Args:
+        leaves:
+            The BioCypher graph schema leaves (ontology classes).
+
+        ontology_adapter:
+            Instance of :py:class:`OntologyAdapter` to enable translation and
+            ontology queries
+
+        delimiter:
+            The delimiter to use for the CSV files.
+
+        array_delimiter:
+            The delimiter to use for array properties.
+
+        quote:
+            The quote character to use for the CSV files.
+
+        dirname:
+            Path for exporting CSV files.
+
+        db_name:
+            Name of the Neo4j database that will be used in the generated
+            commands.
+
+        skip_bad_relationships:
+            Whether to skip relationships that do not have a valid
+            start and end node. (In admin import call.)
+
+        skip_duplicate_nodes:
+            Whether to skip duplicate nodes. (In admin import call.)
+
+        wipe:
+            Whether to force import (removing existing DB content). (In
+            admin import call.)
+
+        strict_mode:
+            Whether to enforce source, version, and license properties.
+
+        parallel:
+            Opt-in parallel writing of part files: `'process'` or
+            `'thread'` hands full batches to a pool of workers that
+            serialize and write them, while the main thread keeps
+            collecting the input. `None` (default) writes on the main
+            thread. Part numbering and header output are the same in all
+            modes.
+
+        workers:
+            Number of workers in parallel mode. Defaults to the number of
+            CPUs.
+
+        node_dedup:
+            Kind of index used to detect duplicate node IDs: `'set'`
+            (default, exact), `'fingerprint'` (64-bit hashes in a compact
+            table), `'disk'` (fingerprints spilled to disk above
+            `dedup_memory_items`), or `'bloom'` (approximate, may skip a
+            new node as duplicate at rate `dedup_fpr`). See
+            :py:mod:`biocypher._index`.
+
+        dedup_capacity:
+            Expected number of nodes, used to size the `'fingerprint'` and
+            `'bloom'` indices.
+
+        dedup_fpr:
+            False positive rate of the `'bloom'` index.
+
+        dedup_memory_items:
+            Maximum number of fingerprints held in memory by the `'disk'`
+            index, which spills the others to `biocypher-index-*`
+            directories in the output directory.
+
+        edge_dedup_with_id:
+            Whether edges of the same type between the same source and
+            target but with different relationship IDs are distinct. By
+            default, only source and target are compared.
+
+        edge_index:
+            Kind of index used per edge type to detect duplicate edges by
+            their `(source, target[, id])` tuple: `'set'` (default, exact
+            and fastest), or `'fingerprint'`, `'disk'` or `'bloom'` to
+            save memory, as for `node_dedup`.
+
+        compression:
+            Compress the part files: `'gzip'` writes `.csv.gz` files, which
+            `neo4j-admin import` reads directly; `'zstd'` writes `.csv.zst`
+            files (smaller and faster, but to be decompressed before the
+            import). Headers are always written as plain text. `None`
+            (default) writes plain `.csv` parts.
+
+        compression_level:
+            Compression level; defaults to 6 for gzip and 3 for zstd.
+
+        compression_thread:
+            Compress part files in the background writer thread; the same
+            as `async_write` when compressing.
+
+        memory_budget:
+            Estimated size in bytes of the CSV lines of all nodes and edges
+            held in the bins of one write call combined, including the
+            nodes of :py:class:`BioCypherRelAsNode` in an edge stream; when
+            reached, the largest bin is written to a part file, regardless
+            of the batch size. The Python objects take a multiple of this in
+            memory. `None` (default) limits bins by the batch size only.
+
+        part_size:
+            Estimated size in bytes (uncompressed) above which a bin is
+            written to a part file, so that parts are of similar size
+            across labels with short and long rows. `None` (default) limits
+            parts by the batch size only.
+
+        async_write:
+            Write (and compress) part files in a background thread, while
+            the main thread collects and serializes the next batch. Errors
+            of the writer thread are reported by the next write call. Has
+            no effect in parallel mode, where the workers write.
+
+        write_queue_size:
+            Maximum number of serialized batches waiting for or being
+            written by the background writer; the main thread waits when
+            the queue is full. The default of 1 double-buffers: one batch
+            is written while the next one is collected.
+
+        checkpoint_interval:
+            Number of input items after which the state of the writer is
+            saved to `biocypher-checkpoint.pkl` in the output directory:
+            the bins are written to part files, and the de-duplication
+            indices, properties, part numbers, import call and the
+            position in each input stream are pickled. A checkpoint is
+            also saved at the end of each write call. `None` (default)
+            disables checkpoints.
+
+        resume:
+            Reopen the state of the last checkpoint in the output
+            directory, removing part files written after it. Input
+            streams (see :py:meth:`open_stream`) skip the items consumed
+            before the checkpoint.
+
+        delta_index:
+            Path of a file with hashes of the rows of all nodes and edges
+            of the previous build (see :py:mod:`biocypher._delta`). If
+            given, only added and changed entities are written to part
+            files, the keys of removed ones to `<Label>-removed.csv`
+            files, and :py:meth:`write_import_call` also writes the Cypher
+            script `delta-import.cypher` applying these changes to the
+            database, and replaces the file with the hashes of this
+            build. The output directory has to be the import directory of
+            Neo4j for the script. Parallel mode is not supported, nor
+            `edge_dedup_with_id`, as the relationship IDs are not written
+            to the part files the script merges edges by.
+
+        n_shards:
+            Partition the part files of each label into this many shards
+            by a hash of the node ID, or of the source ID for edges, so
+            that each shard can be processed independently. Shards have
+            their own part sequence, `<Label>-shard<S>-part<N>.csv`; a
+            node or edge is always in the same shard, across builds.
+            `None` (default) writes one part sequence per label.
+
+        property_union:
+            Allow nodes and edges of one label to have different
+            properties, if no properties are configured in the schema: the
+            union of the properties seen so far is written, empty for
+            the properties an entity does not have, and the header is
+            rewritten at the end of each write call. The label column
+            (`:LABEL`, or `:END_ID` and `:TYPE`) then follows the ID
+            column. By default, a deviation from the properties of the
+            first entity is an error.
+
+        edge_dedup:
+            De-duplication of edges: `'index'` (default) records the keys
+            of the edges written in one index per type, of the kind given
+            by `edge_index`;
+            `'external'` sorts the serialized edges by key in runs of
+            `sort_buffer_items` spilled to the output directory, and
+            merges them when the edges of a write call (or checkpoint) are
+            complete, keeping the first occurrence of each edge. Memory
+            is bounded regardless of the number of edges, and the part
+            files are sorted by key within each merge. The keys merged so
+            far are kept in a sorted file, so duplicates across write
+            calls are detected as well. Edge tables are always
+            de-duplicated by the index.
+
+        sort_buffer_items:
+            Number of edges held in memory by `'external'` edge
+            de-duplication before they are spilled to a sorted run.
+
+        edge_integrity:
+            Check that the source and target of each edge are among the
+            nodes written so far, ie, nodes have to be written before the
+            edges referring to them. The check uses the index of written
+            node IDs (see `node_dedup`); with the `'bloom'` index, a few
+            dangling edges may go undetected. `'count'` records dangling
+            edges per type, see :py:meth:`get_dangling_edges`; `'filter'`
+            also removes them from the output. `None` (default) disables
+            the check, leaving dangling edges to the import (see
+            `skip_bad_relationships`).
+
+        stats:
+            Collects timings of the de-duplication, serialization and
+            write stages and the rows and bytes written per label (see
+            :py:mod:`biocypher._stats`). By default, a disabled instance.
+    """
+    def __init__(
+        self,
+        leaves: dict,
+        ontology_adapter: 'OntologyAdapter',
+        translator: 'Translator',
+        delimiter: str,
+        array_delimiter: str,
+        quote: str,
+        dirname: Optional[str] = None,
+        db_name: str = 'neo4j',
+        skip_bad_relationships: bool = False,
+        skip_duplicate_nodes: bool = False,
+        wipe: bool = True,
+        strict_mode: bool = False,
+        parallel: Optional[str] = None,
+        workers: Optional[int] = None,
+        node_dedup: str = 'set',
+        dedup_capacity: int = int(1e6),
+        dedup_fpr: float = 1e-4,
+        dedup_memory_items: int = int(1e8),
+        edge_dedup_with_id: bool = False,
+        edge_index: str = 'set',
+        compression: Optional[str] = None,
+        compression_level: Optional[int] = None,
+        compression_thread: bool = False,
+        memory_budget: Optional[int] = None,
+        part_size: Optional[int] = None,
+        async_write: bool = False,
+        write_queue_size: int = 1,
+        checkpoint_interval: Optional[int] = None,
+        resume: bool = False,
+        delta_index: Optional[str] = None,
+        n_shards: Optional[int] = None,
+        property_union: bool = False,
+        edge_dedup: str = 'index',
+        sort_buffer_items: int = int(1e6),
+        edge_integrity: Optional[str] = None,
+        stats: Optional[Stats] = None,
+    ):
+        self.db_name = db_name
+
+        self.delim = delimiter
+        self.adelim = array_delimiter
+        self.quote = quote
+        self.skip_bad_relationships = skip_bad_relationships
+        self.skip_duplicate_nodes = skip_duplicate_nodes
+        self.wipe = wipe
+
+        self.strict_mode = strict_mode
+
+        self.leaves = leaves
+        self.ontology_adapter = ontology_adapter
+        self.translator = translator
+        self.node_property_dict = {}
+        self.edge_property_dict = {}
+        self.import_call_nodes = ''
+        self.import_call_edges = ''
+
+        timestamp = lambda: datetime.now().strftime('%Y%m%d%H%M')
+
+        self.outdir = dirname or os.path.join(_config('outdir'), timestamp())
+        self.outdir = os.path.abspath(self.outdir)
+
+        logger.info(f'Creating output directory `{self.outdir}`.')
+        os.makedirs(self.outdir, exist_ok=True)
+
+        # index of the ids of nodes that have already been written; to
+        # avoid duplicates
+        self.seen_node_ids = get_index(
+            node_dedup,
+            capacity=dedup_capacity,
+            fpr=dedup_fpr,
+            max_memory_items=dedup_memory_items,
+            spill_dir=self.outdir,
+        )
+        self.duplicate_node_ids = set(
+        )  # set to store the ids of nodes that were
+        # found to have duplicates (avoid overloading the log)
+        self.duplicate_node_types = set(
+        )  # set to store the types of nodes that
+        # have been found to have duplicates
+
+        # (source, target[, id]) tuples of edges that have already been
+        # written, per edge type; to avoid duplicates; compact indices
+        # start small since their tables grow as needed
+        self.seen_edges = defaultdict(
+            partial(
+                get_index,
+                edge_index,
+                capacity=1024,
+                fpr=dedup_fpr,
+                max_memory_items=dedup_memory_items,
+                spill_dir=self.outdir,
+            ),
+        )
+        self.edge_dedup_with_id = edge_dedup_with_id
+        self.duplicate_edge_ids = set()  # set to store the ids of edges that
+        # were found to have duplicates (avoid overloading the log)
+        self.duplicate_edge_types = set(
+        )  # set to store the types of edges that
+        # have been found to have duplicates
+
+        if edge_dedup not in ('index', 'external'):
+            raise ValueError(
+                f'Unknown edge de-duplication `{edge_dedup}`; use `index` '
+                'or `external`.'
+            )
+
+        # sorted runs of serialized edges, if de-duplicated externally
+        self.edge_sorter = (
+            ExternalSorter(self.outdir, sort_buffer_items)
+            if edge_dedup == 'external' else None
+        )
+
+        # number of edges per type whose source or target has not been
+        # written, and the missing node IDs
+        self.edge_integrity = edge_integrity or None
+        self.dangling_edge_types = defaultdict(int)
+        self.dangling_node_ids = set()
+
+        if self.edge_integrity not in (None, 'count', 'filter'):
+            raise ValueError(
+                f'Unknown edge integrity check `{self.edge_integrity}`; '
+                'use `count` or `filter`.'
+            )
+
+        # TODO not memory efficient, but should be fine for most cases; is
+        # there a more elegant solution?
+
+        self.parallel = parallel or None
+        self.workers = workers or os.cpu_count() or 1
+        self._part_pool = None
+
+        if compression and compression not in _PART_SUFFIXES:
+            raise ValueError(
+                f'Unknown compression `{compression}`; use `gzip` or `zstd`.'
+            )
+
+        if compression == 'zstd':
+            # fail early if no Zstandard implementation is available
+            _zstd()
+
+        self.compression = compression or None
+        self.compression_level = compression_level
+        self.compression_thread = compression_thread
+        self.async_write = async_write
+        self.write_queue_size = write_queue_size
+        self._writer_pool = None
+
+        self.memory_budget = memory_budget
+        self.part_size = part_size
+        # next part number per label (PascalCase)
+        self._part_counters = {}
+        # compiled row serializer per label
+        self._serializers = {}
+
+        if self.parallel not in (None, 'process', 'thread'):
+            raise ValueError(
+                f'Unknown parallel mode `{self.parallel}`; '
+                'use `process` or `thread`.'
+            )
+
+        self.delta = DeltaIndex(delta_index) if delta_index else None
+        self.n_shards = n_shards or None
+        self.property_union = property_union
+        self.stats = stats or Stats()
+
+        if self.delta and edge_dedup_with_id:
+            raise ValueError(
+                'Delta export cannot tell apart edges by relationship ID; '
+                'do not use it with `edge_dedup_with_id`.'
+            )
+
+        if self.delta and self.parallel:
+            logger.info('Delta export is written on the main thread.')
+            self.parallel = None
+
+        self.checkpoint_interval = checkpoint_interval
+        self.resume = resume
+        # input items consumed per stream at the last checkpoint
+        self._stream_offsets = {}
+        # the stream of the current write call, and the number of streams
+        # opened, for default names
+        self._stream = None
+        self._n_streams = 0
+
+        if self.resume:
+            self._load_checkpoint()
+
+    def _new_bins(
+        self,
+        batch_size: int,
+        write_bin: Callable,
+        budget: Optional[_Budget] = None,
+    ) -> _Bins:
+        """
+        Returns the bins for one write call, written by `write_bin`
+        (`_write_node_bin` or `_write_edge_bin`). Bins of the same call
+        share one memory budget.
+        """
+
+        return _Bins(
+            batch_size,
+            write_bin,
+            budget or _Budget(self.memory_budget),
+            self.part_size,
+        )
+
+    def _get_part_pool(self) -> Optional[_PartPool]:
+        """
+        Returns the worker pool of the parallel mode, creating it on first
+        use; None if writing on the main thread.
+        """
+
+        if self.parallel and not self._part_pool:
+
+            logger.info(
+                f'Writing part files using {self.workers} '
+                f'{self.parallel} workers.'
+            )
+
+            executor = (
+                ProcessPoolExecutor if self.parallel == 'process' else
+                ThreadPoolExecutor
+            )(max_workers=self.workers)
+
+            # keep all workers busy while one more batch per worker is
+            # being collected
+            self._part_pool = _PartPool(executor, 2 * self.workers)
+
+        return self._part_pool
+
+    def _get_writer_pool(self) -> Optional[_PartPool]:
+        """
+        Returns the background thread writing serialized batches, creating
+        it on first use; None if not enabled or in parallel mode.
+        """
+
+        if self.parallel or self._writer_pool:
+            return self._writer_pool
+
+        if self.async_write or self.compression and self.compression_thread:
+
+            logger.info('Writing part files in a background thread.')
+
+            self._writer_pool = _PartPool(
+                ThreadPoolExecutor(max_workers=1),
+                self.write_queue_size,
+            )
+
+        return self._writer_pool
+
+    def _wait_for_parts(self) -> bool:
+        """
+        Waits until all part files handed to the worker pool or the
+        writer thread are written.
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        passed = True
+
+        for pool in (self._part_pool, self._writer_pool):
+            if pool:
+                passed = pool.wait() and passed
+
+        return passed
+
+    def open_stream(self, items, name: Optional[str] = None, offset=0):
+        """
+        Opens an input stream of the next write call, so that its position
+        is saved in checkpoints. When resuming, the items consumed before
+        the checkpoint are skipped. Items can be raw input, which is
+        translated lazily afterwards: the position then counts input
+        items, so that adapters can skip them at the source (see
+        :py:meth:`get_stream_offset`). Without checkpoints, the items are
+        returned unchanged.
+
+        Args:
+            items (iterable): the input items
+
+            name (str): identifies the stream across runs; defaults to
+                the number of streams opened before, which is the same
+                when the build script is run again
+
+            offset (int): number of items the adapter has skipped itself
+                at the start of the stream
+
+        Returns:
+            The items, as a generator counting the position.
+        """
+
+        if not (self.checkpoint_interval or self.resume):
+            return items
+
+        if name is None:
+            name = f'stream{self._n_streams}'
+
+        self._n_streams += 1
+
+        consumed = self._stream_offsets.get(name, 0)
+
+        if consumed > offset:
+            logger.info(f'Resuming stream `{name}` after {consumed} items.')
+
+        self._stream = _Stream(name, max(consumed, offset))
+        skip = max(consumed - offset, 0)
+
+        if isinstance(items, TrustedStream):
+            return TrustedStream(self._stream.iterate(items.gen, skip=skip))
+
+        return self._stream.iterate(items, skip=skip)
+
+    def get_stream_offset(self, name: str) -> int:
+        """
+        Returns the number of input items of a stream consumed at the last
+        checkpoint, where an adapter can start reading when resuming.
+        """
+
+        return self._stream_offsets.get(name, 0)
+
+    def close_stream(self) -> bool:
+        """
+        Records the end of the stream of the current write call and saves
+        a checkpoint.
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        stream, self._stream = self._stream, None
+
+        if stream is None:
+            return True
+
+        self._stream_offsets[stream.name] = stream.position
+
+        return self._save_checkpoint()
+
+    def _checkpoint_due(self) -> bool:
+
+        return bool(
+            self._stream and self.checkpoint_interval and
+            self._stream.position - self._stream.checkpointed >=
+            self.checkpoint_interval
+        )
+
+    def _checkpoint(
+        self,
+        node_bins: Optional[_Bins] = None,
+        edge_bins: Optional[_Bins] = None,
+    ) -> bool:
+        """
+        Writes the bins of the current write call to part files and saves
+        the state of the writer, including the position in the current
+        stream.
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        if node_bins and not self._flush_node_bins(node_bins):
+            return False
+
+        if edge_bins and not self._flush_edge_bins(edge_bins):
+            return False
+
+        stream = self._stream
+        stream.checkpointed = stream.position
+        self._stream_offsets[stream.name] = stream.position
+
+        return self._save_checkpoint()
+
+    def _checkpoint_path(self) -> str:
+
+        return os.path.join(self.outdir, _CHECKPOINT_FILE)
+
+    def _save_checkpoint(self) -> bool:
+        """
+        Pickles the state of the writer to the checkpoint file, replacing
+        the previous checkpoint only when complete.
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        if not (self.checkpoint_interval or self.resume):
+            return True
+
+        path = self._checkpoint_path()
+        logger.info(f'Saving checkpoint to `{path}`.')
+
+        state = {attr: getattr(self, attr) for attr in _CHECKPOINT_ATTRS}
+
+        try:
+
+            with open(f'{path}.tmp', 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        except (OSError, pickle.PicklingError, TypeError) as e:
+            logger.error(f'Could not save checkpoint: {e}')
+            return False
+
+        os.replace(f'{path}.tmp', path)
+
+        if self.edge_sorter:
+            # the key runs of earlier merges are no longer referred to
+            self.edge_sorter.prune()
+
+        for index in self._disk_indices():
+            index.prune()
+
+        return True
+
+    def _disk_indices(self) -> list:
+        """
+        The de-duplication indices that keep run files on disk.
+        """
+
+        indices = [self.seen_node_ids, *self.seen_edges.values()]
+
+        return [i for i in indices if isinstance(i, DiskFingerprintIndex)]
+
+    def _load_checkpoint(self) -> None:
+        """
+        Restores the state of the writer from the checkpoint file and
+        removes part and header files written after it. If the checkpoint
+        cannot be loaded, eg, as run files of an index are missing, the
+        files of the interrupted build are removed to start anew.
+        """
+
+        path = self._checkpoint_path()
+
+        if not os.path.exists(path):
+            logger.warning(
+                f'No checkpoint found in `{self.outdir}`; starting anew.',
+            )
+            return
+
+        logger.info(f'Resuming from checkpoint `{path}`.')
+
+        try:
+
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            logger.error(
+                f'Could not load checkpoint `{path}`: {e}; starting anew.',
+            )
+            self._remove_files_after_checkpoint()
+            return
+
+        if state['compression'] != self.compression:
+            logger.warning(
+                'Compression differs from the checkpoint; using '
+                f'`{state["compression"]}`.',
+            )
+
+        for attr, value in state.items():
+            setattr(self, attr, value)
+
+        self._remove_files_after_checkpoint()
+
+    def _remove_files_after_checkpoint(self) -> None:
+        """
+        Removes part files numbered beyond the part counters of the
+        checkpoint, headers not in its import call, run files of the
+        external sort not referred to by its sorter, and directories and
+        run files of de-duplication indices not referred to by them,
+        which were written after the checkpoint. Later runs are numbered
+        as after the checkpoint, and would otherwise overwrite leftover
+        files.
+        """
+
+        pattern = re.compile(r'(.+)-part(\d+)\.csv(\.gz|\.zst)?')
+        import_call = self.import_call_nodes + self.import_call_edges
+        sort_files = self.edge_sorter.files() if self.edge_sorter else set()
+        indices = self._disk_indices()
+        index_dirs = {i.directory for i in indices}
+        index_files = set().union(*(i.files() for i in indices))
+
+        for file_name in os.listdir(self.outdir):
+
+            path = os.path.join(self.outdir, file_name)
+            m = pattern.fullmatch(file_name)
+
+            if m:
+                stale = int(m.group(2)) >= self._part_counters.get(
+                    m.group(1),
+                    0,
+                )
+
+            elif file_name.endswith('-header.csv'):
+                stale = f'"{path},' not in import_call
+
+            elif file_name.startswith('biocypher-sort-'):
+                stale = file_name not in sort_files
+
+            elif file_name.startswith('biocypher-index-'):
+
+                if path not in index_dirs:
+                    logger.info(f'Removing `{file_name}` after checkpoint.')
+                    shutil.rmtree(path, ignore_errors=True)
+                    continue
+
+                for run in os.listdir(path):
+                    if os.path.join(path, run) not in index_files:
+                        os.remove(os.path.join(path, run))
+
+                continue
+
+            else:
+                continue
+
+            if stale:
+                logger.info(f'Removing `{file_name}` after checkpoint.')
+                os.remove(path)
+
+    def write_nodes(
+        self,
+        nodes,
+        batch_size=int(1e6),
+        stream: Optional[str] = None,
+    ):
+        """
+        Wrapper for writing nodes and their headers.
+
+        Args:
+            nodes (BioCypherNode): a list or generator of nodes in
+                :py:class:`BioCypherNode` format
+
+            stream (str): name of the input stream for checkpoints, if not
+                opened by :py:meth:`open_stream` before
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+        # TODO check represented_as
+
+        if self._stream is None:
+            nodes = self.open_stream(nodes, stream)
+
+        # write node data
+        passed = self._write_node_data(nodes, batch_size)
+        if not passed:
+            logger.error('Error while writing node data.')
+            self._stream = None
+            return False
+        # pass property data to header writer per node type written
+        passed = self._write_node_headers()
+        if not passed:
+            logger.error('Error while writing node headers.')
+            self._stream = None
+            return False
+
+        return self.close_stream()
+
+    def write_edges(
+        self,
+        edges: Union[list, GeneratorType],
+        batch_size: int = int(1e6),
+        stream: Optional[str] = None,
+    ) -> bool:
+        """
+        Wrapper for writing edges and their headers. The input is consumed
+        in a single pass: the nodes and edges of
+        :py:class:`BioCypherRelAsNode` objects are routed to their bins as
+        they arrive, so memory use is bounded by the batch size per label,
+        not by the size of the input.
+
+        Args:
+            edges (BioCypherEdge): a list or generator of edges in
+                :py:class:`BioCypherEdge` or :py:class:`BioCypherRelAsNode`
+                format
+
+            stream (str): name of the input stream for checkpoints, if not
+                opened by :py:meth:`open_stream` before
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+        if self._stream is None:
+            edges = self.open_stream(edges, stream)
+
+        passed = self._write_edges(edges, batch_size)
+
+        if not passed:
+            self._stream = None
+            return False
+
+        return self.close_stream()
+
+    def _write_edges(self, edges, batch_size: int) -> bool:
+        """
+        Writes edges, and nodes of :py:class:`BioCypherRelAsNode` objects,
+        and their headers; see :py:meth:`write_edges`.
+        """
+        # nodes and edges share the memory budget
+        node_bins = self._new_bins(batch_size, self._write_node_bin)
+        edge_bins = self._new_bins(
+            batch_size,
+            self._write_edge_bin,
+            node_bins.budget,
+        )
+
+        if isinstance(edges, TrustedStream):
+            node_bins.trusted = edge_bins.trusted = True
+            edges = edges.gen
+
+        for e in edges:
+
+            if isinstance(e, BioCypherRelAsNode):
+
+                passed = (
+                    self._add_node(node_bins, e.get_node()) and
+                    self._add_edge(edge_bins, e.get_source_edge()) and
+                    self._add_edge(edge_bins, e.get_target_edge())
+                )
+
+            else:
+
+                passed = self._add_edge(edge_bins, e)
+
+            if not passed:
+                logger.error('Error while writing edge data.')
+                return False
+
+            if self._checkpoint_due():
+                if not self._checkpoint(node_bins, edge_bins):
+                    return False
+
+        if not (node_bins.seen or edge_bins.seen):
+            # is this a problem? if the generator or list is empty, we
+            # don't write anything.
+            logger.debug(
+                'No edges to write, possibly due to no matched Biolink classes.',
+            )
+            logger.error('Error while writing edge data.')
+            return False
+
+        if node_bins.seen:
+
+            passed = self._flush_node_bins(node_bins)
+            if not passed:
+                logger.error('Error while writing node data.')
+                return False
+            passed = self._write_node_headers()
+            if not passed:
+                logger.error('Error while writing node headers.')
+                return False
+
+        passed = self._flush_edge_bins(edge_bins)
+        if not passed:
+            logger.error('Error while writing edge data.')
+            return False
+        # pass property data to header writer per edge type written
+        passed = self._write_edge_headers()
+        if not passed:
+            logger.error('Error while writing edge headers.')
+            return False
+
+        return True
+
+    def _write_node_data(self, nodes, batch_size):
+        """
+        Writes biocypher nodes to CSV conforming to the headers created
+        with `_write_node_headers()`, and is actually required to be run
+        before calling `_write_node_headers()` to set the
+        :py:attr:`self.node_property_dict` for passing the node properties
+        to the instance. Expects list or generator of nodes from the
+        :py:class:`BioCypherNode` class.
+
+        Args:
+            nodes (BioCypherNode): a list or generator of nodes in
+                :py:class:`BioCypherNode` format
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        trusted = isinstance(nodes, TrustedStream)
+
+        if trusted:
+            nodes = nodes.gen
+
+        if isinstance(nodes, GeneratorType) or isinstance(nodes, peekable):
+            logger.debug('Writing node CSV from generator.')
+
+            bins = self._new_bins(batch_size, self._write_node_bin)
+            bins.trusted = trusted
+
+            for node in nodes:
+
+                if not self._add_node(bins, node):
+                    return False
+
+                if self._checkpoint_due():
+                    if not self._checkpoint(node_bins=bins):
+                        return False
+
+            # after generator depleted, write remainder of bins
+            return self._flush_node_bins(bins)
+
+        else:
+            if type(nodes) is not list:
+                logger.error('Nodes must be passed as list or generator.')
+                return False
+            else:
+
+                def gen(nodes):
+                    yield from nodes
+
+                return self._write_node_data(gen(nodes), batch_size=batch_size)
+
+    def _add_node(self, bins: '_Bins', node: BioCypherNode) -> bool:
+        """
+        Adds one node to the bin of its label, skipping nodes without ID
+        and duplicates, and writes the bin to a part file once it reaches
+        the batch size.
+
+        Args:
+            bins (_Bins): the bins of the current write call
+
+            node (BioCypherNode): the node to add
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        bins.seen = True
+
+        _id = node.get_id()
+        label = node.get_label()
+
+        # check for non-id
+        if not _id:
+            logger.warning(f'Node {label} has no id; skipping.')
+            return True
+
+        # check if node has already been written, if so skip; otherwise
+        # record it
+        with self.stats.timer('dedup', label):
+            new = self.seen_node_ids.add(_id)
+
+        if not new:
+            self.duplicate_node_ids.add(_id)
+            if not label in self.duplicate_node_types:
+                self.duplicate_node_types.add(label)
+                logger.warning(f'Duplicate nodes found in type {label}. ')
+            return True
+
+        if not label in bins.bins.keys():
+            # start new list
+            bins.append(label, node)
+
+            bins.reference_props[label] = self._node_reference_props(
+                label,
+                node.get_properties(),
+            )
+            bins.labels[label] = self._node_labels(label)
+
+        else:
+            # add to list
+            bins.append(label, node)
+
+        # batch size controlled here
+        return self._write_full_bin(bins, label)
+
+    def _node_reference_props(self, label: str, props: dict) -> dict:
+        """
+        Returns the reference properties of a node type and their types:
+        from the schema configuration if present, otherwise from the
+        properties of the first node.
+
+        Args:
+            label (str): the label (type) of the node
+
+            props (dict): the properties of the first node
+
+        Returns:
+            dict: property names and types
+        """
+
+        if self.property_union and label in self.node_property_dict:
+            # keep extending the columns of earlier write calls
+            return self.node_property_dict[label]
+
+        # get properties from config if present
+        cprops = self.ontology_adapter.leaves.get(label).get('properties')
+
+        if cprops:
+            d = dict(cprops)
+
+            # add id and preferred id to properties; these are
+            # created in node creation (`_create.BioCypherNode`)
+            d['id'] = 'str'
+            d['preferred_id'] = 'str'
+
+            # add strict mode properties
+            if self.strict_mode:
+                d['source'] = 'str'
+                d['version'] = 'str'
+                d['licence'] = 'str'
+
+        else:
+            d = dict(props)
+            # encode property type
+            for k, v in d.items():
+                if d[k] is not None:
+                    d[k] = type(v).__name__
+        # else use first encountered node to define properties for
+        # checking; could later be by checking all nodes but much
+        # more complicated, particularly involving batch writing
+        # (would require "do-overs"). for now, we output a warning
+        # if node properties diverge from reference properties (in
+        # write_single_node_list_to_file) TODO if it occurs, ask
+        # user to select desired properties and restart the process
+
+        return d
+
+    def _node_labels(self, label: str) -> str:
+        """
+        Returns the labels of a node type: the PascalCase classes of its
+        ancestry in the ontology, concatenated by the array delimiter.
+        """
+
+        return self.ontology_adapter.get_node_labels(label, self.adelim)
+
+    def _edge_reference_props(self, label: str, props: dict) -> dict:
+        """
+        Returns the reference properties of an edge type and their types:
+        from the schema configuration if present, otherwise from the
+        properties of the first edge.
+
+        Args:
+            label (str): the label (type) of the edge
+
+            props (dict): the properties of the first edge
+
+        Returns:
+            dict: property names and types
+        """
+
+        if self.property_union and label in self.edge_property_dict:
+            # keep extending the columns of earlier write calls
+            return self.edge_property_dict[label]
+
+        # check whether label is in ontology_adapter.leaves
+        # (may not be if it is an edge that carries the
+        # "label_as_edge" property)
+        cprops = None
+        if label in self.ontology_adapter.leaves:
+            cprops = self.ontology_adapter.leaves.get(label).get(
+                'properties',
+            )
+        else:
+            # try via "label_as_edge"
+            for k, v in self.ontology_adapter.leaves.items():
+                if isinstance(v, dict):
+                    if v.get('label_as_edge') == label:
+                        cprops = v.get('properties')
+                        break
+        if cprops:
+            # a copy, the properties may be extended
+            d = dict(cprops)
+
+            # add strict mode properties
+            if self.strict_mode:
+                d['source'] = 'str'
+                d['version'] = 'str'
+                d['licence'] = 'str'
+
+        else:
+            d = dict(props)
+            # encode property type
+            for k, v in d.items():
+                if d[k] is not None:
+                    d[k] = type(v).__name__
+        # else use first encountered edge to define
+        # properties for checking; could later be by
+        # checking all edges but much more complicated,
+        # particularly involving batch writing (would
+        # require "do-overs"). for now, we output a warning
+        # if edge properties diverge from reference
+        # properties (in write_single_edge_list_to_file)
+        # TODO
+
+        return d
+
+    def _write_full_bin(self, bins: '_Bins', label: str) -> bool:
+        """
+        Writes a bin to a part file if, after adding to the bin of `label`,
+        it has reached the batch size or the part size, or the largest bin
+        (of nodes or edges) if the memory budget is exhausted.
+
+        Args:
+            bins (_Bins): the bins of the current write call
+
+            label (str): the label of the bin just added to
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        full = bins.full(label)
+
+        if full is None:
+            return True
+
+        full_bins, full_label = full
+
+        if full_label != label or full_bins is not bins:
+            logger.debug(
+                'Memory budget of batch writer reached; '
+                f'writing `{full_label}`.',
+            )
+
+        return full_bins.write_bin(full_bins, full_label)
+
+    def _write_node_bin(self, bins: '_Bins', label: str) -> bool:
+        """
+        Writes the node bin of a label to a part file and empties it.
+        """
+
+        passed = self._write_single_node_list_to_file(
+            bins.bins[label],
+            label,
+            bins.reference_props[label],
+            bins.labels[label],
+            validate=not bins.trusted,
+        )
+
+        bins.clear(label)
+
+        return passed
+
+    def _flush_node_bins(self, bins: '_Bins') -> bool:
+        """
+        Writes the remainder of the node bins after the input is depleted
+        and passes the reference properties to the header writer.
+
+        Args:
+            bins (_Bins): the bins of the current write call
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        for label in list(bins.bins.keys()):
+            if not self._write_node_bin(bins, label):
+                return False
+
+        if not self._wait_for_parts():
+            return False
+
+        # use complete bin list to write header files
+        # TODO if a node type has varying properties
+        # (ie missingness), we'd need to collect all possible
+        # properties in the generator pass
+
+        # save config or first-node properties to instance attribute
+        for label in bins.reference_props.keys():
+            self.node_property_dict[label] = bins.reference_props[label]
+
+        return True
+
+    def write_node_table(
+        self,
+        frame,
+        label: str,
+        batch_size: int = int(1e6),
+    ) -> bool:
+        """
+        Writes a table of nodes of one type, as created by
+        :py:meth:`Translator.translate_node_table`, and their header. Nodes
+        are de-duplicated and serialized column by column, without creating
+        an object per node.
+
+        Args:
+            frame (pandas.DataFrame): the node IDs in the column `:ID`,
+                followed by one column per property
+
+            label (str): the label (ontology class) of the nodes
+
+            batch_size (int): the number of rows per part file
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        ids = frame[':ID']
+        no_id = ids.isna() | (ids.astype(str) == '')
+
+        if no_id.any():
+            logger.warning(f'{no_id.sum()} nodes of {label} have no id.')
+
+        # check if node has already been written, if so skip; otherwise
+        # record it
+        new = ~no_id
+
+        with self.stats.timer('dedup', label):
+            new[new] = [self.seen_node_ids.add(i) for i in ids[new]]
+
+        dup = ~(no_id | new)
+
+        if dup.any():
+            self.duplicate_node_ids.update(ids[dup])
+            if not label in self.duplicate_node_types:
+                self.duplicate_node_types.add(label)
+                logger.warning(f'Duplicate nodes found in type {label}. ')
+
+        frame = frame[new]
+
+        prop_dict = self.node_property_dict.get(label)
+
+        if prop_dict is None:
+            props = frame.drop(columns=':ID')
+            prop_dict = self._node_reference_props(
+                label,
+                {c: _first_value(props[c]) for c in props.columns},
+            )
+
+        if self.property_union:
+            frame = self._union_columns(frame, prop_dict, (':ID',))
+
+        if set(frame.columns) != set(prop_dict) | {':ID'}:
+            logger.error(
+                f'The node table of the class {label} has other properties '
+                f'than the reference. All reference properties: '
+                f'{list(prop_dict)}, All table columns: '
+                f'{list(frame.columns)}.',
+            )
+            return False
+
+        labels = self._node_labels(label)
+
+        for start in range(0, len(frame), int(batch_size)):
+
+            passed = self._write_node_frame(
+                frame.iloc[start:start + int(batch_size)],
+                label,
+                prop_dict,
+                labels,
+            )
+
+            if not passed:
+                return False
+
+        if not self._wait_for_parts():
+            return False
+
+        self.node_property_dict[label] = prop_dict
+
+        return self._write_node_headers()
+
+    @staticmethod
+    def _union_columns(frame, prop_dict: dict, ids: tuple):
+        """
+        Property union mode: adds the columns of a table missing from the
+        reference properties to them, typed by their first value, and
+        the reference properties missing from the table as empty columns.
+
+        Returns:
+            pandas.DataFrame: the table with the ID and reference columns
+        """
+
+        for c in frame.columns:
+
+            if c not in ids and c not in prop_dict:
+                v = _first_value(frame[c])
+                prop_dict[c] = None if v is None else type(v).__name__
+
+        return frame.reindex(columns=[*ids, *prop_dict])
+
+    def _write_node_frame(
+        self,
+        frame,
+        label: str,
+        prop_dict: dict,
+        labels: str,
+        shard: Optional[int] = None,
+    ) -> bool:
+        """
+        Writes one batch of a node table to a part file, or one per shard.
+
+        Args:
+            frame (pandas.DataFrame): the nodes
+
+            label (str): the label (type) of the nodes
+
+            prop_dict (dict): properties of node class and their types
+
+            labels (str): string of one or several concatenated labels
+                for the node class
+
+            shard (int): the shard of the nodes, if sharded
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        if self.n_shards and shard is None:
+
+            for shard, group in self._frame_shards(frame, ':ID'):
+                if not self._write_node_frame(
+                    group,
+                    label,
+                    prop_dict,
+                    labels,
+                    shard,
+                ):
+                    return False
+
+            return True
+
+        with self.stats.timer('serialization', label):
+
+            columns = [
+                _format_column(
+                    frame[k],
+                    t,
+                    self.adelim,
+                    self.quote,
+                    sanitize=True,
+                ) for k, t in prop_dict.items()
+            ]
+
+            if self.property_union:
+                lines = _serialize_frame(
+                    frame[':ID'],
+                    [labels] + columns,
+                    [],
+                    self.delim,
+                )
+            else:
+                lines = _serialize_frame(
+                    frame[':ID'],
+                    columns,
+                    [labels],
+                    self.delim,
+                )
+
+        if self.delta:
+            lines = self._delta_lines(label, frame[':ID'], lines)
+
+        return self._write_next_part(label, lines, shard)
+
+    def write_edge_table(
+        self,
+        frame,
+        label: str,
+        batch_size: int = int(1e6),
+    ) -> bool:
+        """
+        Writes a table of edges of one type, as created by
+        :py:meth:`Translator.translate_edge_table`, and their header,
+        de-duplicated and serialized column by column.
+
+        Args:
+            frame (pandas.DataFrame): the columns `:START_ID`, `:END_ID`
+                and `:ID`, followed by one column per property
+
+            label (str): the label (type) of the edges
+
+            batch_size (int): the number of rows per part file
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        ids = (':START_ID', ':END_ID', ':ID')
+        no_id = frame[':START_ID'].isna() | frame[':END_ID'].isna()
+
+        if no_id.any():
+            logger.error(
+                f'{no_id.sum()} edges of {label} have no source or target.',
+            )
+
+        key_columns = ids if self.edge_dedup_with_id else ids[:2]
+        keys = zip(*(frame[c][~no_id] for c in key_columns))
+
+        # check for duplicates; the joined id string is only built for
+        # reporting
+        seen = self.seen_edges[label]
+        new = ~no_id
+
+        with self.stats.timer('dedup', label):
+            new[new] = [seen.add(k) for k in keys]
+
+        dup = ~(no_id | new)
+
+        if dup.any():
+            self.duplicate_edge_ids.update(
+                f'{s}_{t}'
+                for s, t in zip(frame[':START_ID'][dup], frame[':END_ID'][dup])
+            )
+            if not label in self.duplicate_edge_types:
+                self.duplicate_edge_types.add(label)
+                logger.warning(f'Duplicate edges found in type {label}. ')
+
+        frame = frame[new]
+
+        if self.edge_integrity:
+
+            valid = [
+                self._check_endpoints(label, st)
+                for st in zip(frame[':START_ID'], frame[':END_ID'])
+            ]
+
+            if self.edge_integrity == 'filter':
+                # a mask of the rows; numpy comes with pandas, and a list
+                # would select columns if empty
+                import numpy as np
+
+                frame = frame[np.asarray(valid, dtype=bool)]
+
+        prop_dict = self.edge_property_dict.get(label)
+
+        if prop_dict is None:
+            props = frame.drop(columns=list(ids))
+            prop_dict = self._edge_reference_props(
+                label,
+                {c: _first_value(props[c]) for c in props.columns},
+            )
+
+        if self.property_union:
+            frame = self._union_columns(frame, prop_dict, ids)
+
+        if set(frame.columns) != set(prop_dict) | set(ids):
+            logger.error(
+                f'The edge table of the class {label} has other properties '
+                f'than the reference. All reference properties: '
+                f'{list(prop_dict)}, All table columns: '
+                f'{list(frame.columns)}.',
+            )
+            return False
+
+        for start in range(0, len(frame), int(batch_size)):
+
+            passed = self._write_edge_frame(
+                frame.iloc[start:start + int(batch_size)],
+                label,
+                prop_dict,
+            )
+
+            if not passed:
+                return False
+
+        if not self._wait_for_parts():
+            return False
+
+        self.edge_property_dict[label] = prop_dict
+
+        return self._write_edge_headers()
+
+    def _write_edge_frame(
+        self,
+        frame,
+        label: str,
+        prop_dict: dict,
+        shard: Optional[int] = None,
+    ) -> bool:
+        """
+        Writes one batch of an edge table to a part file, or one per shard.
+
+        Args:
+            frame (pandas.DataFrame): the edges
+
+            label (str): the label (type) of the edges
+
+            prop_dict (dict): properties of edge class and their types
+
+            shard (int): the shard of the edges, if sharded
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        if self.n_shards and shard is None:
+
+            for shard, group in self._frame_shards(frame, ':START_ID'):
+                if not self._write_edge_frame(group, label, prop_dict, shard):
+                    return False
+
+            return True
+
+        with self.stats.timer('serialization', label):
+
+            columns = [
+                _format_column(
+                    frame[k],
+                    t,
+                    self.adelim,
+                    self.quote,
+                    edge=True,
+                ) for k, t in prop_dict.items()
+            ]
+            end_type = [
+                frame[':END_ID'].astype(str),
+                self.translator.name_sentence_to_pascal(label),
+            ]
+
+            if self.property_union:
+                lines = _serialize_frame(
+                    frame[':START_ID'],
+                    end_type + columns,
+                    [],
+                    self.delim,
+                )
+            else:
+                lines = _serialize_frame(
+                    frame[':START_ID'],
+                    columns,
+                    end_type,
+                    self.delim,
+                )
+
+        if self.delta:
+            columns = (':START_ID', ':END_ID', ':ID')
+            columns = columns if self.edge_dedup_with_id else columns[:2]
+            keys = zip(*(frame[c] for c in columns))
+            lines = self._delta_lines(label, keys, lines, kind='edges')
+
+        return self._write_next_part(label, lines, shard)
+
+    def _write_node_headers(self):
+        """
+        Writes single CSV file for a graph entity that is represented
+        as a node as per the definition in the `schema_config.yaml`,
+        containing only the header for this type of node.
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+        # load headers from data parse
+        if not self.node_property_dict:
+            logger.error(
+                'Header information not found. Was the data parsed first?',
+            )
+            return False
+
+        for label, props in self.node_property_dict.items():
+            # create header CSV with ID, properties, labels
+
+            _id = ':ID'
+
+            # to programmatically define properties to be written, the
+            # data would have to be parsed before writing the header.
+            # alternatively, desired properties can also be provided
+            # via the schema_config.yaml.
+
+            # translate label to PascalCase
+            pascal_label = self.translator.name_sentence_to_pascal(label)
+
+            header_path = os.path.join(
+                self.outdir,
+                f'{pascal_label}-header.csv',
+            )
+            parts_path = self._get_parts_pattern(pascal_label)
+
+            # check if file already exists; in property union mode, the
+            # header is rewritten with the properties seen so far
+            exists = os.path.exists(header_path)
+
+            if not exists or self.property_union:
+
+                # concatenate key:value in props
+                props_list = []
+                for k, v in props.items():
+                    if v in ['int', 'long']:
+                        props_list.append(f'{k}:long')
+                    elif v in ['float', 'double', 'dbl']:
+                        props_list.append(f'{k}:double')
+                    elif v in ['bool', 'boolean']:
+                        # TODO Neo4j boolean support / spelling?
+                        props_list.append(f'{k}:boolean')
+                    elif v in ['str[]', 'string[]']:
+                        props_list.append(f'{k}:string[]')
+                    else:
+                        props_list.append(f'{k}')
+
+                # create list of lists and flatten
+                # removes need for empty check of property list
+                if self.property_union:
+                    out_list = [[_id], [':LABEL'], props_list]
+                else:
+                    out_list = [[_id], props_list, [':LABEL']]
+                out_list = [val for sublist in out_list for val in sublist]
+
+                with open(header_path, 'w', encoding='utf-8') as f:
+
+                    # concatenate with delimiter
+                    row = self.delim.join(out_list)
+                    f.write(row)
+
+                # add file path to neo4 admin import statement
+                if not exists:
+                    self.import_call_nodes += (
+                        f'--nodes="{header_path},{parts_path}" '
+                    )
+
+        return True
+
+    def _write_single_node_list_to_file(
+        self,
+        node_list: list,
+        label: str,
+        prop_dict: dict,
+        labels: str,
+        validate: bool = True,
+    ):
+        """
+        This function takes one list of biocypher nodes and writes them
+        to a Neo4j admin import compatible CSV file.
+
+        Args:
+            node_list (list): list of BioCypherNodes to be written
+            label (str): the primary label of the node
+            prop_dict (dict): properties of node class passed from parsing
+                function and their types
+            labels (str): string of one or several concatenated labels
+                for the node class
+            validate (bool): check the types of the nodes; not needed for
+                the output of the translator
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+        if validate and not all(
+            isinstance(n, BioCypherNode) for n in node_list
+        ):
+            logger.error('Nodes must be passed as type BioCypherNode.')
+            return False
+
+        serializer = self._serializers.get(label)
+
+        # compiled once per label and write call
+        if (
+            not isinstance(serializer, _NodeSerializer) or
+            serializer.prop_dict is not prop_dict or
+            serializer.labels != labels
+        ):
+            serializer = _NodeSerializer(
+                prop_dict,
+                labels,
+                self.delim,
+                self.adelim,
+                self.quote,
+                union=self.property_union,
+            )
+            self._serializers[label] = serializer
+
+        return self._write_part(label, serializer, node_list)
+
+    def _write_edge_data(self, edges, batch_size):
+        """
+        Writes biocypher edges to CSV conforming to the headers created
+        with `_write_edge_headers()`, and is actually required to be run
+        before calling `_write_node_headers()` to set the
+        :py:attr:`self.edge_property_dict` for passing the edge
+        properties to the instance. Expects list or generator of edges
+        from the :py:class:`BioCypherEdge` class.
+
+        Args:
+            edges (BioCypherEdge): a list or generator of edges in
+                :py:class:`BioCypherEdge` format
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+
+        Todo:
+            - currently works for mixed edges but in practice often is
+              called on one iterable containing one type of edge only
+        """
+
+        trusted = isinstance(edges, TrustedStream)
+
+        if trusted:
+            edges = edges.gen
+
+        if isinstance(edges, GeneratorType):
+            logger.debug('Writing edge CSV from generator.')
+
+            bins = self._new_bins(batch_size, self._write_edge_bin)
+            bins.trusted = trusted
+
+            for e in edges:
+
+                if not self._add_edge(bins, e):
+                    return False
+
+            # after generator depleted, write remainder of bins
+            return self._flush_edge_bins(bins)
+
+        else:
+            if type(edges) is not list:
+                logger.error('Edges must be passed as list or generator.')
+                return False
+            else:
+
+                def gen(edges):
+                    yield from edges
+
+                return self._write_edge_data(gen(edges), batch_size=batch_size)
+
+    def _add_edge(self, bins: '_Bins', e: BioCypherEdge) -> bool:
+        """
+        Adds one edge to the bin of its label, skipping edges without
+        source or target and duplicates, and writes the bin to a part file
+        once it reaches the batch size.
+
+        Args:
+            bins (_Bins): the bins of the current write call
+
+            e (BioCypherEdge): the edge to add
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        bins.seen = True
+
+        if not bins.trusted and isinstance(e, BioCypherRelAsNode):
+            # shouldn't happen any more
+            logger.error(
+                "Edges cannot be of type 'RelAsNode'. "
+                f'Caused by: {e}',
+            )
+            return False
+
+        if not (e.get_source_id() and e.get_target_id()):
+            logger.error(
+                'Edge must have source and target node. '
+                f'Caused by: {e}',
+            )
+            return True
 
-        self.strict_mode = strict_mode
+        label = e.get_label()
 
-        self.leaves = leaves
-        self.ontology_adapter = ontology_adapter
-        self.translator = translator
-        self.node_property_dict = {}
-        self.edge_property_dict = {}
-        self.import_call_nodes = ''
-        self.import_call_edges = ''
+        if self.edge_dedup_with_id:
+            key = (e.get_source_id(), e.get_target_id(), e.get_id())
+        else:
+            key = (e.get_source_id(), e.get_target_id())
 
-        timestamp = lambda: datetime.now().strftime('%Y%m%d%H%M')
+        # check for duplicates, unless sorted out externally
+        if not self.edge_sorter:
 
-        self.outdir = dirname or os.path.join(_config('outdir'), timestamp())
-        self.outdir = os.path.abspath(self.outdir)
+            with self.stats.timer('dedup', label):
+                new = self.seen_edges[label].add(key)
 
-        logger.info(f'Creating output directory `{self.outdir}`.')
-        os.makedirs(self.outdir, exist_ok=True)
+            if not new:
+                self._duplicate_edge(label, key)
+                return True
 
-        self.seen_node_ids = set()  # set to store the ids of nodes that have
-        # already been written; to avoid duplicates
-        self.duplicate_node_ids = set(
-        )  # set to store the ids of nodes that were
-        # found to have duplicates (avoid overloading the log)
-        self.duplicate_node_types = set(
-        )  # set to store the types of nodes that
-        # have been found to have duplicates
+        # edges sorted out externally are checked once merged, so that
+        # duplicates are not counted as dangling
+        if (
+            self.edge_integrity and not self.edge_sorter and
+            not self._check_endpoints(label, key[:2])
+        ):
 
-        self.seen_edges = {}  # dict to store the set of edges that
-        # have already been written; to avoid duplicates; per edge type
-        self.duplicate_edge_ids = set()  # set to store the ids of edges that
-        # were found to have duplicates (avoid overloading the log)
-        self.duplicate_edge_types = set(
-        )  # set to store the types of edges that
-        # have been found to have duplicates
+            if self.edge_integrity == 'filter':
+                return True
 
-        # TODO not memory efficient, but should be fine for most cases; is
-        # there a more elegant solution?
+        if not label in bins.bins.keys():
+            # start new list
+            bins.append(label, e)
 
-    def write_nodes(self, nodes, batch_size=int(1e6)):
-        """
-        Wrapper for writing nodes and their headers.
+            bins.reference_props[label] = self._edge_reference_props(
+                label,
+                e.get_properties(),
+            )
 
-        Args:
-            nodes (BioCypherNode): a list or generator of nodes in
-                :py:class:`BioCypherNode` format
+        else:
+            # add to list
+            bins.append(label, e)
 
-        Returns:
-            bool: The return value. True for success, False otherwise.
+        # batch size controlled here
+        return self._write_full_bin(bins, label)
+
+    def _duplicate_edge(self, label: str, key: tuple) -> None:
+        """
+        Records a duplicate edge; the joined id string is only built for
+        reporting.
         """
-        # TODO check represented_as
 
-        # write node data
-        passed = self._write_node_data(nodes, batch_size)
-        if not passed:
-            logger.error('Error while writing node data.')
-            return False
-        # pass property data to header writer per node type written
-        passed = self._write_node_headers()
-        if not passed:
-            logger.error('Error while writing node headers.')
-            return False
+        self.duplicate_edge_ids.add('_'.join(k for k in key if k))
 
-        return True
+        if not label in self.duplicate_edge_types:
+            self.duplicate_edge_types.add(label)
+            logger.warning(f'Duplicate edges found in type {label}. ')
 
-    def write_edges(
-        self,
-        edges: Union[list, GeneratorType],
-        batch_size: int = int(1e6),
-    ) -> bool:
+    def _check_endpoints(self, label: str, ids: tuple) -> bool:
         """
-        Wrapper for writing edges and their headers.
+        Checks that the source and target of an edge have been written as
+        nodes; if not, records the edge as dangling.
 
         Args:
-            edges (BioCypherEdge): a list or generator of edges in
-                :py:class:`BioCypherEdge` or :py:class:`BioCypherRelAsNode`
-                format
+            label (str): the label (type) of the edge
+
+            ids (tuple): the source and target IDs
 
         Returns:
-            bool: The return value. True for success, False otherwise.
+            bool: True if both nodes have been written.
         """
-        passed = False
-        # unwrap generator in one step
-        edges = list(edges)  # force evaluation to handle empty generator
-        if edges:
-            z = zip(
-                *(
-                    (
-                        e.get_node(),
-                        [
-                            e.get_source_edge(),
-                            e.get_target_edge(),
-                        ],
-                    ) if isinstance(e, BioCypherRelAsNode) else (None, [e])
-                    for e in edges
-                )
-            )
-            nod, edg = (list(a) for a in z)
-            nod = [n for n in nod if n]
-            edg = [val for sublist in edg for val in sublist]  # flatten
-
-            if nod and edg:
-                passed = self.write_nodes(nod) and self._write_edge_data(
-                    edg,
-                    batch_size,
-                )
-            else:
-                passed = self._write_edge_data(edg, batch_size)
 
-        else:
-            # is this a problem? if the generator or list is empty, we
-            # don't write anything.
-            logger.debug(
-                'No edges to write, possibly due to no matched Biolink classes.',
+        missing = [i for i in ids if i not in self.seen_node_ids]
+
+        if not missing:
+            return True
+
+        if not self.dangling_edge_types[label]:
+            logger.warning(
+                f'Edges of type {label} refer to nodes that have not been '
+                'written.',
             )
-            pass
 
-        if not passed:
-            logger.error('Error while writing edge data.')
-            return False
-        # pass property data to header writer per edge type written
-        passed = self._write_edge_headers()
-        if not passed:
-            logger.error('Error while writing edge headers.')
-            return False
+        self.dangling_edge_types[label] += 1
+        self.dangling_node_ids.update(missing)
 
-        return True
+        return False
 
-    def _write_node_data(self, nodes, batch_size):
+    def _write_edge_bin(self, bins: '_Bins', label: str) -> bool:
         """
-        Writes biocypher nodes to CSV conforming to the headers created
-        with `_write_node_headers()`, and is actually required to be run
-        before calling `_write_node_headers()` to set the
-        :py:attr:`self.node_property_dict` for passing the node properties
-        to the instance. Expects list or generator of nodes from the
-        :py:class:`BioCypherNode` class.
+        Writes the edge bin of a label to a part file and empties it.
+        """
+
+        passed = self._write_single_edge_list_to_file(
+            bins.bins[label],
+            label,
+            bins.reference_props[label],
+            validate=not bins.trusted,
+        )
+
+        bins.clear(label)
+
+        return passed
+
+    def _flush_edge_bins(self, bins: '_Bins') -> bool:
+        """
+        Writes the remainder of the edge bins after the input is depleted
+        and passes the reference properties to the header writer.
 
         Args:
-            nodes (BioCypherNode): a list or generator of nodes in
-                :py:class:`BioCypherNode` format
+            bins (_Bins): the bins of the current write call
 
         Returns:
             bool: The return value. True for success, False otherwise.
         """
 
-        if isinstance(nodes, GeneratorType) or isinstance(nodes, peekable):
-            logger.debug('Writing node CSV from generator.')
+        for label in list(bins.bins.keys()):
+            if not self._write_edge_bin(bins, label):
+                return False
 
-            bins = defaultdict(list)  # dict to store a list for each
-            # label that is passed in
-            bin_l = {}  # dict to store the length of each list for
-            # batching cutoff
-            reference_props = defaultdict(
-                dict,
-            )  # dict to store a dict of properties
-            # for each label to check for consistency and their type
-            # for now, relevant for `int`
-            labels = {}  # dict to store the additional labels for each
-            # primary graph constituent from biolink hierarchy
-            for node in nodes:
-                _id = node.get_id()
-                label = node.get_label()
+        if self.edge_sorter and not self._write_sorted_edges(
+            bins.batch_size,
+        ):
+            return False
 
-                # check for non-id
-                if not _id:
-                    logger.warning(f'Node {label} has no id; skipping.')
-                    continue
+        if not self._wait_for_parts():
+            return False
 
-                # check if node has already been written, if so skip
-                if _id in self.seen_node_ids:
-                    self.duplicate_node_ids.add(_id)
-                    if not label in self.duplicate_node_types:
-                        self.duplicate_node_types.add(label)
-                        logger.warning(
-                            f'Duplicate nodes found in type {label}. '
-                        )
-                    continue
+        # use complete bin list to write header files
+        # TODO if a edge type has varying properties
+        # (ie missingness), we'd need to collect all possible
+        # properties in the generator pass
 
-                if not label in bins.keys():
-                    # start new list
-                    all_labels = None
-                    bins[label].append(node)
-                    bin_l[label] = 1
+        # save first-edge properties to instance attribute
+        for label in bins.reference_props.keys():
+            self.edge_property_dict[label] = bins.reference_props[label]
 
-                    # get properties from config if present
-                    cprops = self.ontology_adapter.leaves.get(label).get(
-                        'properties',
-                    )
-                    if cprops:
-                        d = dict(cprops)
+        return True
 
-                        # add id and preferred id to properties; these are
-                        # created in node creation (`_create.BioCypherNode`)
-                        d['id'] = 'str'
-                        d['preferred_id'] = 'str'
+    def _write_sorted_edges(self, batch_size: int) -> bool:
+        """
+        Merges the sorted runs of the external edge de-duplication and
+        writes the first occurrence of each edge to part files, in batches
+        per label (and shard).
 
-                        # add strict mode properties
-                        if self.strict_mode:
-                            d['source'] = 'str'
-                            d['version'] = 'str'
-                            d['licence'] = 'str'
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
 
-                    else:
-                        d = dict(node.get_properties())
-                        # encode property type
-                        for k, v in d.items():
-                            if d[k] is not None:
-                                d[k] = type(v).__name__
-                    # else use first encountered node to define properties for
-                    # checking; could later be by checking all nodes but much
-                    # more complicated, particularly involving batch writing
-                    # (would require "do-overs"). for now, we output a warning
-                    # if node properties diverge from reference properties (in
-                    # write_single_node_list_to_file) TODO if it occurs, ask
-                    # user to select desired properties and restart the process
-
-                    reference_props[label] = d
-
-                    # get label hierarchy
-                    # multiple labels:
-                    all_labels = self.ontology_adapter.get_node_ancestry(label)
-
-                    if all_labels:
-                        # convert to pascal case
-                        all_labels = [
-                            self.translator.name_sentence_to_pascal(label)
-                            for label in all_labels
-                        ]
-                        # remove duplicates
-                        all_labels = list(OrderedDict.fromkeys(all_labels))
-                        # order alphabetically
-                        all_labels.sort()
-                        # concatenate with array delimiter
-                        all_labels = self.adelim.join(all_labels)
-                    else:
-                        all_labels = self.translator.name_sentence_to_pascal(
-                            label
-                        )
+        batches = defaultdict(list)
 
-                    labels[label] = all_labels
+        def write(label, shard) -> bool:
 
-                else:
-                    # add to list
-                    bins[label].append(node)
-                    bin_l[label] += 1
-                    if not bin_l[label] < batch_size:
-                        # batch size controlled here
-                        passed = self._write_single_node_list_to_file(
-                            bins[label],
-                            label,
-                            reference_props[label],
-                            labels[label],
-                        )
-
-                        if not passed:
-                            return False
-
-                        bins[label] = []
-                        bin_l[label] = 0
-
-                self.seen_node_ids.add(_id)
+            batch = batches.pop((label, shard))
+            lines = [line for _, line in batch]
 
-            # after generator depleted, write remainder of bins
-            for label, nl in bins.items():
-                passed = self._write_single_node_list_to_file(
-                    nl,
+            if self.delta:
+                lines = self._delta_lines(
                     label,
-                    reference_props[label],
-                    labels[label],
+                    (key for key, _ in batch),
+                    lines,
+                    kind='edges',
                 )
 
-                if not passed:
-                    return False
+            return self._write_next_part(label, lines, shard)
 
-            # use complete bin list to write header files
-            # TODO if a node type has varying properties
-            # (ie missingness), we'd need to collect all possible
-            # properties in the generator pass
+        passed = True
 
-            # save config or first-node properties to instance attribute
-            for label in reference_props.keys():
-                self.node_property_dict[label] = reference_props[label]
+        for label, key, line, first in self.edge_sorter.merge():
 
-            return True
-        else:
-            if type(nodes) is not list:
-                logger.error('Nodes must be passed as list or generator.')
-                return False
-            else:
+            if not first:
+                self._duplicate_edge(label, key)
+                continue
 
-                def gen(nodes):
-                    yield from nodes
+            if (
+                self.edge_integrity and
+                not self._check_endpoints(label, key[:2]) and
+                self.edge_integrity == 'filter'
+            ):
+                continue
 
-                return self._write_node_data(gen(nodes), batch_size=batch_size)
+            shard = self._shard_of(key[0]) if self.n_shards else None
+            batches[(label, shard)].append((key, line))
 
-    def _write_node_headers(self):
+            if len(batches[(label, shard)]) >= batch_size:
+                # the merge is completed also after an error
+                passed = passed and write(label, shard)
+
+        for label, shard in list(batches):
+            passed = passed and write(label, shard)
+
+        if not self.checkpoint_interval:
+            self.edge_sorter.prune()
+
+        return passed
+
+    def _write_edge_headers(self):
         """
         Writes single CSV file for a graph entity that is represented
-        as a node as per the definition in the `schema_config.yaml`,
-        containing only the header for this type of node.
+        as an edge as per the definition in the `schema_config.yaml`,
+        containing only the header for this type of edge.
 
         Returns:
             bool: The return value. True for success, False otherwise.
         """
         # load headers from data parse
-        if not self.node_property_dict:
+        if not self.edge_property_dict:
             logger.error(
                 'Header information not found. Was the data parsed first?',
             )
             return False
 
-        for label, props in self.node_property_dict.items():
-            # create header CSV with ID, properties, labels
-
-            _id = ':ID'
-
-            # to programmatically define properties to be written, the
-            # data would have to be parsed before writing the header.
-            # alternatively, desired properties can also be provided
-            # via the schema_config.yaml.
+        for label, props in self.edge_property_dict.items():
+            # create header CSV with :START_ID, (optional) properties,
+            # :END_ID, :TYPE
 
             # translate label to PascalCase
             pascal_label = self.translator.name_sentence_to_pascal(label)
 
+            # paths
             header_path = os.path.join(
                 self.outdir,
                 f'{pascal_label}-header.csv',
             )
-            parts_path = os.path.join(self.outdir, f'{pascal_label}-part.*')
+            parts_path = self._get_parts_pattern(pascal_label)
 
-            # check if file already exists
-            if not os.path.exists(header_path):
+            # check for file exists; in property union mode, the header
+            # is rewritten with the properties seen so far
+            exists = os.path.exists(header_path)
+
+            if not exists or self.property_union:
 
                 # concatenate key:value in props
                 props_list = []
                 for k, v in props.items():
                     if v in ['int', 'long']:
                         props_list.append(f'{k}:long')
-                    elif v in ['float', 'double', 'dbl']:
+                    elif v in ['float', 'double']:
                         props_list.append(f'{k}:double')
-                    elif v in ['bool', 'boolean']:
-                        # TODO Neo4j boolean support / spelling?
+                    elif v in [
+                        'bool',
+                        'boolean',
+                    ]:  # TODO does Neo4j support bool?
                         props_list.append(f'{k}:boolean')
-                    elif v in ['str[]', 'string[]']:
-                        props_list.append(f'{k}:string[]')
                     else:
                         props_list.append(f'{k}')
 
                 # create list of lists and flatten
                 # removes need for empty check of property list
-                out_list = [[_id], props_list, [':LABEL']]
+                if self.property_union:
+                    out_list = [[':START_ID', ':END_ID', ':TYPE'], props_list]
+                else:
+                    out_list = [
+                        [':START_ID'],
+                        props_list,
+                        [':END_ID'],
+                        [':TYPE'],
+                    ]
                 out_list = [val for sublist in out_list for val in sublist]
 
                 with open(header_path, 'w', encoding='utf-8') as f:
@@ -525,495 +2940,431 @@ class BatchWriter:
                     f.write(row)
 
                 # add file path to neo4 admin import statement
-                self.import_call_nodes += (
-                    f'--nodes="{header_path},{parts_path}" '
-                )
+                if not exists:
+                    self.import_call_edges += (
+                        f'--relationships="{header_path},{parts_path}" '
+                    )
 
         return True
 
-    def _write_single_node_list_to_file(
+    def _write_single_edge_list_to_file(
         self,
-        node_list: list,
+        edge_list: list,
         label: str,
         prop_dict: dict,
-        labels: str,
+        validate: bool = True,
     ):
         """
-        This function takes one list of biocypher nodes and writes them
+        This function takes one list of biocypher edges and writes them
         to a Neo4j admin import compatible CSV file.
 
         Args:
-            node_list (list): list of BioCypherNodes to be written
-            label (str): the primary label of the node
+            edge_list (list): list of BioCypherEdges to be written
+
+            label (str): the label (type) of the edge
+
             prop_dict (dict): properties of node class passed from parsing
                 function and their types
-            labels (str): string of one or several concatenated labels
-                for the node class
+
+            validate (bool): check the types of the edges; not needed for
+                the output of the translator
 
         Returns:
             bool: The return value. True for success, False otherwise.
         """
-        if not all(isinstance(n, BioCypherNode) for n in node_list):
-            logger.error('Nodes must be passed as type BioCypherNode.')
+
+        if validate and not all(
+            isinstance(n, BioCypherEdge) for n in edge_list
+        ):
+
+            logger.error('Edges must be passed as type BioCypherEdge.')
             return False
 
-        # from list of nodes to list of strings
-        lines = []
+        serializer = self._serializers.get(label)
+
+        # compiled once per label and write call
+        if (
+            not isinstance(serializer, _EdgeSerializer) or
+            serializer.prop_dict is not prop_dict
+        ):
+            serializer = _EdgeSerializer(
+                prop_dict,
+                self.translator.name_sentence_to_pascal(label),
+                self.delim,
+                self.adelim,
+                self.quote,
+                union=self.property_union,
+            )
+            self._serializers[label] = serializer
 
-        for n in node_list:
+        return self._write_part(label, serializer, edge_list)
 
-            # check for deviations in properties
-            # node properties
-            n_props = n.get_properties()
-            n_keys = list(n_props.keys())
-            # reference properties
-            ref_props = list(prop_dict.keys())
-
-            # compare lists order invariant
-            if not set(ref_props) == set(n_keys):
-                onode = n.get_id()
-                oprop1 = set(ref_props).difference(n_keys)
-                oprop2 = set(n_keys).difference(ref_props)
-                logger.error(
-                    f'At least one node of the class {n.get_label()} '
-                    f'has more or fewer properties than another. '
-                    f'Offending node: {onode!r}, offending property: '
-                    f'{max([oprop1, oprop2])}. '
-                    f'All reference properties: {ref_props}, '
-                    f'All node properties: {n_keys}.',
-                )
-                return False
+    def _write_part(
+        self,
+        label: str,
+        serializer: _RowSerializer,
+        entities: list,
+        shard: Optional[int] = None,
+    ) -> bool:
+        """
+        Converts one batch of nodes or edges to CSV lines and writes them to
+        the next part file of the label, either directly or, in parallel
+        mode, by handing the batch to the worker pool. The part number is
+        always assigned here, in order of submission. If sharded, the batch
+        is split into one part per shard.
 
-            line = [n.get_id()]
+        Args:
+            label (str): the label (type) of the batch
 
-            if ref_props:
+            serializer (_RowSerializer): the row serializer of the label
 
-                plist = []
-                # make all into strings, put actual strings in quotes
-                for k, v in prop_dict.items():
-                    p = n_props.get(k)
-                    if p is None:  # TODO make field empty instead of ""?
-                        plist.append('')
-                    elif v in [
-                        'int',
-                        'long',
-                        'float',
-                        'double',
-                        'dbl',
-                        'bool',
-                        'boolean',
-                    ]:
-                        plist.append(str(p))
-                    else:
-                        if isinstance(p, list):
-                            plist.append(
-                                self.quote + self.adelim.join(p) + self.quote
-                            )
-                        else:
-                            plist.append(self.quote + str(p) + self.quote)
+            entities (list): the nodes or edges to be written
 
-                line.append(self.delim.join(plist))
-            line.append(labels)
+            shard (int): the shard of the entities, if sharded
 
-            lines.append(self.delim.join(line) + '\n')
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
 
         # avoid writing empty files
-        if lines:
-            self._write_next_part(label, lines)
+        if not entities:
+            return True
 
-        return True
+        if self.property_union:
+            # before the batch may be sent to a worker
+            serializer.extend(entities)
 
-    def _write_edge_data(self, edges, batch_size):
-        """
-        Writes biocypher edges to CSV conforming to the headers created
-        with `_write_edge_headers()`, and is actually required to be run
-        before calling `_write_node_headers()` to set the
-        :py:attr:`self.edge_property_dict` for passing the edge
-        properties to the instance. Expects list or generator of edges
-        from the :py:class:`BioCypherEdge` class.
+        if self.edge_sorter and isinstance(serializer, _EdgeSerializer):
 
-        Args:
-            edges (BioCypherEdge): a list or generator of edges in
-                :py:class:`BioCypherEdge` format
+            try:
+                with self.stats.timer('serialization', label):
+                    lines = serializer(entities)
 
-        Returns:
-            bool: The return value. True for success, False otherwise.
+            except ValueError as e:
+                logger.error(str(e))
+                return False
 
-        Todo:
-            - currently works for mixed edges but in practice often is
-              called on one iterable containing one type of edge only
-        """
+            # de-duplicated and written when the sorted runs are merged
+            self.edge_sorter.add(label, map(self._entity_key, entities), lines)
 
-        if isinstance(edges, GeneratorType):
-            logger.debug('Writing edge CSV from generator.')
+            return True
 
-            bins = defaultdict(list)  # dict to store a list for each
-            # label that is passed in
-            bin_l = {}  # dict to store the length of each list for
-            # batching cutoff
-            reference_props = defaultdict(
-                dict,
-            )  # dict to store a dict of properties
-            # for each label to check for consistency and their type
-            # for now, relevant for `int`
-            for e in edges:
-                if isinstance(e, BioCypherRelAsNode):
-                    # shouldn't happen any more
-                    logger.error(
-                        "Edges cannot be of type 'RelAsNode'. "
-                        f'Caused by: {e}',
-                    )
+        if self.n_shards and shard is None:
+
+            for shard, group in self._shards(entities).items():
+                if not self._write_part(label, serializer, group, shard):
                     return False
 
-                if not (e.get_source_id() and e.get_target_id()):
-                    logger.error(
-                        'Edge must have source and target node. '
-                        f'Caused by: {e}',
-                    )
-                    continue
+            return True
 
-                label = e.get_label()
+        pool = self._get_part_pool()
 
-                if not label in self.seen_edges.keys():
-                    self.seen_edges[label] = set()
+        if not pool:
 
-                src_tar_id = '_'.join([e.get_source_id(), e.get_target_id()])
+            try:
+                with self.stats.timer('serialization', label):
+                    lines = serializer(entities)
 
-                # check for duplicates
-                if src_tar_id in self.seen_edges.get(label, set()):
-                    self.duplicate_edge_ids.add(src_tar_id)
-                    if not label in self.duplicate_edge_types:
-                        self.duplicate_edge_types.add(label)
-                        logger.warning(
-                            f'Duplicate edges found in type {label}. '
-                        )
-                    continue
+            except ValueError as e:
+                logger.error(str(e))
+                return False
 
-                else:
-                    self.seen_edges[label].add(src_tar_id)
-
-                if not label in bins.keys():
-                    # start new list
-                    bins[label].append(e)
-                    bin_l[label] = 1
-
-                    # get properties from config if present
-
-                    # check whether label is in ontology_adapter.leaves
-                    # (may not be if it is an edge that carries the
-                    # "label_as_edge" property)
-                    cprops = None
-                    if label in self.ontology_adapter.leaves:
-                        cprops = self.ontology_adapter.leaves.get(label).get(
-                            'properties',
-                        )
-                    else:
-                        # try via "label_as_edge"
-                        for k, v in self.ontology_adapter.leaves.items():
-                            if isinstance(v, dict):
-                                if v.get('label_as_edge') == label:
-                                    cprops = v.get('properties')
-                                    break
-                    if cprops:
-                        d = cprops
-
-                        # add strict mode properties
-                        if self.strict_mode:
-                            d['source'] = 'str'
-                            d['version'] = 'str'
-                            d['licence'] = 'str'
+            if self.delta:
+                lines = self._delta_lines(
+                    label,
+                    map(self._entity_key, entities),
+                    lines,
+                )
 
-                    else:
-                        d = dict(e.get_properties())
-                        # encode property type
-                        for k, v in d.items():
-                            if d[k] is not None:
-                                d[k] = type(v).__name__
-                    # else use first encountered edge to define
-                    # properties for checking; could later be by
-                    # checking all edges but much more complicated,
-                    # particularly involving batch writing (would
-                    # require "do-overs"). for now, we output a warning
-                    # if edge properties diverge from reference
-                    # properties (in write_single_edge_list_to_file)
-                    # TODO
-
-                    reference_props[label] = d
+            return self._write_next_part(label, lines, shard)
 
-                else:
-                    # add to list
-                    bins[label].append(e)
-                    bin_l[label] += 1
-                    if not bin_l[label] < batch_size:
-                        # batch size controlled here
-                        passed = self._write_single_edge_list_to_file(
-                            bins[label],
-                            label,
-                            reference_props[label],
-                        )
-
-                        if not passed:
-                            return False
-
-                        bins[label] = []
-                        bin_l[label] = 0
+        file_path = self._get_next_part_path(label, shard)
+        logger.info(
+            f'Writing {len(entities)} entries to '
+            f'{os.path.basename(file_path)}',
+        )
+        # serialized by the worker; the bytes are not known here
+        self.stats.count(label, len(entities))
+
+        with self.stats.timer('write', label):
+            return pool.submit(
+                _serialize_and_write,
+                file_path,
+                self.compression,
+                self.compression_level,
+                serializer.snapshot(),
+                entities,
+            )
+
+    def _shard_of(self, key: str) -> int:
+        """
+        Returns the shard of a node ID or edge source ID.
+        """
+
+        return fingerprint(key) % self.n_shards
+
+    def _shards(self, entities: list) -> dict:
+        """
+        Splits a batch of nodes by their IDs, or of edges by their source
+        IDs, into shards.
 
-            # after generator depleted, write remainder of bins
-            for label, nl in bins.items():
+        Returns:
+            dict: the entities by shard, in order of the shards
+        """
 
-                passed = self._write_single_edge_list_to_file(
-                    nl,
-                    label,
-                    reference_props[label],
-                )
+        shards = defaultdict(list)
 
-                if not passed:
-                    return False
+        for e in entities:
 
-            # use complete bin list to write header files
-            # TODO if a edge type has varying properties
-            # (ie missingness), we'd need to collect all possible
-            # properties in the generator pass
+            key = (
+                e.get_id()
+                if isinstance(e, BioCypherNode) else e.get_source_id()
+            )
+            shards[self._shard_of(key)].append(e)
 
-            # save first-edge properties to instance attribute
-            for label in reference_props.keys():
-                self.edge_property_dict[label] = reference_props[label]
+        return dict(sorted(shards.items()))
 
-            return True
-        else:
-            if type(edges) is not list:
-                logger.error('Edges must be passed as list or generator.')
-                return False
-            else:
+    def _frame_shards(self, frame, column: str):
+        """
+        Splits a batch of a node or edge table into shards by the IDs in
+        a column.
 
-                def gen(edges):
-                    yield from edges
+        Returns:
+            Tuples of shard and data frame, in order of the shards.
+        """
 
-                return self._write_edge_data(gen(edges), batch_size=batch_size)
+        return frame.groupby(frame[column].map(self._shard_of).values)
 
-    def _write_edge_headers(self):
+    def _part_prefix(self, label: str, shard: Optional[int] = None) -> str:
+        """
+        Returns the start of the names of the part files of a label (in
+        PascalCase) and shard.
         """
-        Writes single CSV file for a graph entity that is represented
-        as an edge as per the definition in the `schema_config.yaml`,
-        containing only the header for this type of edge.
 
-        Returns:
-            bool: The return value. True for success, False otherwise.
+        return label if shard is None else f'{label}-shard{shard:03}'
+
+    def _entity_key(self, entity: Union[BioCypherNode, BioCypherEdge]):
         """
-        # load headers from data parse
-        if not self.edge_property_dict:
-            logger.error(
-                'Header information not found. Was the data parsed first?',
+        Returns the key of a node (its ID) or an edge (source and target,
+        and the relationship ID if edges are distinguished by it) in the
+        delta index.
+        """
+
+        if isinstance(entity, BioCypherNode):
+            return entity.get_id()
+
+        if self.edge_dedup_with_id:
+            return (
+                entity.get_source_id(),
+                entity.get_target_id(),
+                entity.get_id(),
             )
-            return False
 
-        for label, props in self.edge_property_dict.items():
-            # create header CSV with :START_ID, (optional) properties,
-            # :END_ID, :TYPE
+        return (entity.get_source_id(), entity.get_target_id())
 
-            # translate label to PascalCase
-            pascal_label = self.translator.name_sentence_to_pascal(label)
+    def _delta_lines(
+        self,
+        label: str,
+        keys,
+        lines: list,
+        kind: Optional[str] = None,
+    ) -> list:
+        """
+        Returns the lines of entities added or changed since the previous
+        build, recording their hashes in the delta index.
 
-            # paths
-            header_path = os.path.join(
-                self.outdir,
-                f'{pascal_label}-header.csv',
-            )
-            parts_path = os.path.join(self.outdir, f'{pascal_label}-part.*')
+        Args:
+            label (str): the label of the entities
 
-            # check for file exists
-            if not os.path.exists(header_path):
+            keys (iterable): the keys of the entities, in order of the
+                lines
 
-                # concatenate key:value in props
-                props_list = []
-                for k, v in props.items():
-                    if v in ['int', 'long']:
-                        props_list.append(f'{k}:long')
-                    elif v in ['float', 'double']:
-                        props_list.append(f'{k}:double')
-                    elif v in [
-                        'bool',
-                        'boolean',
-                    ]:  # TODO does Neo4j support bool?
-                        props_list.append(f'{k}:boolean')
-                    else:
-                        props_list.append(f'{k}')
+            lines (list): the CSV lines
 
-                # create list of lists and flatten
-                # removes need for empty check of property list
-                out_list = [[':START_ID'], props_list, [':END_ID'], [':TYPE']]
-                out_list = [val for sublist in out_list for val in sublist]
+            kind (str): `'nodes'` or `'edges'`; by default, edges if the
+                keys are tuples
 
-                with open(header_path, 'w', encoding='utf-8') as f:
+        Returns:
+            list: the lines to be written
+        """
 
-                    # concatenate with delimiter
-                    row = self.delim.join(out_list)
-                    f.write(row)
+        out = []
 
-                # add file path to neo4 admin import statement
-                self.import_call_edges += (
-                    f'--relationships="{header_path},{parts_path}" '
-                )
+        for key, line in zip(keys, lines):
 
-        return True
+            if kind is None:
+                kind = 'edges' if isinstance(key, tuple) else 'nodes'
 
-    def _write_single_edge_list_to_file(
+            if self.delta.changed(kind, label, key, line):
+                out.append(line)
+
+        return out
+
+    def _write_next_part(
         self,
-        edge_list: list,
         label: str,
-        prop_dict: dict,
+        lines: list,
+        shard: Optional[int] = None,
     ):
         """
-        This function takes one list of biocypher edges and writes them
-        to a Neo4j admin import compatible CSV file.
+        This function writes a list of strings to a new part file.
 
         Args:
-            edge_list (list): list of BioCypherEdges to be written
+            label (str): the label (type) of the edge; internal
+            representation sentence case -> needs to become PascalCase
+            for disk representation
 
-            label (str): the label (type) of the edge
+            lines (list): list of strings to be written
 
-            prop_dict (dict): properties of node class passed from parsing
-                function and their types
+            shard (int): the shard of the lines, if sharded
 
         Returns:
             bool: The return value. True for success, False otherwise.
         """
+        if not lines:
+            # eg, no changes in delta mode
+            return True
 
-        if not all(isinstance(n, BioCypherEdge) for n in edge_list):
+        file_path = self._get_next_part_path(label, shard)
 
-            logger.error('Edges must be passed as type BioCypherEdge.')
-            return False
+        # write to file
+        logger.info(
+            f'Writing {len(lines)} entries to {os.path.basename(file_path)}',
+        )
 
-        # from list of edges to list of strings
-        lines = []
-        for e in edge_list:
-            # check for deviations in properties
-            # edge properties
-            e_props = e.get_properties()
-            e_keys = list(e_props.keys())
-            ref_props = list(prop_dict.keys())
+        args = (file_path, lines, self.compression, self.compression_level)
 
-            # compare list order invariant
-            if not set(ref_props) == set(e_keys):
-                oedge = f'{e.get_source_id()}-{e.get_target_id()}'
-                oprop1 = set(ref_props).difference(e_keys)
-                oprop2 = set(e_keys).difference(ref_props)
-                logger.error(
-                    f'At least one edge of the class {e.get_label()} '
-                    f'has more or fewer properties than another. '
-                    f'Offending edge: {oedge!r}, offending property: '
-                    f'{max([oprop1, oprop2])}. '
-                    f'All reference properties: {ref_props}, '
-                    f'All edge properties: {e_keys}.',
-                )
-                return False
+        if self.stats.enabled:
+            self.stats.count(label, len(lines), sum(map(len, lines)))
 
-            if ref_props:
+        pool = self._get_writer_pool()
 
-                plist = []
-                # make all into strings, put actual strings in quotes
-                for k, v in prop_dict.items():
-                    p = e_props.get(k)
-                    if p is None:  # TODO make field empty instead of ""?
-                        plist.append('')
-                    elif v in [
-                        'int',
-                        'long',
-                        'float',
-                        'double',
-                        'dbl',
-                        'bool',
-                        'boolean',
-                    ]:
-                        plist.append(str(p))
-                    else:
-                        if isinstance(p, list):
-                            plist.append(
-                                self.quote + self.adelim.join(p) + self.quote
-                            )
-                        elif '**' in p:
-                            plist.append(
-                                self.quote + p.replace('**', self.adelim) +
-                                self.quote
-                            )
-                        else:
-                            plist.append(self.quote + str(p) + self.quote)
-
-                lines.append(
-                    self.delim.join(
-                        [
-                            e.get_source_id(),
-                            # here we need a list of properties in
-                            # the same order as in the header
-                            self.delim.join(plist),
-                            e.get_target_id(),
-                            self.translator.
-                            name_sentence_to_pascal(e.get_label(), ),
-                        ],
-                    ) + '\n',
-                )
-            else:
-                lines.append(
-                    self.delim.join(
-                        [
-                            e.get_source_id(),
-                            e.get_target_id(),
-                            self.translator.
-                            name_sentence_to_pascal(e.get_label(), ),
-                        ],
-                    ) + '\n',
-                )
+        with self.stats.timer('write', label):
 
-        # avoid writing empty files
-        if lines:
-            self._write_next_part(label, lines)
+            if pool:
+                return pool.submit(_write_lines, *args)
+
+            _write_lines(*args)
 
         return True
 
-    def _write_next_part(self, label: str, lines: list):
+    def _get_next_part_path(
+        self,
+        label: str,
+        shard: Optional[int] = None,
+    ) -> str:
         """
-        This function writes a list of strings to a new part file.
+        Returns the path of the next part file of a label.
 
         Args:
-            label (str): the label (type) of the edge; internal
+            label (str): the label (type) of the node or edge; internal
             representation sentence case -> needs to become PascalCase
             for disk representation
 
-            lines (list): list of strings to be written
+            shard (int): the shard, if sharded; each shard has its own
+                part numbers
 
         Returns:
-            bool: The return value. True for success, False otherwise.
+            str: the path of the part file
         """
         # translate label to PascalCase
-        label = self.translator.name_sentence_to_pascal(label)
-
-        # list files in self.outdir
-        files = glob.glob(os.path.join(self.outdir, f'{label}-part*.csv'))
-        # find file with highest part number
-        if files:
-            next_part = (
-                max(
-                    [
-                        int(
-                            f.split('.')[-2].split('-')[-1].replace('part', '')
-                        ) for f in files
-                    ],
-                ) + 1
-            )
-        else:
-            next_part = 0
+        label = self._part_prefix(
+            self.translator.name_sentence_to_pascal(label),
+            shard,
+        )
+
+        next_part = self._part_counters.get(label)
+
+        if next_part is None:
+            next_part = self._find_next_part(label)
+
+        self._part_counters[label] = next_part + 1
 
-        # write to file
         padded_part = str(next_part).zfill(3)
-        logger.info(
-            f'Writing {len(lines)} entries to {label}-part{padded_part}.csv',
+
+        return os.path.join(
+            self.outdir,
+            f'{label}-part{padded_part}{_PART_SUFFIXES[self.compression]}',
         )
-        file_path = os.path.join(self.outdir, f'{label}-part{padded_part}.csv')
 
-        with open(file_path, 'w', encoding='utf-8') as f:
+    def _get_parts_pattern(self, label: str) -> str:
+        """
+        Returns the regular expression matching the part files of a label in
+        the import call.
+
+        Args:
+            label (str): the label in PascalCase
+
+        Returns:
+            str: the path pattern
+        """
+
+        parts = f'{label}-shard.*' if self.n_shards else f'{label}-part.*'
+
+        if not self.compression:
+            return os.path.join(self.outdir, parts)
+
+        suffix = _PART_SUFFIXES[self.compression]
+
+        return os.path.join(self.outdir, f'{parts}{suffix}')
+
+    def _find_next_part(self, label: str) -> int:
+        """
+        Finds the next part number of a label from the part files already
+        in the output directory. Only called on the first part of a label;
+        later numbers are counted in memory.
+
+        Args:
+            label (str): the label in PascalCase
+
+        Returns:
+            int: the part number following the highest existing one, or 0
+        """
+
+        parts = self._list_parts(label)
+
+        return max(parts) + 1 if parts else 0
+
+    def _label_parts(self, label: str) -> list:
+        """
+        Returns the paths of the part files of a label (in PascalCase) in
+        the output directory, of all shards.
+        """
+
+        shards = range(self.n_shards) if self.n_shards else [None]
+
+        return [
+            path for shard in shards for path in
+            self._list_parts(self._part_prefix(label, shard)).values()
+        ]
+
+    def _list_parts(self, label: str) -> dict:
+        """
+        Returns the part files of a label in the output directory.
+
+        Args:
+            label (str): the label in PascalCase
+
+        Returns:
+            dict: the paths of the part files by part number, in order
+        """
+
+        files = glob.glob(os.path.join(self.outdir, f'{label}-part*.csv*'))
+
+        # the glob also matches other labels starting with this one; parts
+        # of all compression codecs share the numbering
+        pattern = re.compile(
+            rf'{re.escape(label)}-part(\d+)\.csv(\.gz|\.zst)?',
+        )
+        parts = {
+            int(m.group(1)): f
+            for f, m in (
+                (f, pattern.fullmatch(os.path.basename(f))) for f in files
+            )
+            if m
+        }
 
-            # concatenate with delimiter
-            f.writelines(lines)
+        return dict(sorted(parts.items()))
 
     def get_import_call(self) -> str:
         """
@@ -1037,6 +3388,18 @@ class BatchWriter:
             bool: The return value. True for success, False otherwise.
         """
 
+        # the build is complete, release the worker and writer threads
+        for attr in ('_part_pool', '_writer_pool'):
+            if getattr(self, attr):
+                getattr(self, attr).shutdown()
+                setattr(self, attr, None)
+
+        if self.edge_sorter:
+            self.edge_sorter.close()
+
+        for index in self._disk_indices():
+            index.close()
+
         file_path = os.path.join(self.outdir, 'neo4j-admin-import-call.sh')
         logger.info(f'Writing neo4j-admin import call to `{file_path}`.')
 
@@ -1044,8 +3407,199 @@ class BatchWriter:
 
             f.write(self._construct_import_call())
 
+        if self.delta:
+            return self._write_delta_script()
+
+        return True
+
+    def _write_removed(self, kind: str) -> dict:
+        """
+        Writes the keys of the nodes or edges removed since the previous
+        build to one `<Label>-removed.csv` file per label.
+
+        Returns:
+            dict: the file names by label
+        """
+
+        files = {}
+
+        for label, keys in self.delta.removed(kind).items():
+
+            pascal_label = self.translator.name_sentence_to_pascal(label)
+            file_name = f'{pascal_label}-removed.csv'
+
+            logger.info(f'Writing {len(keys)} removed {kind} to {file_name}.')
+
+            _write_lines(
+                os.path.join(self.outdir, file_name),
+                [
+                    (self.delim.join(k) if isinstance(k, tuple) else k) +
+                    '\n' for k in keys
+                ],
+            )
+
+            files[label] = file_name
+
+        return files
+
+    def _write_delta_script(self) -> bool:
+        """
+        Writes the Cypher script applying the delta to the previous build:
+        it deletes removed edges and nodes, and merges the nodes and edges
+        of the part files by their IDs, overwriting their properties.
+        Saves the delta index of this build.
+
+        Returns:
+            bool: The return value. True for success, False otherwise.
+        """
+
+        if self.compression == 'zstd':
+            logger.warning('LOAD CSV cannot read zstd compressed parts.')
+
+        load = (
+            'USING PERIODIC COMMIT 10000\n'
+            "LOAD CSV FROM 'file:///{}' AS row "
+            f'FIELDTERMINATOR {cypher_str(self.delim)}\n'
+        )
+
+        def pascal(label):
+
+            return self.translator.name_sentence_to_pascal(label)
+
+        def props(var, prop_dict, first):
+
+            return [
+                f'{var}.`{k}` = ' + cypher_value(
+                    f'row[{i}]',
+                    t,
+                    self.adelim,
+                    self.quote,
+                ) for i, (k, t) in enumerate(prop_dict.items(), first)
+            ]
+
+        def ends(label):
+
+            return tuple(
+                f':`{l}`' if (l := self._endpoint_label(label, end)) else ''
+                for end in ('source', 'target')
+            )
+
+        queries = []
+
+        for label, file_name in self._write_removed('edges').items():
+
+            s, t = ends(label)
+            query = load.format(file_name) + (
+                f'MATCH ({s} {{id: row[0]}})-[r:`{pascal(label)}`]->'
+                f'({t} {{id: row[1]}})\nDELETE r;\n'
+            )
+            queries.append(query)
+
+        for label, file_name in self._write_removed('nodes').items():
+
+            query = load.format(file_name) + (
+                f'MATCH (n:`{pascal(label)}` {{id: row[0]}})\n'
+                'DETACH DELETE n;\n'
+            )
+            queries.append(query)
+
+        for label, prop_dict in self.node_property_dict.items():
+
+            labels = ''.join(
+                f':`{l}`' for l in self._node_labels(label).split(self.adelim)
+            )
+            # in property union mode, the labels follow the ID
+            first = 2 if self.property_union else 1
+            sets = [f'n{labels}'] + props('n', prop_dict, first)
+
+            for path in self._label_parts(pascal(label)):
+
+                query = load.format(os.path.basename(path)) + (
+                    f'MERGE (n:`{pascal(label)}` {{id: row[0]}})\n'
+                    f'SET {", ".join(sets)};\n'
+                )
+                queries.append(query)
+
+        for label, prop_dict in self.edge_property_dict.items():
+
+            if self.property_union:
+                sets = props('r', prop_dict, 3)
+                end = 1
+            else:
+                sets = props('r', prop_dict, 1)
+                end = len(prop_dict) + 1
+
+            s, t = ends(label)
+
+            for path in self._label_parts(pascal(label)):
+
+                query = load.format(os.path.basename(path)) + (
+                    f'MATCH (s{s} {{id: row[0]}}), '
+                    f'(t{t} {{id: row[{end}]}})\n'
+                    f'MERGE (s)-[r:`{pascal(label)}`]->(t)'
+                    + (f'\nSET {", ".join(sets)}' if sets else '') + ';\n'
+                )
+                queries.append(query)
+
+        file_path = os.path.join(self.outdir, 'delta-import.cypher')
+        logger.info(f'Writing delta import script to `{file_path}`.')
+
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(queries))
+
+        self.delta.save()
+
         return True
 
+    def _endpoint_label(self, label: str, end: str) -> Optional[str]:
+        """
+        Returns a label of the source or target nodes of an edge type, so
+        that the delta script looks them up by index rather than scanning
+        all nodes: the class given as `source` or `target` in the schema
+        configuration, the most specific class shared by several given
+        classes or, if none are given, by all node types written (eg, the
+        ontology root).
+
+        Args:
+            label (str): the label (type) of the edge
+
+            end (str): `'source'` or `'target'`
+
+        Returns:
+            str: the label in PascalCase, None if there is none
+        """
+
+        leaf = next(
+            (
+                v for k, v in self.leaves.items()
+                if k == label or v.get('label_as_edge') == label
+            ),
+            {},
+        )
+        classes = leaf.get(end) or list(self.node_property_dict)
+
+        if isinstance(classes, str):
+            classes = [classes]
+
+        common = None
+
+        for c in classes:
+
+            ancestry = self.ontology_adapter.get_node_ancestry(c) or [c]
+            common = (
+                ancestry if common is None else
+                [a for a in common if a in ancestry]
+            )
+
+        if not common:
+            logger.warning(
+                f'No {end} node label for edges of type {label}; the delta '
+                'script matches them without index.',
+            )
+            return None
+
+        return self.translator.name_sentence_to_pascal(common[0])
+
     def _construct_import_call(self) -> str:
         """
         Function to construct the import call detailing folder and
@@ -1109,3 +3663,18 @@ class BatchWriter:
             return (self.duplicate_edge_types, self.duplicate_edge_ids)
         else:
             return None
+
+    def get_dangling_edges(self):
+        """
+        Function to return the edges whose source or target has not been
+        written, if checked (see `edge_integrity`).
+
+        Returns:
+            tuple: the number of dangling edges per edge type, and the
+                missing node IDs; None if there are none
+        """
+
+        if self.dangling_edge_types:
+            return (dict(self.dangling_edge_types), self.dangling_node_ids)
+        else:
+            return None
@@ -3,14 +3,26 @@ import pickle
 import pstats
 import random
 import timeit
+import shutil
+import tempfile
 import cProfile
 
 from neo4j_utils._print import bcolors
 
-from biocypher._create import BioCypherEdge, BioCypherNode
+from biocypher._write import BatchWriter
+from biocypher._config import module_data_path
+from biocypher._create import (
+    VersionNode,
+    BioCypherEdge,
+    BioCypherNode,
+    TrustedStream,
+)
 from biocypher._driver import Driver
+from biocypher._translate import Translator, BiolinkAdapter, OntologyAdapter
 
 __all__ = [
+    'benchmark_query_translation',
+    'benchmark_trusted_write',
     'create_network_by_gen',
     'create_network_by_list',
     'create_networks',
@@ -169,6 +181,112 @@ def visualise_benchmark():
     plt.show()
 
 
+def benchmark_trusted_write(num_nodes=int(1e6), batch_size=int(1e4)):
+    """
+    Offline: times writing the same nodes with the batch writer from a
+    plain generator, whose batches are type checked, and from a trusted
+    stream, as returned by the translator.
+    """
+
+    version_node = VersionNode(
+        from_config=True,
+        config_file='biocypher/_config/test_schema_config.yaml',
+        offline=True,
+    )
+    translator = Translator(leaves=version_node.leaves)
+    ontology_adapter = OntologyAdapter(
+        biolink_adapter=BiolinkAdapter(
+            leaves=version_node.leaves,
+            translator=translator,
+            schema=module_data_path('test-biolink-model'),
+        ),
+    )
+
+    nodes = [
+        BioCypherNode(
+            f'p{i}',
+            'protein',
+            properties={
+                'name': 'name',
+                'score': 1.0,
+                'taxon': 9606,
+                'genes': ['gene1'],
+            },
+        ) for i in range(num_nodes)
+    ]
+
+    def write(trusted):
+        dirname = tempfile.mkdtemp()
+        bw = BatchWriter(
+            leaves=version_node.leaves,
+            ontology_adapter=ontology_adapter,
+            translator=translator,
+            delimiter=';',
+            array_delimiter='|',
+            quote="'",
+            dirname=dirname,
+        )
+        gen = (n for n in nodes)
+        bw.write_nodes(
+            TrustedStream(gen) if trusted else gen,
+            batch_size=batch_size,
+        )
+        shutil.rmtree(dirname)
+
+    res = {
+        'checked': timeit.timeit(lambda: write(False), number=3) / 3,
+        'trusted': timeit.timeit(lambda: write(True), number=3) / 3,
+    }
+
+    print(res)
+
+    return res
+
+
+def benchmark_query_translation(num_queries=int(1e4), num_mappings=500):
+    """
+    Times translating Cypher queries with the former loop over all
+    mappings, with the compiled label pattern, and with the pattern
+    answering repeated queries from its cache.
+    """
+
+    translator = Translator(leaves={})
+    translator.mappings = {
+        f'label_{i}': f'Label{i}' for i in range(num_mappings)
+    }
+
+    queries = [
+        f'MATCH (n:label_{random.randrange(num_mappings)})-'
+        f'[r:label_{random.randrange(num_mappings)}]->'
+        f'(m:label_{i % num_mappings}) WHERE n.id = "{i}" RETURN n, m'
+        for i in range(num_queries)
+    ]
+
+    def loop(query):
+        for key in translator.mappings:
+            query = query.replace(':' + key, ':' + translator.mappings[key])
+        return query
+
+    def pattern(query):
+        return translator._query_translator(False)._translate(query)
+
+    res = {
+        'loop': timeit.timeit(lambda: [loop(q) for q in queries], number=1),
+        'pattern': timeit.timeit(
+            lambda: [pattern(q) for q in queries],
+            number=1,
+        ),
+        'cached': timeit.timeit(
+            lambda: [translator.translate(q) for q in queries[:100] * 100],
+            number=1,
+        ),
+    }
+
+    print(res)
+
+    return res
+
+
 def profile_neo4j(num_nodes, num_edges):
 
     np, ep, epm = create_network_by_gen(num_nodes, num_edges, profile=True)
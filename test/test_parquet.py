@@ -0,0 +1,202 @@
+import os
+import random
+import string
+import tempfile
+
+import pytest
+
+from biocypher._config import module_data_path
+from biocypher._create import VersionNode, BioCypherEdge, BioCypherNode
+from biocypher._parquet import ParquetWriter
+from biocypher._translate import Translator, BiolinkAdapter, OntologyAdapter
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+def get_random_string(length):
+
+    # choose from all lowercase letter
+    letters = string.ascii_lowercase
+    return ''.join(random.choice(letters) for _ in range(length))
+
+
+# temporary output path
+path = os.path.join(
+    tempfile.gettempdir(),
+    f'biocypher-test-{get_random_string(5)}',
+)
+os.makedirs(path, exist_ok=True)
+
+
+@pytest.fixture
+def version_node():
+    return VersionNode(
+        from_config=True,
+        config_file='biocypher/_config/test_schema_config.yaml',
+        offline=True,
+    )
+
+
+@pytest.fixture
+def translator(version_node):
+    return Translator(leaves=version_node.leaves)
+
+
+@pytest.fixture
+def pw(version_node, translator):
+
+    biolink_adapter = BiolinkAdapter(
+        leaves=version_node.leaves,
+        translator=translator,
+        schema=module_data_path('test-biolink-model'),
+        clear_cache=True,
+    )
+
+    ontology_adapter = OntologyAdapter(biolink_adapter=biolink_adapter)
+
+    pw = ParquetWriter(
+        leaves=version_node.leaves,
+        ontology_adapter=ontology_adapter,
+        translator=translator,
+        dirname=path,
+        delimiter=';',
+        array_delimiter='|',
+        quote="'",
+    )
+
+    yield pw
+
+    # teardown
+    pw.close()
+    for f in os.listdir(path):
+        os.remove(os.path.join(path, f))
+    os.rmdir(path)
+
+
+def _get_nodes(l: int) -> list:
+    nodes = []
+    for i in range(l):
+        nodes.append(
+            BioCypherNode(
+                node_id=f'p{i+1}',
+                node_label='protein',
+                preferred_id='uniprot',
+                properties={
+                    'score': 4 / (i + 1),
+                    'name': 'StringProperty1',
+                    'taxon': 9606,
+                    'genes': ['gene1', 'gene2'],
+                },
+            )
+        )
+        nodes.append(
+            BioCypherNode(
+                node_id=f'm{i+1}',
+                node_label='microRNA',
+                preferred_id='mirbase',
+                properties={
+                    'name': 'StringProperty1',
+                    'taxon': 9606,
+                },
+            )
+        )
+
+    return nodes
+
+
+def test_write_nodes(pw):
+    passed = pw.write_nodes(_get_nodes(5), batch_size=2)
+    pw.write_import_call()
+
+    pf = pq.ParquetFile(os.path.join(path, 'Protein.parquet'))
+    table = pf.read()
+    row = table.slice(0, 1).to_pylist()[0]
+
+    assert passed
+    # one row group per batch
+    assert pf.metadata.num_row_groups == 3
+    assert table.column(':ID').to_pylist() == ['p1', 'p2', 'p3', 'p4', 'p5']
+    assert str(table.schema.field('score').type) == 'double'
+    assert str(table.schema.field('taxon').type) == 'int64'
+    assert row['genes'] == ['gene1', 'gene2']
+    assert 'Protein' in row[':LABEL']
+    assert os.path.exists(os.path.join(path, 'MicroRNA.parquet'))
+    assert not any(f.endswith('.csv') for f in os.listdir(path))
+
+
+def test_write_edges(pw):
+    edges = [
+        BioCypherEdge(
+            source_id=f'p{i}',
+            target_id=f'p{i + 1}',
+            relationship_label='PERTURBED_IN_DISEASE',
+            properties={
+                'residue': 'T253',
+                'level': 4,
+            },
+        ) for i in range(4)
+    ]
+
+    passed = pw.write_edges(edges)
+    pw.write_import_call()
+
+    table = pq.read_table(os.path.join(path, 'PERTURBED_IN_DISEASE.parquet'))
+
+    assert passed
+    assert table.column_names == [
+        ':START_ID', 'residue', 'level', ':END_ID', ':TYPE'
+    ]
+    assert table.column(':END_ID').to_pylist() == ['p1', 'p2', 'p3', 'p4']
+    assert table.column('level').to_pylist() == [4, 4, 4, 4]
+
+
+def test_write_nodes_property_mismatch(pw):
+    nodes = _get_nodes(2)
+    nodes[2].properties['extra'] = 1
+
+    assert not pw.write_nodes(nodes)
+
+
+def test_write_node_table(pw):
+    pd = pytest.importorskip('pandas')
+
+    frame = pd.DataFrame(
+        {
+            ':ID': ['p1', 'p2'],
+            'name': ['a', None],
+            'score': [1.5, 2.0],
+            'taxon': [9606, 9606],
+            'genes': [['g1', 'g2'], ['g3']],
+            'id': ['p1', 'p2'],
+            'preferred_id': 'uniprot',
+        },
+    )
+
+    passed = pw.write_node_table(frame, 'protein')
+    pw.write_import_call()
+
+    table = pq.read_table(os.path.join(path, 'Protein.parquet'))
+
+    assert passed
+    assert table.column('name').to_pylist() == ['a', None]
+    assert table.column('genes').to_pylist() == [['g1', 'g2'], ['g3']]
+    assert str(table.schema.field('taxon').type) == 'int64'
+
+
+def test_write_nodes_sharded(pw):
+    pw.n_shards = 2
+
+    passed = pw.write_nodes(_get_nodes(6))
+    pw.write_import_call()
+
+    ids = []
+    for shard in range(2):
+        table = pq.read_table(
+            os.path.join(path, f'Protein-shard{shard:03}.parquet'),
+        )
+        shard_ids = table.column(':ID').to_pylist()
+        ids.extend(shard_ids)
+        assert all(pw._shard_of(i) == shard for i in shard_ids)
+
+    assert passed
+    assert sorted(ids) == sorted(f'p{i + 1}' for i in range(6))
@@ -1,11 +1,17 @@
 from networkx.classes.graph import Graph
 from linkml_runtime.linkml_model.meta import ClassDefinition
 from networkx.algorithms.traversal.depth_first_search import dfs_tree
+from copy import deepcopy
 import pytest
 import networkx as nx
 
 from biocypher._config import module_data_path
-from biocypher._create import VersionNode, BioCypherEdge, BioCypherNode
+from biocypher._create import (
+    VersionNode,
+    BioCypherEdge,
+    BioCypherNode,
+    BioCypherRelAsNode,
+)
 from biocypher._translate import Translator, BiolinkAdapter, OntologyAdapter
 
 
@@ -81,6 +87,50 @@ def test_translate_nodes(translator):
     assert next(t).get_label() == 'altered gene product level'
 
 
+def test_translate_node_table(translator):
+    pd = pytest.importorskip('pandas')
+
+    table = pd.DataFrame(
+        {
+            'id': ['G9205', 'hsa-miR-132-3p', 'G9206', 'X1'],
+            'label': ['protein', 'mirna', 'protein', 'unknown'],
+            'name': ['a', 'b', 'c', 'd'],
+            'taxon': [9606, 9606, 9606, 9606],
+            'extra': [1, 2, 3, 4],
+        },
+    )
+
+    t = dict(translator.translate_node_table(table))
+    protein = t['protein']
+
+    assert set(t) == {'protein', 'microRNA'}
+    assert protein[':ID'].tolist() == ['G9205', 'G9206']
+    # properties not in the schema are removed, missing ones added
+    assert 'extra' not in protein.columns
+    assert protein['score'].isna().all()
+    assert protein['preferred_id'].tolist() == ['uniprot', 'uniprot']
+    assert translator.get_missing_biolink_types()['unknown'] == 1
+
+
+def test_translate_edge_table(translator):
+    pd = pytest.importorskip('pandas')
+
+    table = pd.DataFrame(
+        {
+            'source': ['G15258', 'G15258', 'G21058'],
+            'target': ['MONDO1', 'MONDO2', 'G50127'],
+            'label': ['gene_disease', 'protein_disease', 'post_translational'],
+        },
+    )
+
+    t = list(translator.translate_edge_table(table))
+    labels = [label for label, _ in t]
+    as_nodes = next(edges for label, edges in t if label is None)
+
+    assert 'PERTURBED_IN_DISEASE' in labels
+    assert all(type(e) == BioCypherRelAsNode for e in as_nodes)
+
+
 def test_specific_and_generic_ids(translator):
     id_type = [
         (
@@ -166,6 +216,40 @@ def test_translate_edges(translator):
     assert n3.get_source_edge().get_source_id() == 'G15258'
 
 
+def test_translate_edges_mixed_tuples(translator):
+    def gen_edges():
+        yield ('G15258', 'MONDO1', 'gene_disease', {})
+        yield ('e2', 'G15258', 'MONDO2', 'gene_disease', {})
+
+    t = list(translator.translate_edges(gen_edges()))
+
+    assert [e.get_id() for e in t] == [None, 'e2']
+    assert list(translator.translate_edges([])) == []
+
+
+def test_translate_pooled(translator):
+    nodes = [
+        (f'p{i}', 'protein' if i % 3 else 'unknown', {'taxon': i})
+        for i in range(50)
+    ]
+    edges = [
+        ('G15258', f'MONDO{i}', 'gene_disease', {}) for i in range(20)
+    ] + [('G15258', 'G16347', 'post_translational', {'directed': True})]
+
+    serial = list(translator.translate_nodes(nodes))
+    missing = dict(translator.get_missing_biolink_types())
+    translator.notype = {}
+
+    # in input order, with the missing types counted in the main process
+    pooled = translator.translate_nodes(nodes, workers=2, chunk_size=7)
+    assert list(pooled) == serial
+    assert translator.get_missing_biolink_types() == missing
+
+    pooled = list(translator.translate_edges(edges, workers=2, chunk_size=4))
+    assert pooled == list(translator.translate_edges(edges))
+    assert pooled[-1].get_node().get_id() == 'G15258_G16347_True'
+
+
 def test_biolink_adapter(version_node, translator):
     # current Biolink model (as opposed to rest of tests)
     ad = BiolinkAdapter(version_node.leaves, translator, clear_cache=True)
@@ -537,6 +621,19 @@ def test_translate_query(translator, biolink_adapter):
     )
 
 
+def test_translate_query_label_tokens(translator):
+    translator.mappings = {'protein': 'Protein', 'pro': 'Pro'}
+    query = 'MATCH (n:protein_isoform)-[:pro]->(m:protein:pro) RETURN n'
+
+    assert translator.translate(query) == (
+        'MATCH (n:protein_isoform)-[:Pro]->(m:Protein:Pro) RETURN n'
+    )
+
+    # the cache of translated queries is cleared with new mappings
+    translator._add_translation_mappings('protein_isoform', 'gene product')
+    assert translator.translate(query).startswith('MATCH (n:GeneProduct)')
+
+
 def test_reverse_translate_query(translator, biolink_adapter):
     # TODO cannot use sentence case in this context. include sentence to
     # pascal case and back in translation?
@@ -572,6 +669,14 @@ def test_log_missing_nodes(translator):
     assert m.get('missing_protein') == 2
     assert m.get('missing_pathway') == 1
 
+    # only the first few IDs of each type are kept as examples
+    ex = translator.get_missing_type_examples()
+    assert ex['missing_protein'] == ['G49205', 'G92035']
+    translator.missing_examples = 1
+    list(translator.translate_nodes([('P1', 'missing_pathway', {})]))
+    assert ex['missing_pathway'] == ['REACT:25520']
+    assert translator.get_missing_biolink_types()['missing_pathway'] == 2
+
 
 def test_show_ontology(ontology_adapter):
     treevis = ontology_adapter.show_ontology_structure()
@@ -646,6 +751,24 @@ def test_strict_mode_property_filter(translator):
     assert 'version' in l[0].get_properties().keys()
 
 
+def test_translation_plan(translator):
+    translator.strict_mode = True
+    leaves = deepcopy(translator.leaves)
+
+    required = {'source': 'test', 'licence': 'test', 'version': 'test'}
+    p1 = ('p1', 'protein', {'taxon': 9606, 'other': 1, **required})
+    p2 = ('p2', 'protein', {'name': 'x', **required})
+
+    n1, n2 = translator.translate_nodes([p1, p2])
+
+    # the plan is compiled once and the schema configuration is not modified
+    assert translator._plan('protein') is translator._plan('protein')
+    assert translator.leaves == leaves
+    assert 'other' not in n1.get_properties()
+    assert n1.get_properties()['source'] == 'test'
+    assert n2.get_properties()['taxon'] is None
+
+
 def test_networkx_from_treedict(biolink_adapter):
     graph = biolink_adapter.get_networkx_graph()
 
@@ -685,3 +808,21 @@ def test_generic_ontology_adapter(ontology_adapter):
     lethal_var = ontology_adapter.hybrid_ontology.nodes['lethal variant']
     assert lethal_var['accession'] == 'SO:0001773'
     assert 'def' in lethal_var.keys()
+
+
+def test_node_labels_cached(ontology_adapter):
+    labels = ontology_adapter.get_node_labels(
+        'decreased gene product level',
+        '|',
+    )
+
+    assert labels.split('|') == sorted(set(labels.split('|')))
+    assert 'AlteredGeneProductLevel' in labels.split('|')
+    assert ontology_adapter.get_node_labels('not in ontology', '|') == (
+        'NotInOntology'
+    )
+    # mutating the returned ancestry does not affect the cache
+    ontology_adapter.get_node_ancestry('decreased gene product level').clear()
+    assert len(
+        ontology_adapter.get_node_ancestry('decreased gene product level')
+    ) == 13
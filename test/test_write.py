@@ -1,17 +1,25 @@
 import os
+import gzip
+import pickle
 import random
+import shutil
 import string
 import tempfile
 
 from genericpath import isfile
 import pytest
 
+from biocypher._delta import cypher_value
+from biocypher._index import get_index
+from biocypher._stats import Stats
 from biocypher._write import BatchWriter
+import biocypher._write as bw_module
 from biocypher._config import module_data_path
 from biocypher._create import (
     VersionNode,
     BioCypherEdge,
     BioCypherNode,
+    TrustedStream,
     BioCypherRelAsNode,
 )
 from biocypher._driver import Driver
@@ -82,9 +90,12 @@ def bw(version_node, translator):
 
     yield bw
 
-    # teardown
+    # teardown; de-duplication indices spill to directories
     for f in os.listdir(path):
-        os.remove(os.path.join(path, f))
+        if os.path.isdir(os.path.join(path, f)):
+            shutil.rmtree(os.path.join(path, f))
+        else:
+            os.remove(os.path.join(path, f))
     os.rmdir(path)
 
 
@@ -260,6 +271,75 @@ def _get_nodes(l: int) -> list:
     return nodes
 
 
+def test_write_node_table(bw):
+    pd = pytest.importorskip('pandas')
+
+    nodes = [n for n in _get_nodes(4) if n.get_label() == 'protein']
+    props = [n.get_properties() for n in nodes]
+    frame = pd.DataFrame(props)
+    frame.insert(0, ':ID', [n.get_id() for n in nodes])
+    # duplicate and missing IDs are skipped
+    frame = pd.concat([frame, frame.iloc[:1]], ignore_index=True)
+    frame.loc[len(frame)] = frame.iloc[0]
+    frame.loc[len(frame) - 1, ':ID'] = None
+
+    passed = bw.write_node_table(frame, 'protein', batch_size=3)
+
+    prop_dict = bw.node_property_dict['protein']
+    serializer = bw_module._NodeSerializer(
+        prop_dict,
+        bw._node_labels('protein'),
+        bw.delim,
+        bw.adelim,
+        bw.quote,
+    )
+
+    with open(os.path.join(path, 'Protein-part000.csv')) as f:
+        part0 = f.read()
+    with open(os.path.join(path, 'Protein-part001.csv')) as f:
+        part1 = f.read()
+
+    assert passed
+    assert part0 + part1 == ''.join(serializer(nodes))
+    assert part0.count('\n') == 3
+    assert 'p1' in bw.duplicate_node_ids
+    assert os.path.exists(os.path.join(path, 'Protein-header.csv'))
+
+
+def test_write_edge_table(bw):
+    pd = pytest.importorskip('pandas')
+
+    edges = _get_edges(4)
+    frame = pd.DataFrame(
+        {
+            ':START_ID': [e.get_source_id() for e in edges[::2]],
+            ':END_ID': [e.get_target_id() for e in edges[::2]],
+            ':ID': None,
+            'residue': 'T253',
+            'level': 4,
+        },
+    )
+
+    passed = bw.write_edge_table(frame, 'PERTURBED_IN_DISEASE')
+
+    with open(os.path.join(path, 'PERTURBED_IN_DISEASE-part000.csv')) as f:
+        l = f.read()
+
+    assert (
+        passed and l ==
+        "p0;'T253';4;p1;PERTURBED_IN_DISEASE\np1;'T253';4;p2;PERTURBED_IN_DISEASE\np2;'T253';4;p3;PERTURBED_IN_DISEASE\np3;'T253';4;p4;PERTURBED_IN_DISEASE\n"
+    )
+
+
+def test_write_node_table_property_mismatch(bw):
+    pd = pytest.importorskip('pandas')
+
+    bw.node_property_dict['protein'] = {'name': 'str'}
+    frame = pd.DataFrame({':ID': ['p1'], 'name': ['a'], 'extra': [1]})
+
+    assert not bw.write_node_table(frame, 'protein')
+
+
 def test_property_types(bw):
     nodes = []
     for i in range(4):
@@ -344,6 +424,144 @@ def test_write_node_data_from_gen(bw):
     )
 
 
+def test_write_node_data_compiled_serializer(bw, monkeypatch):
+    compiled = []
+    compile_row = bw_module._RowSerializer._compile
+    monkeypatch.setattr(
+        bw_module._RowSerializer,
+        '_compile',
+        lambda self: compiled.append(self.prop_dict) or compile_row(self),
+    )
+
+    passed = bw.write_nodes(_get_nodes(8), batch_size=2)
+
+    assert passed
+    # one row function per label for all parts
+    assert len(compiled) == 2
+
+    serializer = bw._serializers['protein']
+    restored = pickle.loads(pickle.dumps(serializer))
+
+    assert restored(_get_nodes(1)[:1]) == serializer(_get_nodes(1)[:1])
+
+
+def test_write_node_data_part_size(bw):
+    # estimated row sizes: protein 131-146, microRNA 104 bytes
+    bw.part_size = 300
+
+    passed = bw.write_nodes(_get_nodes(8))
+
+    def lines(label):
+        parts = sorted(f for f in os.listdir(path) if f.startswith(label))
+        return [
+            sum(1 for _ in open(os.path.join(path, f)))
+            for f in parts
+            if '-part' in f
+        ]
+
+    assert passed
+    assert lines('Protein-') == [3, 3, 2]
+    assert lines('MicroRNA-') == [3, 3, 2]
+
+
+def test_write_node_data_memory_budget(bw):
+    bw.memory_budget = 550
+    parts = []
+
+    def gen(nodes):
+        for n in nodes:
+            parts.append(len(os.listdir(path)))
+            yield n
+
+    passed = bw.write_nodes(gen(_get_nodes(8)))
+
+    written = {
+        f: sum(1 for _ in open(os.path.join(path, f)))
+        for f in os.listdir(path)
+        if '-part' in f
+    }
+
+    assert passed
+    # bins are written before the input is depleted, largest first
+    assert parts[4] == 0 and parts[5] == 1
+    assert written['Protein-part000.csv'] == 3
+    assert sum(v for k, v in written.items() if k.startswith('Protein')) == 8
+    assert sum(v for k, v in written.items() if k.startswith('MicroRNA')) == 8
+
+
+def test_bins_shared_memory_budget():
+    budget = bw_module._Budget(limit=500)
+    node_bins = bw_module._Bins(100, None, budget)
+    edge_bins = bw_module._Bins(100, None, budget)
+
+    for n in _get_nodes(2):
+        node_bins.append(n.get_label(), n)
+
+    assert node_bins.full('protein') is None
+
+    # the budget is shared: adding edges makes the node bins the largest
+    for e in _get_edges(2)[:2]:
+        edge_bins.append(e.get_label(), e)
+
+    assert budget.total == sum(node_bins.bytes.values()) + sum(
+        edge_bins.bytes.values(),
+    )
+    assert budget.exceeded()
+    assert edge_bins.full('PERTURBED_IN_DISEASE') == (node_bins, 'protein')
+
+
+def test_write_node_data_async(bw):
+    bw.async_write = True
+
+    passed = bw.write_nodes(_get_nodes(8), batch_size=3)
+    pool = bw._writer_pool
+    bw.write_import_call()
+
+    with open(os.path.join(path, 'Protein-part002.csv')) as f:
+        p2 = f.read()
+
+    assert passed
+    assert pool and not pool.pending
+    assert bw._writer_pool is None
+    assert [l.split(';')[0] for l in p2.splitlines()] == ['p7', 'p8']
+
+
+def test_write_node_data_async_error(bw, monkeypatch):
+    bw.async_write = True
+
+    def fail(*args):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(bw_module, '_write_lines', fail)
+
+    passed = bw.write_nodes(_get_nodes(8), batch_size=3)
+
+    assert not passed
+
+
+def test_write_node_data_part_counters(bw, monkeypatch):
+    # existing parts of a previous run, and of a label sharing the prefix
+    for f in ['Protein-part004.csv', 'Protein-partner-part009.csv']:
+        open(os.path.join(path, f), 'w').close()
+
+    globs = []
+    glob = bw_module.glob.glob
+    monkeypatch.setattr(
+        bw_module.glob,
+        'glob',
+        lambda *args: globs.append(args) or glob(*args),
+    )
+
+    passed = bw.write_nodes(_get_nodes(4), batch_size=2)
+
+    assert passed
+    assert isfile(os.path.join(path, 'Protein-part005.csv'))
+    assert isfile(os.path.join(path, 'Protein-part006.csv'))
+    assert isfile(os.path.join(path, 'MicroRNA-part001.csv'))
+    # seeded once per label, then counted in memory
+    assert len(globs) == 2
+
+
 def test_write_node_data_from_gen_no_props(bw):
     nodes = []
     le = 4
@@ -552,6 +770,104 @@ def test_accidental_exact_batch_size(bw):
     )
 
 
+@pytest.mark.parametrize('parallel', ['thread', 'process'])
+def test_write_node_data_parallel(bw, parallel):
+    nodes = _get_nodes(10)
+
+    bw.parallel = parallel
+    bw.workers = 2
+
+    passed = bw.write_nodes(nodes, batch_size=3)
+
+    parts = sorted(f for f in os.listdir(path) if f.startswith('Protein-part'))
+
+    with open(os.path.join(path, 'Protein-part000.csv')) as f:
+        p0 = f.read()
+    with open(os.path.join(path, 'Protein-part003.csv')) as f:
+        p3 = f.read()
+    with open(os.path.join(path, 'Protein-header.csv')) as f:
+        header = f.read()
+
+    assert passed
+    assert parts == [
+        'Protein-part000.csv',
+        'Protein-part001.csv',
+        'Protein-part002.csv',
+        'Protein-part003.csv',
+    ]
+    assert [l.split(';')[0] for l in p0.splitlines()] == ['p1', 'p2', 'p3']
+    assert [l.split(';')[0] for l in p3.splitlines()] == ['p10']
+    assert header == (
+        ':ID;name;score:double;taxon:long;genes:string[];id;preferred_id;:LABEL'
+    )
+
+
+@pytest.mark.parametrize(
+    'compression, suffix, parallel, thread', [
+        ('gzip', 'gz', None, False),
+        ('gzip', 'gz', None, True),
+        ('gzip', 'gz', 'process', False),
+        ('zstd', 'zst', None, False),
+    ]
+)
+def test_write_node_data_compressed(bw, compression, suffix, parallel, thread):
+    if compression == 'zstd':
+        try:
+            zstd = bw_module._zstd()
+        except ImportError:
+            pytest.skip('no Zstandard implementation available')
+        opener = zstd.open
+    else:
+        opener = gzip.open
+
+    bw.compression = compression
+    bw.compression_thread = thread
+    bw.parallel = parallel
+    bw.workers = 2
+
+    nodes = _get_nodes(4)
+
+    passed = bw.write_nodes(nodes, batch_size=2)
+    bw.write_import_call()
+
+    p0 = os.path.join(path, f'Protein-part000.csv.{suffix}')
+    p1 = os.path.join(path, f'Protein-part001.csv.{suffix}')
+
+    with opener(p0, 'rt', encoding='utf-8') as f:
+        lines0 = f.readlines()
+    with opener(p1, 'rt', encoding='utf-8') as f:
+        lines1 = f.readlines()
+
+    assert passed
+    assert [l.split(';')[0] for l in lines0 + lines1] == [
+        'p1', 'p2', 'p3', 'p4'
+    ]
+    assert isfile(os.path.join(path, 'Protein-header.csv'))
+    assert (
+        f'--nodes="{path}/Protein-header.csv,'
+        f'{path}/Protein-part.*.csv.{suffix}" '
+    ) in bw.get_import_call()
+
+
+@pytest.mark.parametrize('parallel', ['thread', 'process'])
+def test_write_edge_data_parallel(bw, parallel):
+    edges = _get_edges(4)
+
+    bw.parallel = parallel
+    bw.workers = 2
+
+    passed = bw.write_edges(edges, batch_size=2)
+
+    with open(os.path.join(path, 'PERTURBED_IN_DISEASE-part000.csv')) as f:
+        l0 = f.read()
+    with open(os.path.join(path, 'PERTURBED_IN_DISEASE-part001.csv')) as f:
+        l1 = f.read()
+
+    assert passed
+    assert l0 == "p0;'T253';4;p1;PERTURBED_IN_DISEASE\np1;'T253';4;p2;PERTURBED_IN_DISEASE\n"
+    assert l1 == "p2;'T253';4;p3;PERTURBED_IN_DISEASE\np3;'T253';4;p4;PERTURBED_IN_DISEASE\n"
+
+
 def test_write_edge_data_from_gen(bw):
     edges = _get_edges(4)
 
@@ -766,6 +1082,32 @@ def test_BioCypherRelAsNode_implementation(bw):
     )
 
 
+def test_write_edges_streaming(bw):
+    trips = _get_rel_as_nodes(6)
+
+    def gen(lis):
+        for i, t in enumerate(lis):
+            if i == 4:
+                # the first batches are written before the input is depleted
+                assert isfile(os.path.join(path, 'IS_SOURCE_OF-part000.csv'))
+                assert isfile(
+                    os.path.join(
+                        path,
+                        'PostTranslationalInteraction-part000.csv',
+                    )
+                )
+            yield t
+
+    passed = bw.write_edges(gen(trips), batch_size=2)
+
+    iso_csv = os.path.join(path, 'IS_SOURCE_OF-part002.csv')
+    pti_csv = os.path.join(path, 'PostTranslationalInteraction-part002.csv')
+    pti_header = os.path.join(path, 'PostTranslationalInteraction-header.csv')
+
+    assert passed and isfile(iso_csv) and isfile(pti_csv)
+    assert isfile(pti_header)
+
+
 def _get_rel_as_nodes(l):
     rels = []
     for i in range(l):
@@ -1029,6 +1371,408 @@ def test_get_duplicate_nodes(bw):
     assert 'p1' in ids
 
 
+@pytest.mark.parametrize('kind', ['fingerprint', 'disk', 'bloom'])
+def test_get_duplicate_nodes_index(bw, kind):
+    bw.seen_node_ids = get_index(kind, capacity=100, max_memory_items=2)
+    csv = os.path.join(path, 'Protein-part000.csv')
+
+    nodes = _get_nodes(4)
+    nodes.append(
+        BioCypherNode(
+            node_id='p1',
+            node_label='protein',
+            properties={
+                'name': 'StringProperty1',
+                'score': 4.32,
+                'taxon': 9606,
+                'genes': ['gene1', 'gene2']
+            }
+        )
+    )
+
+    passed = bw.write_nodes(nodes)
+
+    types, ids = bw.get_duplicate_nodes()
+
+    assert passed
+    assert 'protein' in types
+    assert ids == {'p1'}
+    assert sum(1 for _ in open(csv)) == 4
+
+
+@pytest.mark.parametrize('kind', ['set', 'fingerprint', 'disk', 'bloom'])
+def test_dedup_index(kind):
+    index = get_index(kind, capacity=1000, max_memory_items=100)
+    keys = [f'n{i}' for i in range(500)] + [('a_b', 'c'), ('a', 'b_c')]
+
+    assert all(index.add(k) for k in keys)
+    assert not any(index.add(k) for k in keys)
+    assert all(k in index for k in keys)
+    assert len(index) == len(keys)
+
+    if kind != 'bloom':
+        assert 'n500' not in index
+
+
+@pytest.mark.parametrize('kind', ['set', 'fingerprint', 'disk', 'bloom'])
+def test_dedup_index_pickle(kind):
+    index = get_index(kind, capacity=1000, max_memory_items=100)
+    keys = [f'n{i}' for i in range(250)]
+
+    for k in keys:
+        index.add(k)
+
+    index = pickle.loads(pickle.dumps(index))
+
+    assert all(k in index for k in keys)
+    assert len(index) == len(keys)
+    assert index.add('n250')
+
+
+def test_disk_index_pickle_by_path():
+    index = get_index('disk', max_memory_items=10)
+    index.max_runs = 2
+
+    for i in range(25):
+        index.add(f'n{i}')
+
+    small = pickle.dumps(index)
+
+    for i in range(25, 500):
+        index.add(f'n{i}')
+
+    dump = pickle.dumps(index)
+    runs = [path for path, _ in index._runs]
+
+    # the runs are pickled by path, not by value
+    assert len(dump) - len(small) < 1000
+    assert all(os.path.exists(path) for path in runs)
+
+    # runs merged after pickling are kept for the pickle until pruned
+    for i in range(500, 600):
+        index.add(f'n{i}')
+
+    assert all(os.path.exists(path) for path in runs)
+    del index
+
+    restored = pickle.loads(dump)
+
+    assert all(f'n{i}' in restored for i in range(500))
+    assert 'n500' not in restored
+    assert len(restored) == 500
+
+    restored.prune()
+    restored.close()
+
+    assert not any(os.path.exists(path) for path in runs)
+
+
+def _writer(bw, **kwargs):
+    """
+    Another batch writer in the output directory of `bw`.
+    """
+
+    return BatchWriter(
+        leaves=bw.leaves,
+        ontology_adapter=bw.ontology_adapter,
+        translator=bw.translator,
+        dirname=path,
+        delimiter=';',
+        array_delimiter='|',
+        quote="'",
+        **kwargs,
+    )
+
+
+def test_write_nodes_checkpoint_resume(bw):
+    nodes = _get_nodes(10)
+
+    def crash_after(n):
+        for i, node in enumerate(nodes):
+            if i == n:
+                raise RuntimeError('crash')
+            yield node
+
+    first = _writer(bw, checkpoint_interval=4)
+
+    with pytest.raises(RuntimeError):
+        first.write_nodes(crash_after(10), batch_size=1, stream='nodes')
+
+    # two parts per label written before the crash, but after the
+    # checkpoint at 8 nodes
+    assert os.path.exists(os.path.join(path, 'Protein-part004.csv'))
+
+    resumed = _writer(bw, checkpoint_interval=4, resume=True)
+
+    assert resumed.get_stream_offset('nodes') == 8
+    assert not os.path.exists(os.path.join(path, 'Protein-part004.csv'))
+
+    passed = resumed.write_nodes(
+        (n for n in nodes),
+        batch_size=1,
+        stream='nodes',
+    )
+    resumed.write_import_call()
+
+    ids = []
+    for f in sorted(os.listdir(path)):
+        if f.startswith('Protein-part'):
+            with open(os.path.join(path, f)) as fh:
+                ids.extend(line.split(';')[0] for line in fh)
+
+    assert passed
+    assert ids == [f'p{i + 1}' for i in range(10)]
+    assert resumed.get_stream_offset('nodes') == 20
+    assert 'Protein-header.csv' in resumed.get_import_call()
+
+
+def test_write_edges_checkpoint_stream_offset(bw):
+    edges = _get_edges(4)
+
+    writer = _writer(bw, checkpoint_interval=3)
+    passed = writer.write_edges(
+        writer.open_stream(edges[2:], 'edges', offset=2),
+    )
+
+    resumed = _writer(bw, resume=True)
+
+    assert passed
+    assert resumed.get_stream_offset('edges') == 8
+    assert resumed.edge_property_dict.keys() == {
+        'PERTURBED_IN_DISEASE',
+        'Is_Mutated_In',
+    }
+
+
+def test_delta_export(bw):
+    delta_path = os.path.join(tempfile.gettempdir(), f'{path}-delta.pkl')
+
+    first = _writer(bw, delta_index=delta_path)
+    first.write_nodes(_get_nodes(3))
+    first.write_edges(_get_edges(2))
+    first.write_import_call()
+
+    for f in os.listdir(path):
+        os.remove(os.path.join(path, f))
+
+    # p1 changed, p3 and m3 removed, p4 and m4 added; edges from p0 and m0
+    # removed
+    nodes = [n for n in _get_nodes(4) if n.get_id() not in ('p3', 'm3')]
+    nodes[0].get_properties()['name'] = 'changed'
+    edges = _get_edges(2)[2:]
+
+    second = _writer(bw, delta_index=delta_path)
+    second.write_nodes(nodes)
+    second.write_edges(edges)
+    second.write_import_call()
+
+    with open(os.path.join(path, 'Protein-part000.csv')) as f:
+        proteins = [l.split(';')[0] for l in f]
+    with open(os.path.join(path, 'MicroRNA-part000.csv')) as f:
+        mirnas = [l.split(';')[0] for l in f]
+    with open(os.path.join(path, 'Protein-removed.csv')) as f:
+        removed = f.read()
+    with open(os.path.join(path, 'PERTURBED_IN_DISEASE-removed.csv')) as f:
+        removed_edges = f.read()
+    with open(os.path.join(path, 'delta-import.cypher')) as f:
+        script = f.read()
+
+    os.remove(delta_path)
+
+    assert proteins == ['p1', 'p4']
+    assert mirnas == ['m4']
+    assert removed == 'p3\n'
+    assert removed_edges == 'p0;p1\n'
+    assert not os.path.exists(os.path.join(path, 'Is_Mutated_In-part000.csv'))
+    assert second.delta.counts == {'added': 2, 'changed': 1, 'unchanged': 5}
+    assert "LOAD CSV FROM 'file:///Protein-removed.csv'" in script
+    assert 'DETACH DELETE n' in script
+    assert 'MERGE (n:`Protein` {id: row[0]})' in script
+    assert 'n.`score` = toFloat(row[2])' in script
+    assert (
+        "n.`genes` = split(CASE WHEN size(row[4]) >= 2 "
+        "THEN substring(row[4], 1, size(row[4]) - 2) ELSE null END, '|')"
+        in script
+    )
+    assert script.index('DELETE r') < script.index('MERGE (n')
+    # edge endpoints are matched by label, so that Neo4j uses the index
+    label = second._endpoint_label('PERTURBED_IN_DISEASE', 'source')
+    assert label in second._node_labels('protein').split('|')
+    assert label in second._node_labels('microRNA').split('|')
+    assert f'MATCH (:`{label}` {{id: row[0]}})-[r:' in script
+
+
+def test_delta_empty_field(bw):
+    delta_path = os.path.join(tempfile.gettempdir(), f'{path}-delta.pkl')
+
+    writer = _writer(bw, delta_index=delta_path)
+    nodes = _get_nodes(1)
+    nodes[0].get_properties()['name'] = ''
+    writer.write_nodes(nodes)
+    writer.write_edges(_get_edges(1))
+    writer.write_import_call()
+
+    with open(os.path.join(path, 'Protein-part000.csv')) as f:
+        row = f.read().split(';')
+    with open(os.path.join(path, 'delta-import.cypher')) as f:
+        script = f.read()
+
+    os.remove(delta_path)
+
+    # an empty string is written as two quotes, a null as empty field;
+    # neither is cut to a negative length
+    assert row[1] == "''"
+    assert (
+        'n.`name` = CASE WHEN size(row[1]) >= 2 '
+        'THEN substring(row[1], 1, size(row[1]) - 2) ELSE null END'
+        in script
+    )
+    assert cypher_value('row[1]', 'str', '|', '"') == 'row[1]'
+
+    label = writer._endpoint_label('PERTURBED_IN_DISEASE', 'target')
+    assert f'MATCH (s:`{label}` {{id: row[0]}}), (t:`{label}`' in script
+
+
+def test_delta_edge_dedup_with_id(bw):
+    delta_path = os.path.join(tempfile.gettempdir(), f'{path}-delta.pkl')
+
+    # the delta script could not tell apart edges differing only by ID,
+    # and would delete all of them if one is removed
+    with pytest.raises(ValueError):
+        _writer(bw, delta_index=delta_path, edge_dedup_with_id=True)
+
+    assert not os.path.exists(delta_path)
+
+
+def test_write_sharded(bw):
+    writer = _writer(bw, n_shards=2)
+
+    passed = writer.write_nodes(_get_nodes(8), batch_size=3)
+    passed = passed and writer.write_edges(_get_edges(4))
+
+    shards = {}
+    for f in os.listdir(path):
+        if '-shard' in f and f.startswith(('Protein', 'PERTURBED')):
+            with open(os.path.join(path, f)) as fh:
+                shards[f] = [l.split(';')[0] for l in fh]
+
+    protein_ids = sorted(
+        i for f, ids in shards.items() if f.startswith('Protein')
+        for i in ids
+    )
+
+    assert passed
+    assert protein_ids == sorted(f'p{i + 1}' for i in range(8))
+    assert 'Protein-part000.csv' not in os.listdir(path)
+
+    for f, ids in shards.items():
+        # each shard has its own part sequence
+        shard = int(f.split('-shard')[1][:3])
+        assert all(writer._shard_of(i) == shard for i in ids)
+
+    assert 'Protein-shard001-part000.csv' in shards
+    assert 'PERTURBED_IN_DISEASE-shard000-part000.csv' in shards
+    assert 'Protein-shard.*' in writer.get_import_call()
+
+
+def test_write_property_union(bw):
+    writer = _writer(bw, property_union=True)
+
+    nodes = [
+        BioCypherNode(
+            node_id='m1',
+            node_label='microRNA',
+            properties={'name': 'a'},
+        ),
+        BioCypherNode(
+            node_id='m2',
+            node_label='microRNA',
+            properties={'taxon': 9606},
+        ),
+    ]
+
+    passed = writer.write_nodes(nodes)
+    passed = passed and writer.write_nodes(
+        [
+            BioCypherNode(
+                node_id='m3',
+                node_label='microRNA',
+                properties={'name': 'c', 'score': 0.5},
+            ),
+        ],
+    )
+
+    with open(os.path.join(path, 'MicroRNA-header.csv')) as f:
+        header = f.read().strip().split(';')
+    with open(os.path.join(path, 'MicroRNA-part000.csv')) as f:
+        rows = [l.split(';') for l in f.read().splitlines()]
+
+    assert passed
+    assert header[:2] == [':ID', ':LABEL']
+    assert {'name', 'taxon:long', 'score:double'} <= set(header)
+    assert len(rows[0]) == len(rows[1]) < len(header)
+    assert rows[1][header.index('name')] == ''
+    assert rows[1][header.index('taxon:long')] == '9606'
+
+
+def test_property_union_snapshot(bw):
+    serializer = bw_module._NodeSerializer(
+        {'name': 'str'},
+        'MicroRNA',
+        bw.delim,
+        bw.adelim,
+        bw.quote,
+        union=True,
+    )
+    node = BioCypherNode('m1', 'microRNA', properties={'taxon': 9606})
+
+    snapshot = serializer.snapshot()
+    serializer.extend([node])
+
+    # the row function is compiled when extending, not by the workers,
+    # and a snapshot handed to a worker is not changed
+    assert serializer([node]) == ["m1;MicroRNA;;9606;'m1';'id'\n"]
+    assert snapshot([node]) == ["m1;MicroRNA;\n"]
+    assert snapshot.prop_dict == {'name': 'str'}
+
+
+def test_write_stats(bw):
+    stats = Stats(enabled=True, log_interval=0)
+    writer = _writer(bw, stats=stats)
+
+    nodes = _get_nodes(4)
+    stats.expect(len(nodes))
+    passed = writer.write_nodes(nodes)
+    passed = passed and writer.write_edges(_get_edges(4))
+
+    summary = stats.summary()
+
+    assert passed
+    assert summary['rows'] == 16
+    assert summary['labels']['protein']['rows'] == 4
+    assert summary['labels']['protein']['bytes'] > 0
+    assert set(summary['stages']) == {'dedup', 'serialization', 'write'}
+    assert 'dedup' in summary['labels']['PERTURBED_IN_DISEASE']
+    assert summary['eta'] == 0
+
+
+def test_stats_disabled():
+    stats = Stats()
+    stats.count('protein', 10, 100)
+
+    with stats.timer('write'):
+        pass
+
+    assert stats.summary()['rows'] == 0
+    assert not stats.summary()['stages']
+    assert stats.iterate('translation', 'ab') == 'ab'
+
+
+def test_dedup_index_unknown():
+    with pytest.raises(ValueError):
+        get_index('tree')
+
+
 def test_duplicate_edges(bw):
     edges = _get_edges(4)
     edges.append(
@@ -1065,6 +1809,238 @@ def test_get_duplicate_edges(bw):
     assert 'p1_p2' in ids
 
 
+def test_duplicate_edges_underscore_ids(bw):
+    edges = [
+        BioCypherEdge(
+            source_id='a_b',
+            target_id='c',
+            relationship_label='PERTURBED_IN_DISEASE',
+        ),
+        BioCypherEdge(
+            source_id='a',
+            target_id='b_c',
+            relationship_label='PERTURBED_IN_DISEASE',
+        ),
+    ]
+
+    passed = bw.write_edges(edges)
+
+    csv = os.path.join(path, 'PERTURBED_IN_DISEASE-part000.csv')
+
+    assert passed
+    assert not bw.duplicate_edge_ids
+    assert sum(1 for _ in open(csv)) == 2
+
+
+@pytest.mark.parametrize('with_id, n_lines', [(False, 1), (True, 2)])
+def test_duplicate_edges_with_id(bw, with_id, n_lines):
+    bw.edge_dedup_with_id = with_id
+    edges = [
+        BioCypherEdge(
+            relationship_id=f'r{i}',
+            source_id='p1',
+            target_id='p2',
+            relationship_label='PERTURBED_IN_DISEASE',
+        ) for i in range(2)
+    ]
+
+    passed = bw.write_edges(edges)
+
+    csv = os.path.join(path, 'PERTURBED_IN_DISEASE-part000.csv')
+
+    assert passed
+    assert sum(1 for _ in open(csv)) == n_lines
+
+
+@pytest.mark.parametrize('edge_index', ['set', 'fingerprint'])
+def test_duplicate_edges_index(bw, edge_index):
+    bw = _writer(bw, edge_index=edge_index)
+    edges = _get_edges(4)
+
+    passed = bw.write_edges(edges + edges[:3])
+
+    csv = os.path.join(path, 'PERTURBED_IN_DISEASE-part000.csv')
+
+    assert passed
+    assert sum(1 for _ in open(csv)) == 4
+    assert len(bw.duplicate_edge_ids) == 3
+
+
+@pytest.mark.parametrize('mode, n_lines', [('count', 4), ('filter', 3)])
+def test_edge_integrity(bw, mode, n_lines):
+    bw.edge_integrity = mode
+
+    passed = bw.write_nodes(_get_nodes(4))
+    passed = passed and bw.write_edges(_get_edges(4))
+
+    csv = os.path.join(path, 'PERTURBED_IN_DISEASE-part000.csv')
+    types, ids = bw.get_dangling_edges()
+
+    assert passed
+    assert sum(1 for _ in open(csv)) == n_lines
+    assert types == {'PERTURBED_IN_DISEASE': 1, 'Is_Mutated_In': 1}
+    assert ids == {'p0', 'm0'}
+
+
+@pytest.mark.parametrize('mode, n_lines', [('count', 4), ('filter', 3)])
+def test_edge_integrity_external(bw, mode, n_lines):
+    writer = _writer(bw, edge_dedup='external', edge_integrity=mode)
+
+    edges = _get_edges(4)
+    passed = writer.write_nodes(_get_nodes(4))
+    # duplicates of the dangling edges are not counted again
+    passed = passed and writer.write_edges(edges + edges[:2])
+
+    csv = os.path.join(path, 'PERTURBED_IN_DISEASE-part000.csv')
+    types, ids = writer.get_dangling_edges()
+
+    assert passed
+    assert sum(1 for _ in open(csv)) == n_lines
+    assert types == {'PERTURBED_IN_DISEASE': 1, 'Is_Mutated_In': 1}
+    assert ids == {'p0', 'm0'}
+
+
+def test_edge_integrity_table_filter(bw):
+    pd = pytest.importorskip('pandas')
+    bw.edge_integrity = 'filter'
+
+    edges = _get_edges(4)[::2]
+    frame = pd.DataFrame(
+        {
+            ':START_ID': [e.get_source_id() for e in edges],
+            ':END_ID': [e.get_target_id() for e in edges],
+            ':ID': None,
+            'residue': 'T253',
+            'level': 4,
+        },
+    )
+
+    passed = bw.write_nodes(_get_nodes(4))
+    passed = passed and bw.write_edge_table(frame, 'PERTURBED_IN_DISEASE')
+    # all rows are duplicates the second time, none is left to filter
+    passed = passed and bw.write_edge_table(frame, 'PERTURBED_IN_DISEASE')
+
+    csv = os.path.join(path, 'PERTURBED_IN_DISEASE-part000.csv')
+
+    assert passed
+    assert [l.split(';')[0] for l in open(csv)] == ['p1', 'p2', 'p3']
+    assert bw.get_dangling_edges()[1] == {'p0'}
+
+
+def test_edge_dedup_external(bw):
+    writer = _writer(bw, edge_dedup='external', sort_buffer_items=3)
+
+    edges = _get_edges(4)
+    passed = writer.write_edges(edges[::-1] + edges[:2])
+    # duplicates of edges written by an earlier call
+    passed = passed and writer.write_edges(_get_edges(5))
+
+    csv = os.path.join(path, 'PERTURBED_IN_DISEASE-part000.csv')
+    with open(csv) as f:
+        first = [l.split(';')[0] for l in f]
+    csv = os.path.join(path, 'PERTURBED_IN_DISEASE-part001.csv')
+    with open(csv) as f:
+        second = [l.split(';')[0] for l in f]
+
+    assert passed
+    # sorted by key, not in input order
+    assert first == ['p0', 'p1', 'p2', 'p3']
+    assert second == ['p4']
+    assert writer.get_duplicate_edges()[0] == {
+        'PERTURBED_IN_DISEASE',
+        'Is_Mutated_In',
+    }
+    assert 'p0_p1' in writer.get_duplicate_edges()[1]
+    assert not any(
+        f.startswith('biocypher-sort-run') for f in os.listdir(path)
+    )
+
+    writer.write_import_call()
+
+    assert not any(f.startswith('biocypher-sort') for f in os.listdir(path))
+
+
+def test_edge_dedup_external_resume(bw):
+    writer = _writer(
+        bw,
+        edge_dedup='external',
+        sort_buffer_items=2,
+        checkpoint_interval=100,
+    )
+    passed = writer.write_edges(writer.open_stream(_get_edges(4), 'edges'))
+
+    # a run spilled after the checkpoint, before a crash
+    leftover = os.path.join(path, 'biocypher-sort-run999999.pkl')
+    open(leftover, 'wb').close()
+
+    resumed = _writer(bw, edge_dedup='external', resume=True)
+    kept = resumed.edge_sorter.files()
+
+    assert passed
+    assert kept
+    assert not os.path.exists(leftover)
+    assert all(os.path.exists(os.path.join(path, f)) for f in kept)
+
+
+def test_disk_index_resume(bw, caplog):
+    writer = _writer(
+        bw,
+        node_dedup='disk',
+        dedup_memory_items=2,
+        checkpoint_interval=100,
+    )
+    passed = writer.write_nodes(writer.open_stream(_get_nodes(4), 'nodes'))
+    index_dir = writer.seen_node_ids.directory
+
+    # the runs are kept in the output directory, with the checkpoint
+    assert passed
+    assert os.path.dirname(index_dir) == os.path.abspath(path)
+    assert writer.seen_node_ids.files()
+
+    # an index and a run created after the checkpoint, before a crash
+    leftover_dir = os.path.join(path, 'biocypher-index-leftover')
+    leftover_run = os.path.join(index_dir, 'run999999')
+    os.makedirs(leftover_dir)
+    open(leftover_run, 'wb').close()
+
+    resumed = _writer(bw, node_dedup='disk', resume=True)
+
+    assert not os.path.exists(leftover_dir)
+    assert not os.path.exists(leftover_run)
+    assert resumed.get_stream_offset('nodes') == 8
+    assert 'p1' in resumed.seen_node_ids
+
+    # the runs are lost, eg, by cleaning the output directory
+    shutil.rmtree(index_dir)
+    restarted = _writer(bw, node_dedup='disk', resume=True)
+
+    assert 'Could not load checkpoint' in caplog.text
+    assert restarted.get_stream_offset('nodes') == 0
+    assert not any(f.startswith('Protein-part') for f in os.listdir(path))
+
+
+def test_write_trusted_stream(bw, monkeypatch):
+    checked = []
+    monkeypatch.setattr(
+        bw,
+        '_write_single_node_list_to_file',
+        lambda *args, validate=True: checked.append(validate) or True,
+    )
+
+    assert bw.write_nodes(TrustedStream(n for n in _get_nodes(2)))
+    assert bw.write_nodes(n for n in _get_nodes(4)[4:])
+
+    # batches of both labels, once trusted and once checked
+    assert checked == [False, False, True, True]
+
+
+def test_translator_output_trusted(translator):
+    nodes = translator.translate_nodes([('G9205', 'protein', {})])
+
+    assert isinstance(nodes, TrustedStream)
+    assert len(list(nodes)) == 1
+
+
 def test_write_strict(bw_strict):
 
     n1 = BioCypherNode(